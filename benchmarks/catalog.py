@@ -0,0 +1,277 @@
+"""
+Генератор синтетического каталога для бенчмарков.
+
+Заполняет базу из `.env` деревом категорий заданной глубины и ветвления и товарами
+с атрибутами, распределёнными как в реальном каталоге: популярные бренды и цвета
+встречаются намного чаще остальных, часть атрибутов есть не у всех товаров.
+Данные загружаются через COPY, поэтому миллион товаров заливается за десятки секунд.
+
+При одинаковом `--seed` каталог получается одинаковым.
+
+Запуск: `python -m benchmarks.catalog --categories 1000 --depth 3 --fanout 10 --products 1000000 --truncate`
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import math
+import random
+import time
+from decimal import Decimal
+from itertools import accumulate
+from typing import Iterator
+from uuid import UUID
+
+import asyncpg
+
+from products_app.config import PostgresConfig, get_app_config
+
+
+COLORS = (
+    'black',
+    'white',
+    'grey',
+    'red',
+    'blue',
+    'green',
+    'brown',
+    'beige',
+    'yellow',
+    'orange',
+    'purple',
+    'pink',
+)
+MATERIALS = ('steel', 'wood', 'plastic', 'concrete', 'glass', 'aluminium', 'copper')
+SIZES = ('S', 'M', 'L', 'XL')
+WARRANTY_MONTHS = (6, 12, 24, 36)
+BRANDS = tuple(f'brand-{number}' for number in range(1, 501))
+UNITS = ('pc', 'kg', 'g', 'l', 'ml', 'm', 'cm', 'mm')
+
+CATEGORY_COLUMNS = ('id', 'created_at', 'name', 'parent_category_id')
+PRODUCT_COLUMNS = (
+    'id',
+    'created_at',
+    'name',
+    'description',
+    'price',
+    'stock',
+    'unit',
+    'unit_size',
+    'attributes',
+    'category_id',
+)
+
+CREATED_AT = dt.datetime(2024, 1, 1)
+
+
+def zipf_weights(size: int, exponent: float = 1.1) -> list[float]:
+    """Накопленные веса распределения Ципфа для random.choices"""
+    return list(accumulate(1 / rank**exponent for rank in range(1, size + 1)))
+
+
+COLOR_WEIGHTS = zipf_weights(len(COLORS))
+BRAND_WEIGHTS = zipf_weights(len(BRANDS), exponent=1.2)
+UNIT_WEIGHTS = list(accumulate((60, 15, 5, 5, 3, 7, 3, 2)))
+
+
+def random_uuid(rng: random.Random) -> UUID:
+    return UUID(int=rng.getrandbits(128), version=4)
+
+
+def random_created_at(rng: random.Random) -> dt.datetime:
+    return CREATED_AT + dt.timedelta(seconds=rng.randrange(365 * 24 * 3600))
+
+
+def generate_categories(
+    rng: random.Random,
+    count: int,
+    depth: int,
+    fanout: int,
+) -> tuple[list[tuple], list[UUID]]:
+    """
+    Строит дерево категорий в ширину: корни, затем по `fanout` детей у каждой категории,
+    пока не наберётся `count` категорий или не будет достигнута глубина `depth`.
+
+    Возвращает строки для COPY и id листьев, к которым привязываются товары
+    """
+    per_root = sum(fanout**level for level in range(depth))
+    roots = max(math.ceil(count / per_root), 1)
+
+    rows = []
+    level = [None] * roots
+    for level_number in range(depth):
+        next_level = []
+        for parent_id in level:
+            if len(rows) >= count:
+                break
+
+            category_id = random_uuid(rng)
+            rows.append(
+                (
+                    category_id,
+                    random_created_at(rng),
+                    f'Category {len(rows) + 1}',
+                    parent_id,
+                ),
+            )
+            if level_number < depth - 1:
+                next_level.extend([category_id] * fanout)
+
+        level = next_level
+
+    parents = {row[3] for row in rows}
+    leaves = [row[0] for row in rows if row[0] not in parents]
+    return rows, leaves
+
+
+def random_attributes(rng: random.Random, number: int) -> dict:
+    attributes = {'sku': f'SKU-{number:08d}'}
+    if rng.random() < 0.95:
+        attributes['brand'] = rng.choices(BRANDS, cum_weights=BRAND_WEIGHTS)[0]
+    if rng.random() < 0.8:
+        attributes['color'] = rng.choices(COLORS, cum_weights=COLOR_WEIGHTS)[0]
+    if rng.random() < 0.7:
+        attributes['weight'] = round(rng.lognormvariate(0.4, 1.0), 2)
+    if rng.random() < 0.6:
+        attributes['rating'] = round(rng.triangular(1, 5, 4.3), 1)
+    if rng.random() < 0.5:
+        attributes['material'] = rng.choice(MATERIALS)
+    if rng.random() < 0.3:
+        attributes['warranty_months'] = rng.choices(
+            WARRANTY_MONTHS,
+            weights=(2, 5, 2, 1),
+        )[0]
+    if rng.random() < 0.2:
+        attributes['size'] = rng.choice(SIZES)
+
+    return attributes
+
+
+def generate_products(
+    rng: random.Random,
+    count: int,
+    category_ids: list[UUID],
+    batch_size: int,
+) -> Iterator[list[tuple]]:
+    """Товары пачками по `batch_size`. Популярные категории получают больше товаров"""
+    category_weights = zipf_weights(len(category_ids), exponent=0.8)
+
+    batch = []
+    for number in range(1, count + 1):
+        price = max(rng.lognormvariate(6.2, 1.1), 0.01)
+        stock = 0 if rng.random() < 0.1 else rng.randrange(1, 1000)
+        batch.append(
+            (
+                random_uuid(rng),
+                random_created_at(rng),
+                f'Product {number}',
+                f'Description of product {number}',
+                Decimal(f'{price:.2f}'),
+                Decimal(stock),
+                rng.choices(UNITS, cum_weights=UNIT_WEIGHTS)[0],
+                Decimal(rng.choice(('1', '0.5', '2', '5', '10', '25'))),
+                json.dumps(random_attributes(rng, number)),
+                rng.choices(category_ids, cum_weights=category_weights)[0]
+                if category_ids
+                else None,
+            ),
+        )
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def connect(config: PostgresConfig) -> asyncpg.Connection:
+    return await asyncpg.connect(
+        user=config.POSTGRES_USER,
+        password=config.POSTGRES_PASSWORD,
+        database=config.POSTGRES_DB,
+        host=config.POSTGRES_HOST,
+        port=config.POSTGRES_PORT,
+    )
+
+
+async def seed_catalog(
+    connection: asyncpg.Connection,
+    categories: int,
+    depth: int,
+    fanout: int,
+    products: int,
+    seed: int,
+    batch_size: int = 50_000,
+    truncate: bool = False,
+) -> None:
+    rng = random.Random(seed)
+
+    if truncate:
+        await connection.execute(
+            'TRUNCATE product, category, category_deletion_job, catalog_change, '
+            'catalog_change_prune',
+        )
+
+    started_at = time.perf_counter()
+    category_rows, leaves = generate_categories(rng, categories, depth, fanout)
+    await connection.copy_records_to_table(
+        'category',
+        records=category_rows,
+        columns=CATEGORY_COLUMNS,
+    )
+    print(
+        f'categories: {len(category_rows)} ({len(leaves)} leaves) '
+        f'in {time.perf_counter() - started_at:.1f}s',
+    )
+
+    started_at = time.perf_counter()
+    loaded = 0
+    for batch in generate_products(rng, products, leaves, batch_size):
+        await connection.copy_records_to_table(
+            'product',
+            records=batch,
+            columns=PRODUCT_COLUMNS,
+        )
+        loaded += len(batch)
+        print(f'products: {loaded}/{products}', end='\r', flush=True)
+    print(f'products: {loaded} in {time.perf_counter() - started_at:.1f}s')
+
+    # Свежая статистика, чтобы планы запросов в бенчмарках были как на живой базе
+    await connection.execute('ANALYZE category, product')
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = get_app_config('.env').postgres
+    connection = await connect(config)
+    try:
+        await seed_catalog(
+            connection,
+            categories=args.categories,
+            depth=args.depth,
+            fanout=args.fanout,
+            products=args.products,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            truncate=args.truncate,
+        )
+    finally:
+        await connection.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--categories', type=int, default=1000)
+    parser.add_argument('--depth', type=int, default=3)
+    parser.add_argument('--fanout', type=int, default=10)
+    parser.add_argument('--products', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--batch-size', type=int, default=50_000)
+    parser.add_argument(
+        '--truncate',
+        action='store_true',
+        help='Очистить товары и категории перед загрузкой',
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
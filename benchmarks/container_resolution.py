@@ -0,0 +1,85 @@
+"""
+Замер стоимости разрешения зависимостей Dishka для каждого роута.
+
+Для каждого роута в цикле открываются REQUEST scope и `session_scope` и достаются все его
+`FromDishka` зависимости, так же, как это делают интеграция с FastAPI и `SessionScopeMiddleware`.
+К БД бенчмарк не подключается.
+
+Запуск: `python -m benchmarks.container_resolution --iterations 20000`
+"""
+
+import argparse
+import asyncio
+import inspect
+import time
+
+from dishka import AsyncContainer, make_async_container
+from dishka.integrations.base import is_dishka_injected
+from fastapi.routing import APIRoute
+
+from products_app.config import AppConfig, get_app_config
+from products_app.controllers.http.routers.main import router
+from products_app.infra.database.session import session_scope
+from products_app.ioc.main import providers
+
+
+def _route_dependencies(route: APIRoute) -> list:
+    # DishkaRoute хранит ключи зависимостей в замыкании обёртки над хэндлером,
+    # при include_router хэндлер оборачивается повторно
+    dependencies = []
+    endpoint = route.endpoint
+    while is_dishka_injected(endpoint):
+        closure_vars = inspect.getclosurevars(endpoint).nonlocals
+        dependencies.extend(closure_vars['dependencies'].values())
+        endpoint = closure_vars['func']
+
+    return dependencies
+
+
+async def _measure_route(
+    container: AsyncContainer,
+    dependencies: list,
+    iterations: int,
+) -> float:
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        async with container() as request_container, session_scope():
+            for dependency in dependencies:
+                await request_container.get(
+                    dependency.type_hint,
+                    component=dependency.component,
+                )
+
+    return (time.perf_counter() - started_at) / iterations
+
+
+async def main(iterations: int) -> None:
+    container = make_async_container(
+        *providers,
+        context={
+            AppConfig: get_app_config('.env'),
+        },
+    )
+
+    print(f'{"route":<50} {"us/request":>10}')
+    for route in router.routes:
+        dependencies = _route_dependencies(route)
+        if not dependencies:
+            continue
+
+        # Первый проход прогревает APP scope, чтобы он не попал в замер
+        await _measure_route(container, dependencies, iterations=1)
+        seconds = await _measure_route(container, dependencies, iterations)
+
+        name = f'{",".join(sorted(route.methods))} {route.path}'
+        print(f'{name:<50} {seconds * 1_000_000:>10.1f}')
+
+    await container.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=20000)
+    args = parser.parse_args()
+
+    asyncio.run(main(iterations=args.iterations))
@@ -0,0 +1,394 @@
+"""
+Нагрузочный тест приложения под gunicorn.
+
+Поднимает приложение локально с настройками `docker/gunicorn_conf.py` для каждого количества воркеров
+и ступенчато увеличивает число одновременных клиентов. Клиенты шлют запросы в пропорциях
+реального трафика: 70% получение товара, 20% поиск, 8% дерево категорий, 2% создание товара.
+
+Для каждой ступени выводятся перцентили задержки, ошибки, пропускная способность
+и среднее ожидание соединения из пула БД, а для каждого количества воркеров - точка насыщения:
+ступень, после которой рост клиентов почти не добавляет пропускной способности.
+
+Каталог заранее заполняется `python -m benchmarks.catalog`, созданные товары удаляются после прогона.
+
+Запуск: `python -m benchmarks.load_test --workers 1,2,4 --concurrency 8,16,32,64,128 --duration 15`
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import httpx
+from prometheus_client.parser import text_string_to_metric_families
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.stats import summarize
+from benchmarks.suite import (
+    PAGE_SIZE,
+    SEARCH_FILTERS,
+    Catalog,
+    Request,
+    load_catalog,
+    product_body,
+)
+from products_app.config import get_app_config
+from products_app.infra.database.models import ProductModel
+
+
+GUNICORN_CONF = Path(__file__).resolve().parent.parent / 'docker' / 'gunicorn_conf.py'
+
+
+@dataclass(slots=True)
+class Scenario:
+    name: str
+    weight: int
+    request: Callable[[random.Random, Catalog], Request]
+
+
+def _get_product(rng: random.Random, catalog: Catalog) -> Request:
+    return 'GET', f'/products/{rng.choice(catalog.product_ids)}', None, None
+
+
+def _search(rng: random.Random, catalog: Catalog) -> Request:
+    filters = rng.choice(list(SEARCH_FILTERS.values()))
+    return 'POST', '/products/search', {'limit': PAGE_SIZE}, filters(rng)
+
+
+def _category_tree(rng: random.Random, catalog: Catalog) -> Request:
+    return 'GET', '/categories/root', {'depth': rng.randint(1, 3)}, None
+
+
+def _create_product(rng: random.Random, catalog: Catalog) -> Request:
+    return 'POST', '/products/', None, product_body(rng, catalog)
+
+
+SCENARIOS = (
+    Scenario('get_product', 70, _get_product),
+    Scenario('search', 20, _search),
+    Scenario('category_tree', 8, _category_tree),
+    Scenario('create_product', 2, _create_product),
+)
+
+
+class GunicornServer:
+    """Приложение под gunicorn с production настройками на локальном порту"""
+
+    def __init__(self, workers: int, port: int, log_path: Path):
+        self.workers = workers
+        self.port = port
+        self.log_path = log_path
+        self.metrics_dir = tempfile.mkdtemp(prefix='prometheus-')
+        self._process: subprocess.Popen | None = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self) -> None:
+        env = {
+            **os.environ,
+            'WEB_CONCURRENCY': str(self.workers),
+            'BIND': f'127.0.0.1:{self.port}',
+            'PROMETHEUS_MULTIPROC_DIR': self.metrics_dir,
+            # Access log в stdout заметно нагружает воркеры и искажает замер
+            'ACCESS_LOG': '',
+            'GRACEFUL_TIMEOUT': '5',
+        }
+        with self.log_path.open('ab') as log:
+            self._process = subprocess.Popen(
+                [
+                    sys.executable,
+                    '-m',
+                    'gunicorn',
+                    '--worker-class',
+                    'uvicorn.workers.UvicornWorker',
+                    '--config',
+                    str(GUNICORN_CONF),
+                    'products_app.main:create_fastapi_app()',
+                ],
+                env=env,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+            )
+
+    async def wait_ready(self, client: httpx.AsyncClient, timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                raise RuntimeError(f'gunicorn exited, see {self.log_path}')
+
+            try:
+                response = await client.get(f'{self.base_url}/health/ready')
+                if response.status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+
+            await asyncio.sleep(0.2)
+
+        raise RuntimeError(f'gunicorn is not ready in {timeout}s, see {self.log_path}')
+
+    def stop(self) -> None:
+        if self._process is None:
+            return
+
+        self._process.send_signal(signal.SIGTERM)
+        try:
+            self._process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            self._process.kill()
+            self._process.wait()
+
+
+async def _pool_checkout_wait(
+    client: httpx.AsyncClient,
+    base_url: str,
+) -> tuple[float, float]:
+    """Суммарное время и количество ожиданий соединения из пула по всем воркерам"""
+    response = await client.get(f'{base_url}/metrics')
+    total = count = 0.0
+    for family in text_string_to_metric_families(response.text):
+        if family.name != 'db_pool_checkout_wait_seconds':
+            continue
+
+        for sample in family.samples:
+            if sample.name.endswith('_sum'):
+                total += sample.value
+            elif sample.name.endswith('_count'):
+                count += sample.value
+
+    return total, count
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    base_url: str,
+    catalog: Catalog,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    rng: random.Random,
+) -> dict:
+    """
+    Замкнутая нагрузка: `concurrency` клиентов шлют запросы друг за другом.
+
+    У каждого клиента свои соединение и cookie: после записи приложение закрепляет
+    за мастером только писавшего клиента
+    """
+    scenario_weights = [scenario.weight for scenario in SCENARIOS]
+    latencies: dict[str, list[float]] = {scenario.name: [] for scenario in SCENARIOS}
+    errors: dict[str, int] = {}
+    measuring = False
+
+    async def user(stop_at: float) -> None:
+        async with httpx.AsyncClient(timeout=client.timeout) as user_client:
+            await user_requests(user_client, stop_at)
+
+    async def user_requests(user_client: httpx.AsyncClient, stop_at: float) -> None:
+        while time.monotonic() < stop_at:
+            scenario = rng.choices(SCENARIOS, weights=scenario_weights)[0]
+            method, url, params, body = scenario.request(rng, catalog)
+            started_at = time.perf_counter()
+            try:
+                response = await user_client.request(
+                    method,
+                    f'{base_url}{url}',
+                    params=params,
+                    json=body,
+                )
+            except httpx.TransportError as error:
+                error_name = type(error).__name__
+            else:
+                error_name = (
+                    None if response.status_code < 500 else str(response.status_code)
+                )
+            latency = time.perf_counter() - started_at
+
+            if (
+                error_name is None
+                and scenario.name == 'create_product'
+                and response.status_code == 201
+            ):
+                catalog.created_product_ids.append(response.json()['id'])
+
+            if not measuring:
+                continue
+            if error_name is not None:
+                errors[error_name] = errors.get(error_name, 0) + 1
+                continue
+
+            latencies[scenario.name].append(latency)
+
+    started_at = time.monotonic()
+    stop_at = started_at + warmup + duration
+    users = [asyncio.create_task(user(stop_at)) for _ in range(concurrency)]
+
+    await asyncio.sleep(warmup)
+    wait_before = await _pool_checkout_wait(client, base_url)
+    measuring = True
+    measure_started_at = time.perf_counter()
+    await asyncio.gather(*users)
+    elapsed = time.perf_counter() - measure_started_at
+    wait_after = await _pool_checkout_wait(client, base_url)
+
+    all_latencies = [latency for values in latencies.values() for latency in values]
+    error_count = sum(errors.values())
+    checkouts = wait_after[1] - wait_before[1]
+    return {
+        'concurrency': concurrency,
+        **summarize(all_latencies, elapsed, error_count).to_dict(),
+        'error_rate': error_count / max(len(all_latencies) + error_count, 1),
+        'errors_by_type': errors,
+        'pool_checkout_wait_ms': (
+            (wait_after[0] - wait_before[0]) / checkouts * 1000 if checkouts else 0.0
+        ),
+        'scenarios': {
+            name: summarize(values, elapsed).to_dict()
+            for name, values in latencies.items()
+        },
+    }
+
+
+def saturation_point(
+    levels: list[dict],
+    min_gain: float,
+    max_error_rate: float,
+) -> dict | None:
+    """
+    Последняя ступень, на которой рост клиентов ещё давал прирост пропускной способности
+    не меньше `min_gain` и ошибок было не больше `max_error_rate`
+    """
+    best = None
+    for level in levels:
+        if level['error_rate'] > max_error_rate:
+            break
+        if best is not None and level['throughput'] < best['throughput'] * (
+            1 + min_gain
+        ):
+            break
+
+        best = level
+
+    return best
+
+
+def _print_level(level: dict) -> None:
+    print(
+        f'{level["concurrency"]:>6} {level["throughput"]:>8.1f} {level["p50"]:>8.2f} '
+        f'{level["p95"]:>8.2f} {level["p99"]:>8.2f} {level["error_rate"]:>7.2%} '
+        f'{level["pool_checkout_wait_ms"]:>9.2f}',
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = get_app_config('.env')
+    engine = create_async_engine(config.postgres.database_uri)
+    catalog = await load_catalog(engine, deep_ratio=0)
+
+    log_path = Path(tempfile.gettempdir()) / 'products_app_load_test.log'
+    rng = random.Random(args.seed)
+    report = {'settings': vars(args) | {'output': str(args.output)}, 'workers': {}}
+    try:
+        async with httpx.AsyncClient(timeout=args.timeout) as client:
+            for workers in args.workers:
+                server = GunicornServer(
+                    workers=workers, port=args.port, log_path=log_path
+                )
+                server.start()
+                try:
+                    await server.wait_ready(client, timeout=60)
+
+                    print(f'\nworkers: {workers}')
+                    print(
+                        f'{"users":>6} {"rps":>8} {"p50 ms":>8} {"p95 ms":>8} '
+                        f'{"p99 ms":>8} {"errors":>7} {"pool ms":>9}',
+                    )
+                    levels = []
+                    for concurrency in args.concurrency:
+                        level = await run_level(
+                            client,
+                            server.base_url,
+                            catalog,
+                            concurrency=concurrency,
+                            duration=args.duration,
+                            warmup=args.warmup,
+                            rng=rng,
+                        )
+                        levels.append(level)
+                        _print_level(level)
+                finally:
+                    server.stop()
+
+                saturation = saturation_point(
+                    levels,
+                    min_gain=args.saturation_gain,
+                    max_error_rate=args.max_error_rate,
+                )
+                if saturation is not None:
+                    print(
+                        f'saturation: {saturation["concurrency"]} users, '
+                        f'{saturation["throughput"]:.1f} rps, p95 {saturation["p95"]:.2f} ms',
+                    )
+                report['workers'][workers] = {
+                    'levels': levels,
+                    'saturation': saturation,
+                }
+    finally:
+        if catalog.created_product_ids:
+            async with engine.begin() as connection:
+                await connection.execute(
+                    delete(ProductModel).where(
+                        ProductModel.id.in_(catalog.created_product_ids),
+                    ),
+                )
+        await engine.dispose()
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+
+
+def _int_list(value: str) -> list[int]:
+    return [int(item) for item in value.split(',')]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--workers', type=_int_list, default=[1, 2])
+    parser.add_argument('--concurrency', type=_int_list, default=[4, 8, 16, 32, 64])
+    parser.add_argument(
+        '--duration',
+        type=float,
+        default=10,
+        help='Длительность замера на ступени, в секундах',
+    )
+    parser.add_argument(
+        '--warmup',
+        type=float,
+        default=3,
+        help='Разгон перед замером на каждой ступени, в секундах',
+    )
+    parser.add_argument('--port', type=int, default=8099)
+    parser.add_argument('--timeout', type=float, default=30)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument(
+        '--saturation-gain',
+        type=float,
+        default=0.1,
+        help='Минимальный прирост пропускной способности до точки насыщения',
+    )
+    parser.add_argument('--max-error-rate', type=float, default=0.01)
+    parser.add_argument('--output', type=Path)
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -0,0 +1,134 @@
+"""
+Сравнение сборки JSON ответа поиска товаров в воркере и из JSON, сохранённого в базе.
+
+Одни и те же запросы `POST /products/search` прогоняются через приложение, где ответ собирает
+воркер (ProductModel -> ProductEntity -> pydantic -> JSON), и через приложение, где ответ
+склеивается из готовых JSON товаров (`DATABASE_RENDERED_ENDPOINTS=["products_search"]`).
+Кеш поиска отключён. Кроме задержек считается процессорное время воркера на запрос и размер ответа.
+Каталог заранее заполняется `python -m benchmarks.catalog`.
+
+Запуск: `python -m benchmarks.rendering --iterations 300 --limit 200`
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import random
+import time
+
+import httpx
+from dishka import make_async_container
+from dishka.integrations.fastapi import setup_dishka
+
+from benchmarks.stats import summarize
+from benchmarks.suite import SEARCH_FILTERS
+from products_app.config import AppConfig, get_app_config
+from products_app.ioc.main import providers
+from products_app.main import create_fastapi_app
+
+
+RENDERING_MODES = {
+    'python': [],
+    'database': ['products_search'],
+}
+
+
+def _config(rendered_endpoints: list[str]) -> AppConfig:
+    config = get_app_config('.env')
+    return dataclasses.replace(
+        config,
+        common=config.common.model_copy(
+            update={'DATABASE_RENDERED_ENDPOINTS': rendered_endpoints},
+        ),
+        search_cache=config.search_cache.model_copy(
+            update={'SEARCH_CACHE_MAX_BYTES': 0},
+        ),
+    )
+
+
+async def _measure(
+    rendered_endpoints: list[str],
+    filters_name: str,
+    args: argparse.Namespace,
+) -> dict:
+    container = make_async_container(
+        *providers,
+        context={AppConfig: _config(rendered_endpoints)},
+    )
+    app = create_fastapi_app()
+    setup_dishka(container=container, app=app)
+
+    filters = SEARCH_FILTERS[filters_name]
+    # Одинаковый seed, чтобы оба режима получили одни и те же фильтры
+    rng = random.Random(args.seed)
+    latencies = []
+    errors = 0
+    response_bytes = 0
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url='http://benchmark',
+        ) as client:
+
+            async def send() -> httpx.Response:
+                return await client.post(
+                    '/products/search',
+                    params={'limit': args.limit},
+                    json=filters(rng),
+                )
+
+            for _ in range(args.warmup):
+                await send()
+
+            started_at = time.perf_counter()
+            cpu_started_at = time.process_time()
+            for _ in range(args.iterations):
+                request_started_at = time.perf_counter()
+                response = await send()
+                if response.status_code >= 400:
+                    errors += 1
+                    continue
+
+                latencies.append(time.perf_counter() - request_started_at)
+                response_bytes += len(response.content)
+            cpu_time = time.process_time() - cpu_started_at
+            elapsed = time.perf_counter() - started_at
+    finally:
+        await container.close()
+
+    result = summarize(latencies, elapsed, errors).to_dict()
+    result['cpu_ms_per_op'] = cpu_time * 1000 / args.iterations
+    result['bytes_per_op'] = response_bytes / max(len(latencies), 1)
+    return result
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(
+        f'{"filters":<18} {"mode":<9} {"p50 ms":>8} {"p95 ms":>8} {"ops/s":>8} '
+        f'{"cpu ms/op":>10} {"bytes/op":>9}',
+    )
+    for filters_name in args.filters:
+        for mode, rendered_endpoints in RENDERING_MODES.items():
+            result = await _measure(rendered_endpoints, filters_name, args)
+            print(
+                f'{filters_name:<18} {mode:<9} {result["p50"]:>8.2f} '
+                f'{result["p95"]:>8.2f} {result["throughput"]:>8.1f} '
+                f'{result["cpu_ms_per_op"]:>10.2f} {result["bytes_per_op"]:>9.0f}',
+            )
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument(
+        '--filters',
+        nargs='+',
+        choices=SEARCH_FILTERS,
+        default=['no_filters', 'price_range', 'attribute_eq'],
+    )
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
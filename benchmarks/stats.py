@@ -0,0 +1,51 @@
+import math
+from dataclasses import asdict, dataclass
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Перцентиль с линейной интерполяцией, `sorted_values` должны быть отсортированы"""
+    if not sorted_values:
+        return 0.0
+
+    position = (len(sorted_values) - 1) * q
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    fraction = position - lower
+    return sorted_values[lower] * (1 - fraction) + sorted_values[upper] * fraction
+
+
+@dataclass(slots=True)
+class LatencySummary:
+    operations: int
+    errors: int
+    # Успешных операций в секунду
+    throughput: float
+    # Задержки в миллисекундах
+    mean: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+def summarize(
+    latencies: list[float],
+    elapsed: float,
+    errors: int = 0,
+) -> LatencySummary:
+    """Сводка по задержкам успешных операций в секундах и общему времени замера"""
+    latencies = sorted(latencies)
+    milliseconds = [latency * 1000 for latency in latencies]
+    return LatencySummary(
+        operations=len(latencies),
+        errors=errors,
+        throughput=len(latencies) / elapsed if elapsed > 0 else 0.0,
+        mean=sum(milliseconds) / len(milliseconds) if milliseconds else 0.0,
+        p50=percentile(milliseconds, 0.5),
+        p95=percentile(milliseconds, 0.95),
+        p99=percentile(milliseconds, 0.99),
+        max=milliseconds[-1] if milliseconds else 0.0,
+    )
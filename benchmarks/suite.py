@@ -0,0 +1,497 @@
+"""
+Бенчмарки основных сценариев API на локальном Postgres.
+
+Приложение запускается в процессе и вызывается через ASGI, поэтому в замер попадают
+middleware, валидация и сериализация, но не сеть. Каталог заранее заполняется
+`python -m benchmarks.catalog`. Созданные бенчмарками записи удаляются после прогона.
+
+Результаты (p50/p95/p99 в мс, операций в секунду, запросов к БД на операцию) пишутся в JSON
+и сравниваются с сохранённым baseline. При регрессии сверх порога скрипт завершается с кодом 1.
+
+Запуск: `python -m benchmarks.suite --output results.json --baseline benchmarks/baseline.json`
+"""
+
+import argparse
+import asyncio
+import datetime as dt
+import json
+import math
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+from dishka import make_async_container
+from dishka.integrations.fastapi import setup_dishka
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from benchmarks.catalog import (
+    BRAND_WEIGHTS,
+    BRANDS,
+    COLOR_WEIGHTS,
+    COLORS,
+    random_attributes,
+)
+from benchmarks.stats import summarize
+from products_app.config import AppConfig, get_app_config
+from products_app.controllers.http.cursor import encode_cursor
+from products_app.infra.database.models import CategoryModel, ProductModel
+from products_app.ioc.main import providers
+from products_app.main import create_fastapi_app
+
+
+# Метод, url, query-параметры, JSON тело
+Request = tuple[str, str, dict | None, Any]
+
+# Насколько метрика может ухудшиться относительно baseline, доля от значения в baseline
+DEFAULT_THRESHOLDS = {
+    'p95': 0.2,
+    'p99': 0.3,
+    'throughput': 0.15,
+    'queries_per_op': 0.0,
+}
+HIGHER_IS_BETTER = {'throughput'}
+
+PAGE_SIZE = 50
+SAMPLE_SIZE = 1000
+
+
+@dataclass(slots=True)
+class Catalog:
+    products: int
+    categories: int
+    product_ids: list[str]
+    category_ids: list[str]
+    leaf_category_ids: list[str]
+    deep_product_offset: int
+    deep_category_offset: int
+    deep_category_cursor: str
+    # Товары, созданные бенчмарками, их обновляют и удаляют после прогона
+    created_product_ids: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Benchmark:
+    name: str
+    request: Callable[[random.Random], Request]
+    # Сохранять id созданных записей из ответа
+    collects_created: bool = False
+
+
+async def load_catalog(engine: AsyncEngine, deep_ratio: float) -> Catalog:
+    async with engine.connect() as connection:
+        products = await connection.scalar(select(func.count(ProductModel.id)))
+        categories = await connection.scalar(select(func.count(CategoryModel.id)))
+        if not products or not categories:
+            raise SystemExit(
+                'Catalog is empty, seed it with `python -m benchmarks.catalog`',
+            )
+
+        product_ids = await connection.scalars(
+            select(ProductModel.id).order_by(func.random()).limit(SAMPLE_SIZE),
+        )
+        category_ids = await connection.scalars(
+            select(CategoryModel.id).order_by(func.random()).limit(SAMPLE_SIZE),
+        )
+        sub_category = CategoryModel.__table__.alias('sub_category')
+        leaf_category_ids = await connection.scalars(
+            select(CategoryModel.id)
+            .where(
+                ~select(sub_category.c.id)
+                .where(sub_category.c.parent_category_id == CategoryModel.id)
+                .exists(),
+            )
+            .limit(SAMPLE_SIZE),
+        )
+
+        deep_category_offset = int(categories * deep_ratio)
+        deep_category = (
+            await connection.execute(
+                select(CategoryModel.name, CategoryModel.id)
+                .order_by(CategoryModel.name, CategoryModel.id)
+                .offset(deep_category_offset)
+                .limit(1),
+            )
+        ).one()
+
+    return Catalog(
+        products=products,
+        categories=categories,
+        product_ids=[str(product_id) for product_id in product_ids],
+        category_ids=[str(category_id) for category_id in category_ids],
+        leaf_category_ids=[str(category_id) for category_id in leaf_category_ids],
+        deep_product_offset=int(products * deep_ratio),
+        deep_category_offset=deep_category_offset,
+        deep_category_cursor=encode_cursor(
+            [deep_category.name, str(deep_category.id)],
+        ),
+    )
+
+
+def product_body(rng: random.Random, catalog: Catalog) -> dict:
+    number = rng.randrange(10**8)
+    return {
+        'name': f'Benchmark product {number}',
+        'description': f'Description of benchmark product {number}',
+        'price': round(rng.lognormvariate(6.2, 1.1) + 0.01, 2),
+        'stock': rng.randrange(1000),
+        'unit': 'pc',
+        'unit_size': 1,
+        'category_id': rng.choice(catalog.leaf_category_ids),
+        'attributes': random_attributes(rng, number),
+    }
+
+
+def _search(filters: Callable[[random.Random], dict | None]) -> Callable[..., Request]:
+    def request(rng: random.Random) -> Request:
+        return 'POST', '/products/search', {'limit': PAGE_SIZE}, filters(rng)
+
+    return request
+
+
+def _color(rng: random.Random) -> str:
+    return rng.choices(COLORS, cum_weights=COLOR_WEIGHTS)[0]
+
+
+def _brand(rng: random.Random) -> str:
+    return rng.choices(BRANDS, cum_weights=BRAND_WEIGHTS)[0]
+
+
+def _price_range(rng: random.Random) -> dict:
+    price = round(rng.lognormvariate(6.2, 1.1), 2)
+    return {'price__gt': price, 'price__lt': price * 2}
+
+
+def _weight_range(rng: random.Random) -> dict:
+    weight = round(rng.uniform(0.5, 5), 1)
+    return {'weight__gt': weight, 'weight__lt': weight + 1}
+
+
+# Наборы фильтров поиска, которые встречаются в реальных запросах
+SEARCH_FILTERS: dict[str, Callable[[random.Random], dict | None]] = {
+    'no_filters': lambda rng: None,
+    'price_range': _price_range,
+    'attribute_eq': lambda rng: {'color__eq': _color(rng)},
+    'attribute_range': _weight_range,
+    'combined': lambda rng: {
+        'brand__eq': _brand(rng),
+        'color__eq': _color(rng),
+        'price__lt': 1000,
+    },
+    'rare_attribute': lambda rng: {'warranty_months__eq': 36, 'size__eq': 'XL'},
+}
+
+
+def build_benchmarks(catalog: Catalog) -> list[Benchmark]:
+    def update_product(rng: random.Random) -> Request:
+        product_id = rng.choice(catalog.created_product_ids)
+        return 'PUT', f'/products/{product_id}', None, product_body(rng, catalog)
+
+    return [
+        Benchmark(
+            'get_product',
+            lambda rng: (
+                'GET',
+                f'/products/{rng.choice(catalog.product_ids)}',
+                None,
+                None,
+            ),
+        ),
+        Benchmark(
+            'get_category',
+            lambda rng: (
+                'GET',
+                f'/categories/{rng.choice(catalog.category_ids)}',
+                None,
+                None,
+            ),
+        ),
+        *(
+            Benchmark(f'search_{name}', _search(filters))
+            for name, filters in SEARCH_FILTERS.items()
+        ),
+        Benchmark(
+            'products_deep_offset',
+            lambda rng: (
+                'POST',
+                '/products/search',
+                {'limit': PAGE_SIZE, 'offset': catalog.deep_product_offset},
+                None,
+            ),
+        ),
+        Benchmark(
+            'categories_deep_offset',
+            lambda rng: (
+                'GET',
+                '/categories/',
+                {'limit': PAGE_SIZE, 'offset': catalog.deep_category_offset},
+                None,
+            ),
+        ),
+        Benchmark(
+            'categories_deep_cursor',
+            lambda rng: (
+                'GET',
+                '/categories/',
+                {'limit': PAGE_SIZE, 'cursor': catalog.deep_category_cursor},
+                None,
+            ),
+        ),
+        Benchmark(
+            'category_tree_depth_2',
+            lambda rng: ('GET', '/categories/root', {'depth': 2}, None),
+        ),
+        Benchmark(
+            'category_tree_depth_5',
+            lambda rng: ('GET', '/categories/root', {'depth': 5}, None),
+        ),
+        Benchmark(
+            'create_product',
+            lambda rng: ('POST', '/products/', None, product_body(rng, catalog)),
+            collects_created=True,
+        ),
+        Benchmark('update_product', update_product),
+    ]
+
+
+class QueryCounter:
+    """Считает запросы к БД без служебных SET"""
+
+    def __init__(self):
+        self.queries = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if not statement.startswith('SET '):
+            self.queries += 1
+
+
+async def run_benchmark(
+    client: httpx.AsyncClient,
+    benchmark: Benchmark,
+    catalog: Catalog,
+    iterations: int,
+    concurrency: int,
+    warmup: int,
+    rng: random.Random,
+) -> dict:
+    query_counter = QueryCounter()
+    latencies = []
+    errors = 0
+    remaining = iterations
+
+    async def send() -> None:
+        nonlocal errors
+        method, url, params, body = benchmark.request(rng)
+        started_at = time.perf_counter()
+        response = await client.request(method, url, params=params, json=body)
+        latency = time.perf_counter() - started_at
+
+        if response.status_code >= 400:
+            errors += 1
+            return
+
+        latencies.append(latency)
+        if benchmark.collects_created:
+            catalog.created_product_ids.append(response.json()['id'])
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await send()
+
+    for _ in range(warmup):
+        await send()
+    latencies.clear()
+    errors = 0
+
+    event.listen(Engine, 'before_cursor_execute', query_counter)
+    started_at = time.perf_counter()
+    try:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    finally:
+        elapsed = time.perf_counter() - started_at
+        event.remove(Engine, 'before_cursor_execute', query_counter)
+
+    # Записи привязывают клиента к мастеру, следующий бенчмарк начинается без этого
+    client.cookies.clear()
+
+    result = summarize(latencies, elapsed, errors).to_dict()
+    result['queries_per_op'] = query_counter.queries / iterations
+    return result
+
+
+def compare(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    thresholds: dict[str, float],
+) -> list[str]:
+    """Возвращает описания регрессий относительно baseline"""
+    regressions = []
+    for name, metrics in results.items():
+        baseline_metrics = baseline.get(name)
+        if baseline_metrics is None:
+            continue
+
+        for metric, threshold in thresholds.items():
+            current = metrics[metric]
+            previous = baseline_metrics[metric]
+            if metric in HIGHER_IS_BETTER:
+                change = (previous - current) / previous if previous else 0.0
+            elif previous:
+                change = (current - previous) / previous
+            else:
+                change = math.inf if current > 0 else 0.0
+
+            if change > threshold:
+                regressions.append(
+                    f'{name}: {metric} {previous:.2f} -> {current:.2f} '
+                    f'({change:+.0%}, threshold {threshold:.0%})',
+                )
+
+    return regressions
+
+
+def _print_results(results: dict[str, dict]) -> None:
+    print(
+        f'{"benchmark":<26} {"ops":>6} {"err":>4} {"p50 ms":>8} {"p95 ms":>8} '
+        f'{"p99 ms":>8} {"ops/s":>8} {"q/op":>6}',
+    )
+    for name, result in results.items():
+        print(
+            f'{name:<26} {result["operations"]:>6} {result["errors"]:>4} '
+            f'{result["p50"]:>8.2f} {result["p95"]:>8.2f} {result["p99"]:>8.2f} '
+            f'{result["throughput"]:>8.1f} {result["queries_per_op"]:>6.2f}',
+        )
+
+
+def _parse_thresholds(values: list[str]) -> dict[str, float]:
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for value in values:
+        metric, _, threshold = value.partition('=')
+        thresholds[metric] = float(threshold)
+
+    return thresholds
+
+
+async def main(args: argparse.Namespace) -> int:
+    config = get_app_config('.env')
+    container = make_async_container(*providers, context={AppConfig: config})
+    app = create_fastapi_app()
+    setup_dishka(container=container, app=app)
+
+    catalog = await load_catalog(await container.get(AsyncEngine), args.deep_ratio)
+    benchmarks = [
+        benchmark
+        for benchmark in build_benchmarks(catalog)
+        if not args.only or any(only in benchmark.name for only in args.only)
+    ]
+
+    rng = random.Random(args.seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url='http://benchmark',
+        ) as client:
+            for benchmark in benchmarks:
+                if (
+                    benchmark.name == 'update_product'
+                    and not catalog.created_product_ids
+                ):
+                    continue
+
+                results[benchmark.name] = await run_benchmark(
+                    client,
+                    benchmark,
+                    catalog,
+                    iterations=args.iterations,
+                    concurrency=args.concurrency,
+                    warmup=args.warmup,
+                    rng=rng,
+                )
+    finally:
+        if catalog.created_product_ids:
+            async with (await container.get(AsyncEngine)).begin() as connection:
+                await connection.execute(
+                    delete(ProductModel).where(
+                        ProductModel.id.in_(catalog.created_product_ids),
+                    ),
+                )
+        await container.close()
+
+    _print_results(results)
+
+    report = {
+        'created_at': dt.datetime.now(dt.UTC).isoformat(),
+        'settings': {
+            'iterations': args.iterations,
+            'concurrency': args.concurrency,
+            'seed': args.seed,
+        },
+        'catalog': {'products': catalog.products, 'categories': catalog.categories},
+        'results': results,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2))
+
+    if args.baseline is None:
+        return 0
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2))
+        print(f'Baseline saved to {args.baseline}')
+        return 0
+
+    baseline = json.loads(args.baseline.read_text())
+    regressions = compare(
+        results,
+        baseline['results'],
+        _parse_thresholds(args.threshold),
+    )
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=300)
+    parser.add_argument('--concurrency', type=int, default=1)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument(
+        '--deep-ratio',
+        type=float,
+        default=0.9,
+        help='Глубина страницы для бенчмарков пагинации, доля от размера каталога',
+    )
+    parser.add_argument(
+        '--only',
+        action='append',
+        default=[],
+        help='Запустить только бенчмарки, в названии которых есть подстрока',
+    )
+    parser.add_argument('--output', type=Path)
+    parser.add_argument('--baseline', type=Path)
+    parser.add_argument(
+        '--save-baseline',
+        action='store_true',
+        help='Записать результаты в --baseline вместо сравнения',
+    )
+    parser.add_argument(
+        '--threshold',
+        action='append',
+        default=[],
+        help='Порог регрессии метрики, например p95=0.1',
+    )
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main(args)))
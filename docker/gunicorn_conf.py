@@ -1,6 +1,13 @@
 import json
 import multiprocessing
 import os
+import shutil
+
+# Workers write metrics into a shared directory, /metrics aggregates all of them.
+# Must be set before prometheus_client is imported
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/dev/shm/prometheus')
+
+from prometheus_client import multiprocess  # noqa: E402
 
 workers_per_core_str = os.getenv('WORKERS_PER_CORE', '1')
 max_workers_str = os.getenv('MAX_WORKERS')
@@ -48,6 +55,16 @@ timeout = int(timeout_str)
 keepalive = int(keepalive_str)
 
 
+def on_starting(server):
+    # Drop metrics left from the previous run
+    shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
+    os.makedirs(os.environ['PROMETHEUS_MULTIPROC_DIR'])
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
+
+
 # For debugging and testing
 log_data = {
     'loglevel': loglevel,
@@ -0,0 +1,23 @@
+#!/bin/sh
+
+set -e
+
+# Clones the primary with pg_basebackup on the first start and then runs as a hot standby
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_isready -h "$POSTGRES_PRIMARY_HOST" -p 5432 -U "$POSTGRES_USER"; do
+        sleep 1
+    done
+
+    mkdir -p "$PGDATA"
+    chown postgres:postgres "$PGDATA"
+    chmod 700 "$PGDATA"
+
+    PGPASSWORD="$POSTGRES_REPLICATION_PASSWORD" gosu postgres pg_basebackup \
+        --host="$POSTGRES_PRIMARY_HOST" \
+        --username=replicator \
+        --pgdata="$PGDATA" \
+        --wal-method=stream \
+        --write-recovery-conf
+fi
+
+exec docker-entrypoint.sh postgres -c hot_standby=on
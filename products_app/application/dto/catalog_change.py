@@ -0,0 +1,25 @@
+import datetime as dt
+from dataclasses import dataclass
+from enum import Enum
+
+
+class CatalogChangeEntity(str, Enum):
+    product = 'product'
+    category = 'category'
+
+
+@dataclass(slots=True)
+class CatalogChangeCursorDTO:
+    txid: int
+    id: int
+
+
+@dataclass(slots=True)
+class CatalogChangeDTO:
+    entity: CatalogChangeEntity
+    entity_id: str
+    # Запись удалена, остальные изменения - создание или обновление
+    deleted: bool
+    changed_at: dt.datetime
+    # Позиция изменения в ленте, с неё продолжается чтение
+    cursor: CatalogChangeCursorDTO
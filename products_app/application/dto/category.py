@@ -12,3 +12,17 @@ class UpdateCategoryDTO:
     id: str
     name: str
     parent_category_id: str
+
+
+@dataclass(slots=True)
+class NewCategoryNodeDTO:
+    temp_id: str
+    name: str
+    parent_temp_id: str | None
+    parent_category_id: str | None
+
+
+@dataclass(slots=True)
+class CategoryCursorDTO:
+    name: str
+    id: str
@@ -0,0 +1,36 @@
+import datetime as dt
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass(slots=True)
+class HistogramDTO:
+    buckets: dict[str, int]
+    count: int
+    sum: float
+
+
+@dataclass(slots=True)
+class PoolStatsDTO:
+    name: str
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiting: int
+    checkout_wait: HistogramDTO
+    connect_latency: HistogramDTO
+
+
+@dataclass(slots=True)
+class SlowQueryDTO:
+    database: str
+    statement: str
+    shape: list[str]
+    operation: str
+    calls: int
+    total_time: float
+    mean_time: float
+    max_time: float
+    last_seen: dt.datetime
+    plan: Any | None
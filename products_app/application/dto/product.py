@@ -1,5 +1,10 @@
 from dataclasses import dataclass
 from decimal import Decimal
+from enum import Enum
+from typing import Any
+
+from products_app.domain.entitites.category import CategoryEntity
+from products_app.domain.entitites.product import ProductEntity
 
 
 @dataclass(slots=True)
@@ -25,3 +30,34 @@ class UpdateProductDTO:
     unit_size: Decimal
     category_id: str
     attributes: dict
+
+
+@dataclass(slots=True, frozen=True)
+class ProductFieldsDTO:
+    # Поля товара, которые нужно прочитать
+    fields: tuple[str, ...]
+    # Ключи атрибутов, если нужны не все атрибуты, а только часть
+    attribute_keys: tuple[str, ...] | None = None
+
+
+class ProductExpand(str, Enum):
+    # Категория товара
+    category = 'category'
+    # Категория товара и все её родительские категории
+    category_path = 'category_path'
+
+
+@dataclass(slots=True)
+class ExpandedProductsDTO:
+    products: list[ProductEntity] | list[dict[str, Any]]
+    # Категории товаров без повторов
+    categories: list[CategoryEntity]
+
+
+@dataclass(slots=True)
+class RenderedJsonCheckDTO:
+    checked: int
+    # Товары, у которых сохранённый JSON не совпадает с собранным заново
+    drifted_ids: list[str]
+    # ID последнего проверенного товара, с него начинается следующая пачка
+    last_id: str | None
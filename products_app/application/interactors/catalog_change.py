@@ -0,0 +1,63 @@
+import datetime as dt
+
+from products_app.application.dto.catalog_change import (
+    CatalogChangeCursorDTO,
+    CatalogChangeDTO,
+)
+from products_app.application.interfaces.catalog_change import (
+    CatalogChangePruner,
+    CatalogChangeReader,
+)
+from products_app.application.interfaces.common import DateTimeNowGenerator
+from products_app.application.interfaces.unit_of_work import UnitOfWork
+from products_app.domain.exceptions.catalog_change import (
+    CatalogChangeCursorExpiredError,
+)
+
+
+class GetCatalogChangesInteractor:
+    def __init__(
+        self,
+        catalog_change_gateway: CatalogChangeReader,
+    ):
+        self._catalog_change_gateway = catalog_change_gateway
+
+    async def __call__(
+        self,
+        after: CatalogChangeCursorDTO | None,
+        limit: int,
+    ) -> list[CatalogChangeDTO]:
+        changes = await self._catalog_change_gateway.get_changes(
+            after=after,
+            limit=limit,
+        )
+        if after is None:
+            return changes
+
+        # Позиция проверяется после чтения: если очистка закоммичена до чтения, она уже видна,
+        # а если после - прочитанные изменения ещё не были удалены
+        mark = await self._catalog_change_gateway.get_low_water_mark()
+        if mark is not None and (after.txid, after.id) < (mark.txid, mark.id):
+            raise CatalogChangeCursorExpiredError()
+
+        return changes
+
+
+class PruneCatalogChangesInteractor:
+    def __init__(
+        self,
+        catalog_change_gateway: CatalogChangePruner,
+        uow: UnitOfWork,
+        datetime_now_generator: DateTimeNowGenerator,
+    ):
+        self._catalog_change_gateway = catalog_change_gateway
+        self._uow = uow
+        self._datetime_now_generator = datetime_now_generator
+
+    async def __call__(self, older_than: dt.timedelta) -> int:
+        deleted = await self._catalog_change_gateway.delete_before(
+            before=self._datetime_now_generator() - older_than,
+        )
+        await self._uow.commit()
+
+        return deleted
@@ -1,6 +1,16 @@
-from products_app.application.dto.category import UpdateCategoryDTO, NewCategoryDTO
+from collections import defaultdict
+
+from products_app.application.dto.category import (
+    CategoryCursorDTO,
+    NewCategoryDTO,
+    NewCategoryNodeDTO,
+    UpdateCategoryDTO,
+)
 from products_app.application.interfaces.category import (
     CategoryDeleter,
+    CategoryDeletionJobGatewayProtocol,
+    CategoryDeletionJobReader,
+    CategoryDeletionJobSaver,
     CategoryGatewayProtocol,
     CategoryReader,
     CategorySaver,
@@ -9,12 +19,21 @@ from products_app.application.interfaces.common import (
     DateTimeNowGenerator,
     UUIDGenerator,
 )
+from products_app.application.interfaces.product import ProductUpdater
 from products_app.application.interfaces.unit_of_work import UnitOfWork
 from products_app.domain.entitites.category import (
+    CategoryDeletionJobEntity,
+    CategoryDeletionStatus,
     CategoryEntity,
     ExtendedCategoryEntity,
 )
-from products_app.domain.exceptions.category import CategoryNotFoundError
+from products_app.domain.exceptions.category import (
+    CategoryDeletionJobNotFoundError,
+    CategoryNotFoundError,
+    CategoryTreeCycleError,
+    CategoryTreeDanglingParentError,
+    CategoryTreeDuplicateNodeError,
+)
 
 
 class GetRootCategoriesInteractor:
@@ -35,8 +54,19 @@ class GetAllCategoriesInteractor:
     ):
         self._category_gateway = category_gateway
 
-    async def __call__(self, limit: int, offset: int) -> list[CategoryEntity]:
-        return await self._category_gateway.get_all(limit=limit, offset=offset)
+    async def __call__(
+        self,
+        limit: int,
+        offset: int,
+        parent_category_id: str | None = None,
+        after: CategoryCursorDTO | None = None,
+    ) -> list[CategoryEntity]:
+        return await self._category_gateway.get_all(
+            limit=limit,
+            offset=offset,
+            parent_category_id=parent_category_id,
+            after=after,
+        )
 
 
 class GetCategoryByIdInteractor:
@@ -81,6 +111,102 @@ class CreateCategoryInteractor:
         return category_entity.id
 
 
+class BulkCreateCategoriesInteractor:
+    def __init__(
+        self,
+        category_gateway: CategoryGatewayProtocol,
+        uuid_generator: UUIDGenerator,
+        datetime_now_generator: DateTimeNowGenerator,
+        uow: UnitOfWork,
+    ):
+        self._category_gateway = category_gateway
+        self._uuid_generator = uuid_generator
+        self._datetime_now_generator = datetime_now_generator
+        self._uow = uow
+
+    @staticmethod
+    def _split_into_levels(
+        nodes: list[NewCategoryNodeDTO],
+    ) -> list[list[NewCategoryNodeDTO]]:
+        """
+        Раскладывает узлы по уровням так, что родитель всегда находится
+        на уровень выше своих дочерних узлов
+        """
+        temp_ids = set()
+        for node in nodes:
+            if node.temp_id in temp_ids:
+                raise CategoryTreeDuplicateNodeError(identifier=node.temp_id)
+            temp_ids.add(node.temp_id)
+
+        children = defaultdict(list)
+        level = []
+        for node in nodes:
+            if node.parent_temp_id is None:
+                level.append(node)
+            elif node.parent_temp_id not in temp_ids:
+                raise CategoryTreeDanglingParentError(
+                    identifier=node.temp_id,
+                    parent_identifier=node.parent_temp_id,
+                )
+            else:
+                children[node.parent_temp_id].append(node)
+
+        levels = []
+        placed = set()
+        while level:
+            levels.append(level)
+            placed.update(node.temp_id for node in level)
+            level = [child for node in level for child in children[node.temp_id]]
+
+        if len(placed) != len(nodes):
+            raise CategoryTreeCycleError(
+                identifiers=[
+                    node.temp_id for node in nodes if node.temp_id not in placed
+                ],
+            )
+
+        return levels
+
+    async def __call__(self, nodes: list[NewCategoryNodeDTO]) -> dict[str, str]:
+        levels = self._split_into_levels(nodes)
+
+        parent_category_ids = {
+            node.parent_category_id
+            for node in nodes
+            if node.parent_category_id is not None
+        }
+        if parent_category_ids:
+            existing_categories = await self._category_gateway.get_by_ids(
+                list(parent_category_ids),
+            )
+            missing_ids = parent_category_ids - {
+                category.id for category in existing_categories
+            }
+            if missing_ids:
+                raise CategoryNotFoundError(identifier=min(missing_ids))
+
+        ids = {node.temp_id: self._uuid_generator() for node in nodes}
+        created_at = self._datetime_now_generator()
+
+        for level in levels:
+            await self._category_gateway.save_many(
+                [
+                    CategoryEntity(
+                        id=ids[node.temp_id],
+                        created_at=created_at,
+                        name=node.name,
+                        parent_category_id=ids[node.parent_temp_id]
+                        if node.parent_temp_id is not None
+                        else node.parent_category_id,
+                    )
+                    for node in level
+                ],
+            )
+        await self._uow.commit()
+
+        return ids
+
+
 class UpdateCategoryInteractor:
     def __init__(
         self,
@@ -116,3 +242,136 @@ class DeleteCategoryInteractor:
     async def __call__(self, category_id: str) -> None:
         await self._category_gateway.delete(category_id=category_id)
         await self._uow.commit()
+
+
+class StartCategoryDeletionInteractor:
+    def __init__(
+        self,
+        category_gateway: CategoryReader,
+        job_gateway: CategoryDeletionJobSaver,
+        uuid_generator: UUIDGenerator,
+        datetime_now_generator: DateTimeNowGenerator,
+        uow: UnitOfWork,
+    ):
+        self._category_gateway = category_gateway
+        self._job_gateway = job_gateway
+        self._uuid_generator = uuid_generator
+        self._datetime_now_generator = datetime_now_generator
+        self._uow = uow
+
+    async def __call__(
+        self,
+        category_id: str,
+        batch_size: int,
+    ) -> CategoryDeletionJobEntity:
+        if await self._category_gateway.get_by_id(category_id) is None:
+            raise CategoryNotFoundError(identifier=category_id)
+
+        job = CategoryDeletionJobEntity(
+            id=self._uuid_generator(),
+            created_at=self._datetime_now_generator(),
+            category_id=category_id,
+            batch_size=batch_size,
+            status=CategoryDeletionStatus.pending,
+            detached_products=0,
+            detached_sub_categories=0,
+            finished_at=None,
+            error=None,
+        )
+
+        await self._job_gateway.save(job)
+        await self._uow.commit()
+
+        return job
+
+
+class RunCategoryDeletionJobInteractor:
+    """
+    Удаляет категорию несколькими короткими транзакциями:
+    сначала пачками отвязывает товары и дочерние категории, затем удаляет саму категорию
+    """
+
+    def __init__(
+        self,
+        job_gateway: CategoryDeletionJobGatewayProtocol,
+        category_gateway: CategoryDeleter,
+        product_gateway: ProductUpdater,
+        datetime_now_generator: DateTimeNowGenerator,
+        uow: UnitOfWork,
+    ):
+        self._job_gateway = job_gateway
+        self._category_gateway = category_gateway
+        self._product_gateway = product_gateway
+        self._datetime_now_generator = datetime_now_generator
+        self._uow = uow
+
+    async def _save_progress(self, job: CategoryDeletionJobEntity) -> None:
+        await self._job_gateway.update(job)
+        await self._uow.commit()
+
+    async def __call__(self, job_id: str) -> None:
+        job = await self._job_gateway.get_by_id(job_id)
+        if job is None:
+            raise CategoryDeletionJobNotFoundError(identifier=job_id)
+        # Задачу могли завершить, пока она ждала возобновления
+        if job.status in (CategoryDeletionStatus.done, CategoryDeletionStatus.failed):
+            return
+
+        job.status = CategoryDeletionStatus.running
+        await self._save_progress(job)
+
+        try:
+            while detached := await self._product_gateway.detach_from_category(
+                category_id=job.category_id,
+                limit=job.batch_size,
+            ):
+                job.detached_products += detached
+                await self._save_progress(job)
+
+            while detached := await self._category_gateway.detach_sub_categories(
+                category_id=job.category_id,
+                limit=job.batch_size,
+            ):
+                job.detached_sub_categories += detached
+                await self._save_progress(job)
+
+            await self._category_gateway.delete(category_id=job.category_id)
+        except Exception as error:
+            await self._uow.rollback()
+
+            job.status = CategoryDeletionStatus.failed
+            job.error = str(error)
+            job.finished_at = self._datetime_now_generator()
+            await self._save_progress(job)
+
+            raise
+
+        job.status = CategoryDeletionStatus.done
+        job.finished_at = self._datetime_now_generator()
+        await self._save_progress(job)
+
+
+class GetUnfinishedCategoryDeletionJobsInteractor:
+    def __init__(
+        self,
+        job_gateway: CategoryDeletionJobReader,
+    ):
+        self._job_gateway = job_gateway
+
+    async def __call__(self) -> list[CategoryDeletionJobEntity]:
+        return await self._job_gateway.get_unfinished()
+
+
+class GetCategoryDeletionJobInteractor:
+    def __init__(
+        self,
+        job_gateway: CategoryDeletionJobReader,
+    ):
+        self._job_gateway = job_gateway
+
+    async def __call__(self, job_id: str) -> CategoryDeletionJobEntity:
+        job = await self._job_gateway.get_by_id(job_id)
+        if job is None:
+            raise CategoryDeletionJobNotFoundError(identifier=job_id)
+
+        return job
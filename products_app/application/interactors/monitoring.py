@@ -0,0 +1,27 @@
+from products_app.application.dto.monitoring import PoolStatsDTO, SlowQueryDTO
+from products_app.application.interfaces.monitoring import (
+    PoolStatsReader,
+    SlowQueryReader,
+)
+
+
+class GetPoolStatsInteractor:
+    def __init__(
+        self,
+        pool_stats_reader: PoolStatsReader,
+    ):
+        self._pool_stats_reader = pool_stats_reader
+
+    async def __call__(self) -> list[PoolStatsDTO]:
+        return self._pool_stats_reader.get_pool_stats()
+
+
+class GetSlowQueriesInteractor:
+    def __init__(
+        self,
+        slow_query_reader: SlowQueryReader,
+    ):
+        self._slow_query_reader = slow_query_reader
+
+    async def __call__(self, limit: int) -> list[SlowQueryDTO]:
+        return self._slow_query_reader.get_top_slow_queries(limit=limit)
@@ -1,6 +1,13 @@
 from typing import Any
 
-from products_app.application.dto.product import NewProductDTO, UpdateProductDTO
+from products_app.application.dto.product import (
+    ExpandedProductsDTO,
+    NewProductDTO,
+    ProductExpand,
+    ProductFieldsDTO,
+    RenderedJsonCheckDTO,
+    UpdateProductDTO,
+)
 from products_app.application.interfaces.category import CategoryReader
 from products_app.application.interfaces.common import (
     DateTimeNowGenerator,
@@ -10,7 +17,7 @@ from products_app.application.interfaces.product import (
     ProductDeleter,
     ProductGatewayProtocol,
     ProductReader,
-    ProductSaver,
+    ProductWriter,
 )
 from products_app.application.interfaces.unit_of_work import UnitOfWork
 from products_app.domain.entitites.product import ProductEntity
@@ -30,7 +37,35 @@ class GetAllProductsInteractor:
         limit: int,
         offset: int,
         filters: dict[str, Any] | None,
-    ) -> list[ProductEntity]:
+        fields: ProductFieldsDTO | None = None,
+        expand: ProductExpand | None = None,
+        rendered: bool = False,
+    ) -> list[ProductEntity] | list[dict[str, Any]] | ExpandedProductsDTO | bytes:
+        """С `rendered=True` возвращает JSON-ответ со всеми полями товаров из сохранённых в базе JSON"""
+        if expand is not None:
+            return await self._product_gateway.get_all_expanded(
+                limit=limit,
+                offset=offset,
+                filters=filters,
+                fields=fields,
+                expand=expand,
+            )
+
+        if fields is not None:
+            return await self._product_gateway.get_all_partial(
+                limit=limit,
+                offset=offset,
+                filters=filters,
+                fields=fields,
+            )
+
+        if rendered:
+            return await self._product_gateway.get_all_json(
+                limit=limit,
+                offset=offset,
+                filters=filters,
+            )
+
         return await self._product_gateway.get_all(
             limit=limit,
             offset=offset,
@@ -45,28 +80,68 @@ class GetProductByIdInteractor:
     ):
         self._product_gateway = product_gateway
 
-    async def __call__(self, product_id: str) -> ProductEntity:
-        product = await self._product_gateway.get_by_id(
-            product_id=product_id,
-        )
+    async def __call__(
+        self,
+        product_id: str,
+        fields: ProductFieldsDTO | None = None,
+        expand: ProductExpand | None = None,
+        rendered: bool = False,
+    ) -> ProductEntity | dict[str, Any] | ExpandedProductsDTO | bytes:
+        """С `rendered=True` возвращает сохранённый в базе JSON-ответ со всеми полями товара"""
+        if expand is not None:
+            expanded = await self._product_gateway.get_expanded_by_id(
+                product_id=product_id,
+                fields=fields,
+                expand=expand,
+            )
+            if not expanded.products:
+                raise ProductNotFoundError(identifier=product_id)
+
+            return expanded
+
+        if fields is not None:
+            product = await self._product_gateway.get_partial_by_id(
+                product_id=product_id,
+                fields=fields,
+            )
+        elif rendered:
+            product = await self._product_gateway.get_json_by_id(
+                product_id=product_id,
+            )
+        else:
+            product = await self._product_gateway.get_by_id(
+                product_id=product_id,
+            )
         if product is None:
             raise ProductNotFoundError(identifier=product_id)
 
         return product
 
 
+class CheckRenderedProductsInteractor:
+    def __init__(
+        self,
+        product_gateway: ProductReader,
+    ):
+        self._product_gateway = product_gateway
+
+    async def __call__(self, after_id: str | None, limit: int) -> RenderedJsonCheckDTO:
+        return await self._product_gateway.check_rendered_json(
+            after_id=after_id,
+            limit=limit,
+        )
+
+
 class CreateProductInteractor:
     def __init__(
         self,
-        product_gateway: ProductSaver,
+        product_writer: ProductWriter,
         category_gateway: CategoryReader,
-        uow: UnitOfWork,
         uuid_generator: UUIDGenerator,
         datetime_now_generator: DateTimeNowGenerator,
     ):
-        self._product_gateway = product_gateway
+        self._product_writer = product_writer
         self._category_gateway = category_gateway
-        self._uow = uow
         self._uuid_generator = uuid_generator
         self._datetime_now_generator = datetime_now_generator
 
@@ -87,8 +162,7 @@ class CreateProductInteractor:
             attributes=product.attributes,
         )
 
-        await self._product_gateway.save(product=new_product)
-        await self._uow.commit()
+        await self._product_writer.create(product=new_product)
 
         return new_product.id
 
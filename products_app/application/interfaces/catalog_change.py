@@ -0,0 +1,32 @@
+import datetime as dt
+from abc import abstractmethod
+from typing import Protocol
+
+from products_app.application.dto.catalog_change import (
+    CatalogChangeCursorDTO,
+    CatalogChangeDTO,
+)
+
+
+class CatalogChangeReader(Protocol):
+    # Изменения после `after` в порядке коммита транзакций
+    @abstractmethod
+    async def get_changes(
+        self,
+        after: CatalogChangeCursorDTO | None,
+        limit: int,
+    ) -> list[CatalogChangeDTO]:
+        raise NotImplementedError
+
+    # Позиция последнего удалённого изменения, None, если лента не очищалась
+    @abstractmethod
+    async def get_low_water_mark(self) -> CatalogChangeCursorDTO | None:
+        raise NotImplementedError
+
+
+class CatalogChangePruner(Protocol):
+    # Удаляет изменения, записанные раньше `before`, запоминает позицию последнего
+    # из них (см. CatalogChangeReader.get_low_water_mark) и возвращает их количество
+    @abstractmethod
+    async def delete_before(self, before: dt.datetime) -> int:
+        raise NotImplementedError
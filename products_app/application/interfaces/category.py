@@ -1,7 +1,9 @@
 from abc import abstractmethod
 from typing import Protocol
 
+from products_app.application.dto.category import CategoryCursorDTO
 from products_app.domain.entitites.category import (
+    CategoryDeletionJobEntity,
     CategoryEntity,
     ExtendedCategoryEntity,
 )
@@ -12,12 +14,22 @@ class CategoryReader(Protocol):
     async def get_by_id(self, category_id: str) -> CategoryEntity | None:
         raise NotImplementedError
 
+    @abstractmethod
+    async def get_by_ids(self, category_ids: list[str]) -> list[CategoryEntity]:
+        raise NotImplementedError
+
     @abstractmethod
     async def get_all_root(self, depth: int) -> list[ExtendedCategoryEntity]:
         raise NotImplementedError
 
     @abstractmethod
-    async def get_all(self, limit: int, offset: int) -> list[CategoryEntity]:
+    async def get_all(
+        self,
+        limit: int,
+        offset: int,
+        parent_category_id: str | None = None,
+        after: CategoryCursorDTO | None = None,
+    ) -> list[CategoryEntity]:
         raise NotImplementedError
 
 
@@ -26,6 +38,10 @@ class CategorySaver(Protocol):
     async def save(self, category: CategoryEntity) -> None:
         raise NotImplementedError
 
+    @abstractmethod
+    async def save_many(self, categories: list[CategoryEntity]) -> None:
+        raise NotImplementedError
+
 
 class CategoryUpdater(Protocol):
     @abstractmethod
@@ -38,6 +54,10 @@ class CategoryDeleter(Protocol):
     async def delete(self, category_id: str) -> None:
         raise NotImplementedError
 
+    @abstractmethod
+    async def detach_sub_categories(self, category_id: str, limit: int) -> int:
+        raise NotImplementedError
+
 
 class CategoryGatewayProtocol(
     CategoryReader,
@@ -46,3 +66,34 @@ class CategoryGatewayProtocol(
     CategoryDeleter,
     Protocol,
 ): ...
+
+
+class CategoryDeletionJobReader(Protocol):
+    @abstractmethod
+    async def get_by_id(self, job_id: str) -> CategoryDeletionJobEntity | None:
+        raise NotImplementedError
+
+    # Задачи в статусе pending или running
+    @abstractmethod
+    async def get_unfinished(self) -> list[CategoryDeletionJobEntity]:
+        raise NotImplementedError
+
+
+class CategoryDeletionJobSaver(Protocol):
+    @abstractmethod
+    async def save(self, job: CategoryDeletionJobEntity) -> None:
+        raise NotImplementedError
+
+
+class CategoryDeletionJobUpdater(Protocol):
+    @abstractmethod
+    async def update(self, job: CategoryDeletionJobEntity) -> None:
+        raise NotImplementedError
+
+
+class CategoryDeletionJobGatewayProtocol(
+    CategoryDeletionJobReader,
+    CategoryDeletionJobSaver,
+    CategoryDeletionJobUpdater,
+    Protocol,
+): ...
@@ -0,0 +1,16 @@
+from abc import abstractmethod
+from typing import Protocol
+
+from products_app.application.dto.monitoring import PoolStatsDTO, SlowQueryDTO
+
+
+class PoolStatsReader(Protocol):
+    @abstractmethod
+    def get_pool_stats(self) -> list[PoolStatsDTO]:
+        raise NotImplementedError
+
+
+class SlowQueryReader(Protocol):
+    @abstractmethod
+    def get_top_slow_queries(self, limit: int) -> list[SlowQueryDTO]:
+        raise NotImplementedError
@@ -1,6 +1,12 @@
 from abc import abstractmethod
 from typing import Any, Protocol
 
+from products_app.application.dto.product import (
+    ExpandedProductsDTO,
+    ProductExpand,
+    ProductFieldsDTO,
+    RenderedJsonCheckDTO,
+)
 from products_app.domain.entitites.product import ProductEntity
 
 
@@ -18,18 +24,97 @@ class ProductReader(Protocol):
     ) -> list[ProductEntity]:
         raise NotImplementedError
 
+    # Возвращают готовый JSON товаров в формате ответа API, сохранённый в базе при записи
+    @abstractmethod
+    async def get_all_json(
+        self,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any],
+    ) -> bytes:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_json_by_id(self, product_id: str) -> bytes | None:
+        raise NotImplementedError
+
+    # Сверяет сохранённый JSON пачки товаров, упорядоченных по ID, с собранным заново
+    @abstractmethod
+    async def check_rendered_json(
+        self,
+        after_id: str | None,
+        limit: int,
+    ) -> RenderedJsonCheckDTO:
+        raise NotImplementedError
+
+    # Читают только запрошенные поля, товар возвращается словарём с этими полями
+    @abstractmethod
+    async def get_partial_by_id(
+        self,
+        product_id: str,
+        fields: ProductFieldsDTO,
+    ) -> dict[str, Any] | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_all_partial(
+        self,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any],
+        fields: ProductFieldsDTO,
+    ) -> list[dict[str, Any]]:
+        raise NotImplementedError
+
+    # Читают товары вместе с их категориями (с category_path - и с родительскими) одним запросом,
+    # fields=None - все поля товара
+    @abstractmethod
+    async def get_expanded_by_id(
+        self,
+        product_id: str,
+        fields: ProductFieldsDTO | None,
+        expand: ProductExpand,
+    ) -> ExpandedProductsDTO:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def get_all_expanded(
+        self,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any],
+        fields: ProductFieldsDTO | None,
+        expand: ProductExpand,
+    ) -> ExpandedProductsDTO:
+        raise NotImplementedError
+
 
 class ProductSaver(Protocol):
     @abstractmethod
     async def save(self, product: ProductEntity) -> None:
         raise NotImplementedError
 
+    @abstractmethod
+    async def save_many(self, products: list[ProductEntity]) -> None:
+        raise NotImplementedError
+
+
+class ProductWriter(Protocol):
+    # Сохраняет новый товар и коммитит его, сам или вместе с товарами других запросов
+    @abstractmethod
+    async def create(self, product: ProductEntity) -> None:
+        raise NotImplementedError
+
 
 class ProductUpdater(Protocol):
     @abstractmethod
     async def update(self, product: ProductEntity) -> None:
         raise NotImplementedError
 
+    @abstractmethod
+    async def detach_from_category(self, category_id: str, limit: int) -> int:
+        raise NotImplementedError
+
 
 class ProductDeleter(Protocol):
     @abstractmethod
@@ -10,3 +10,7 @@ class UnitOfWork(Protocol):
     @abstractmethod
     async def flush(self) -> None:
         raise NotImplementedError
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        raise NotImplementedError
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import computed_field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -15,7 +16,13 @@ class BaseAppConfig(BaseSettings):
 
 
 class CommonConfig(BaseAppConfig):
-    pass
+    # Эндпоинты, ответ которых собирается из JSON товаров, сохранённых в базе, без сериализации в воркере:
+    # products_search - POST /products/search, products_list - GET /products, products_get - GET /products/{id}
+    DATABASE_RENDERED_ENDPOINTS: list[
+        Literal['products_search', 'products_list', 'products_get']
+    ] = []
+    # Сколько дней хранить записи ленты изменений, старые удаляет POST /internal/changes/prune
+    CATALOG_CHANGE_RETENTION_DAYS: int = 30
 
 
 class PostgresConfig(BaseAppConfig):
@@ -25,6 +32,45 @@ class PostgresConfig(BaseAppConfig):
     POSTGRES_HOST: str = 'postgres'
     POSTGRES_PORT: int = 5432
 
+    # DSN реплик в формате JSON-списка, например ["postgresql+asyncpg://..."]
+    POSTGRES_REPLICA_URIS: list[str] = []
+    # Сколько секунд после записи клиент читает с мастера, 0 - отключено
+    POSTGRES_READ_YOUR_WRITES_SECONDS: float = 5
+
+    # Настройки пула соединений, действуют на каждый воркер gunicorn отдельно
+    POSTGRES_POOL_PROFILE: Literal['default', 'pgbouncer'] = 'default'
+    POSTGRES_POOL_SIZE: int = 15
+    POSTGRES_MAX_OVERFLOW: int = 15
+    POSTGRES_POOL_TIMEOUT: float = 30
+    POSTGRES_POOL_RECYCLE: int = -1
+    POSTGRES_POOL_PRE_PING: bool = False
+    POSTGRES_STATEMENT_CACHE_SIZE: int = 100
+    # Таймаут запросов к БД по умолчанию в секундах, 0 - отключено.
+    # Роуты могут задавать свой таймаут, клиент может сократить его заголовком X-Request-Deadline
+    POSTGRES_STATEMENT_TIMEOUT: float = 30
+
+    # Запросы дольше порога в секундах попадают в журнал медленных запросов, 0 - отключено
+    POSTGRES_SLOW_QUERY_THRESHOLD: float = 0.5
+    # Доля повторных медленных запросов, для которых снимается EXPLAIN ANALYZE.
+    # Для первого появления запроса план снимается всегда
+    POSTGRES_SLOW_QUERY_EXPLAIN_RATIO: float = 0.1
+    # Сколько разных медленных запросов хранить в журнале воркера
+    POSTGRES_SLOW_QUERY_LOG_SIZE: int = 200
+
+    # Объединять конкурентные чтения по id в запросах на чтение в один запрос к БД
+    POSTGRES_POINT_LOOKUP_BATCHING: bool = True
+    POSTGRES_POINT_LOOKUP_MAX_BATCH_SIZE: int = 500
+    # Таймаут пачки чтений по id в секундах: пачка общая для нескольких запросов и не наследует их дедлайны
+    POSTGRES_POINT_LOOKUP_STATEMENT_TIMEOUT: float = 2
+
+    # Групповой коммит создания товаров: товары, созданные в течение POSTGRES_WRITE_BATCH_DELAY секунд,
+    # вставляются одним INSERT и коммитятся одной транзакцией
+    POSTGRES_WRITE_BATCHING: bool = False
+    POSTGRES_WRITE_BATCH_DELAY: float = 0.005
+    POSTGRES_WRITE_BATCH_MAX_SIZE: int = 500
+    # Таймаут записи пачки в секундах, дедлайны запросов пачки на неё не действуют
+    POSTGRES_WRITE_BATCH_STATEMENT_TIMEOUT: float = 5
+
     @computed_field  # type: ignore[misc]
     @property
     def database_uri(self) -> str:
@@ -34,10 +80,55 @@ class PostgresConfig(BaseAppConfig):
         )
 
 
+class WarmUpConfig(BaseAppConfig):
+    # Сколько соединений открыть и прогреть при старте воркера, 0 - отключено
+    WARMUP_CONNECTIONS: int = 5
+    WARMUP_CATEGORY_TREE_DEPTH: int = 2
+
+
+class TracingConfig(BaseAppConfig):
+    TRACING_ENABLED: bool = False
+    # Куда выгружать спаны: файл в формате OTLP JSON, OTLP/HTTP коллектор или никуда
+    TRACING_EXPORTER: Literal['file', 'otlp', 'none'] = 'file'
+    TRACING_FILE_PATH: str = 'traces.jsonl'
+    TRACING_OTLP_ENDPOINT: str = 'http://localhost:4318/v1/traces'
+    TRACING_SERVICE_NAME: str = 'products_app'
+    # Доля выгружаемых трейсов, если клиент не прислал traceparent
+    TRACING_SAMPLE_RATIO: float = 1.0
+    # Добавлять в ответы заголовок Server-Timing с временем по слоям
+    TRACING_SERVER_TIMING: bool = False
+
+
+class SearchCacheConfig(BaseAppConfig):
+    # Размер кеша ответов поиска товаров в каждом воркере, 0 - кеш отключён
+    SEARCH_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    # Сколько секунд ответ считается свежим, если каталог не менялся
+    SEARCH_CACHE_TTL: float = 60
+    # Сколько секунд отдавать устаревший ответ, пока он обновляется в фоне, 0 - не отдавать
+    SEARCH_CACHE_STALE_TTL: float = 0
+    # max-age в Cache-Control ответов GET /products для HTTP кешей перед приложением
+    SEARCH_CACHE_HTTP_MAX_AGE: int = 5
+
+
+class CompressionConfig(BaseAppConfig):
+    # Кодировки сжатия ответов в порядке предпочтения при равных весах в Accept-Encoding, [] - сжатие отключено
+    COMPRESSION_ENCODINGS: list[Literal['zstd', 'br', 'gzip']] = ['zstd', 'br', 'gzip']
+    # Ответы меньше порога в байтах не сжимаются
+    COMPRESSION_MIN_SIZE: int = 1024
+    # Уровни сжатия по умолчанию, роуты могут задавать свои
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_LEVEL: int = 4
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+
 @dataclass(slots=True)
 class AppConfig:
     postgres: PostgresConfig
     common: CommonConfig
+    warmup: WarmUpConfig
+    tracing: TracingConfig
+    search_cache: SearchCacheConfig
+    compression: CompressionConfig
 
 
 @lru_cache
@@ -45,4 +136,8 @@ def get_app_config(env_file: str | None = None) -> AppConfig:
     return AppConfig(
         postgres=PostgresConfig(_env_file=env_file),
         common=CommonConfig(_env_file=env_file),
+        warmup=WarmUpConfig(_env_file=env_file),
+        tracing=TracingConfig(_env_file=env_file),
+        search_cache=SearchCacheConfig(_env_file=env_file),
+        compression=CompressionConfig(_env_file=env_file),
     )
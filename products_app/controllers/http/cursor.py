@@ -0,0 +1,22 @@
+import base64
+import json
+from typing import Any
+
+
+def encode_cursor(values: list[Any]) -> str:
+    raw = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> list[Any]:
+    """Декодирует курсор, при некорректном значении поднимает ValueError"""
+    try:
+        padding = '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + padding))
+    except (TypeError, UnicodeDecodeError, json.JSONDecodeError) as error:
+        raise ValueError(f'Bad cursor: {cursor}') from error
+
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f'Bad cursor: {cursor}')
+
+    return values
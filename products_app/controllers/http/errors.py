@@ -0,0 +1,31 @@
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+
+from products_app.infra.database.timeouts import QUERY_CANCELED_SQLSTATE
+
+
+async def database_error_handler(request: Request, error: DBAPIError) -> JSONResponse:
+    if getattr(error.orig, 'sqlstate', None) != QUERY_CANCELED_SQLSTATE:
+        raise error
+
+    return JSONResponse(
+        {'detail': 'Database query timed out'},
+        status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+    )
+
+
+async def pool_timeout_handler(
+    request: Request,
+    error: PoolTimeoutError,
+) -> JSONResponse:
+    return JSONResponse(
+        {'detail': 'No free database connections, try again later'},
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        headers={'Retry-After': '1'},
+    )
+
+
+def setup_error_handlers(app: FastAPI) -> None:
+    app.add_exception_handler(DBAPIError, database_error_handler)
+    app.add_exception_handler(PoolTimeoutError, pool_timeout_handler)
@@ -0,0 +1,96 @@
+from functools import lru_cache
+
+from pydantic import BaseModel, TypeAdapter, create_model
+
+from products_app.application.dto.product import ProductFieldsDTO
+from products_app.controllers.schemas.product import (
+    ExpandedProductListRead,
+    ExpandedProductRead,
+    IncludedRead,
+    ProductRead,
+)
+
+
+ATTRIBUTES_FIELD = 'attributes'
+
+
+def parse_product_fields(
+    fields: str,
+    required: tuple[str, ...] = (),
+) -> ProductFieldsDTO:
+    """
+    Разбирает параметр `fields`, например `id,name,price,attributes.color`.
+
+    Поля возвращаются в порядке полей `ProductRead`, ключи атрибутов - отсортированными,
+    чтобы одинаковые наборы полей давали одинаковый результат.
+    Поля из `required` добавляются, даже если их не запросили.
+    При неизвестном поле поднимает ValueError
+    """
+    names = set()
+    attribute_keys = set()
+    all_attributes = False
+    for name in filter(None, (name.strip() for name in fields.split(','))):
+        path, _, key = name.partition('.')
+        if path == ATTRIBUTES_FIELD and key:
+            attribute_keys.add(key)
+        elif name in ProductRead.model_fields:
+            all_attributes = all_attributes or name == ATTRIBUTES_FIELD
+        else:
+            raise ValueError(f'Unknown field: {name}')
+
+        names.add(path)
+
+    if not names:
+        raise ValueError('No fields')
+
+    names.update(required)
+
+    return ProductFieldsDTO(
+        fields=tuple(name for name in ProductRead.model_fields if name in names),
+        attribute_keys=(
+            None
+            if all_attributes or not attribute_keys
+            else tuple(sorted(attribute_keys))
+        ),
+    )
+
+
+@lru_cache(maxsize=256)
+def partial_product_read(fields: tuple[str, ...]) -> type[BaseModel]:
+    """Схема ответа с частью полей `ProductRead`"""
+    return create_model(
+        'PartialProductRead',
+        **{name: (ProductRead.model_fields[name].annotation, ...) for name in fields},
+    )
+
+
+@lru_cache(maxsize=256)
+def partial_product_list(fields: tuple[str, ...]) -> TypeAdapter:
+    return TypeAdapter(list[partial_product_read(fields)])
+
+
+@lru_cache(maxsize=256)
+def expanded_product_read(fields: tuple[str, ...] | None) -> type[BaseModel]:
+    """Схема ответа с товаром и его категориями, `fields=None` - все поля товара"""
+    if fields is None:
+        return ExpandedProductRead
+
+    return create_model(
+        'PartialExpandedProductRead',
+        data=(partial_product_read(fields), ...),
+        included=(IncludedRead, ...),
+    )
+
+
+@lru_cache(maxsize=256)
+def expanded_product_list(fields: tuple[str, ...] | None) -> TypeAdapter:
+    if fields is None:
+        return TypeAdapter(ExpandedProductListRead)
+
+    return TypeAdapter(
+        create_model(
+            'PartialExpandedProductListRead',
+            data=(list[partial_product_read(fields)], ...),
+            included=(IncludedRead, ...),
+        ),
+    )
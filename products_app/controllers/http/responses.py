@@ -0,0 +1,57 @@
+from typing import Awaitable, Callable
+
+from fastapi import BackgroundTasks, Response
+
+from products_app.infra.compression import response_compression
+from products_app.infra.search_cache import SearchResultCache
+
+
+async def cached_response(
+    search_cache: SearchResultCache,
+    key: str,
+    load: Callable[[], Awaitable[bytes]],
+    background_tasks: BackgroundTasks,
+) -> Response:
+    """
+    Отдаёт закодированный ответ из кеша или получает его через `load` и кладёт в кеш.
+
+    Если клиент принимает сжатые ответы, ответ сжимается один раз, и сжатый вариант
+    хранится в кеше рядом с ответом. Заголовок `X-Cache` показывает, был ли ответ взят из кеша
+    """
+    compression = response_compression()
+    encoding = compression.encoding if compression is not None else None
+
+    cached = search_cache.lookup(key, encoding)
+    if cached.body is not None:
+        if cached.refresh:
+            background_tasks.add_task(search_cache.refresh, key, load)
+
+        body, encoded = cached.body, cached.encoded
+        x_cache = 'STALE' if cached.stale else 'HIT'
+    else:
+        version = search_cache.version
+        body, encoded = await load(), None
+        search_cache.store(key, body, version)
+        x_cache = 'MISS'
+
+    if encoded is None and compression is not None:
+        encoded = compression.compress(body)
+        if encoded is not None:
+            search_cache.store_encoded(key, compression.encoding, encoded)
+
+    if encoded is None:
+        return Response(
+            body,
+            media_type='application/json',
+            headers={'X-Cache': x_cache},
+        )
+
+    return Response(
+        encoded,
+        media_type='application/json',
+        headers={
+            'X-Cache': x_cache,
+            'Content-Encoding': compression.encoding,
+            'Vary': 'Accept-Encoding',
+        },
+    )
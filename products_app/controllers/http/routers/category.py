@@ -1,42 +1,170 @@
+import asyncio
+import contextvars
+import logging
 from typing import Annotated
 from uuid import UUID
 
-from dishka import FromDishka
+from dishka import AsyncContainer, FromDishka
 from dishka.integrations.fastapi import DishkaRoute
-from fastapi import APIRouter, HTTPException, status
-from fastapi.params import Query
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Request,
+    Response,
+    status,
+)
+from fastapi.params import Body, Query
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncEngine
 
-from products_app.application.dto.category import NewCategoryDTO, UpdateCategoryDTO
+from products_app.application.dto.category import (
+    CategoryCursorDTO,
+    NewCategoryDTO,
+    NewCategoryNodeDTO,
+    UpdateCategoryDTO,
+)
 from products_app.application.interactors.category import (
+    BulkCreateCategoriesInteractor,
     CreateCategoryInteractor,
     DeleteCategoryInteractor,
     GetAllCategoriesInteractor,
+    GetCategoryDeletionJobInteractor,
     GetRootCategoriesInteractor,
     GetCategoryByIdInteractor,
+    GetUnfinishedCategoryDeletionJobsInteractor,
+    RunCategoryDeletionJobInteractor,
+    StartCategoryDeletionInteractor,
     UpdateCategoryInteractor,
 )
+from products_app.controllers.http.cursor import decode_cursor, encode_cursor
+from products_app.controllers.http.responses import cached_response
 from products_app.controllers.schemas.category import (
+    CategoryBulkCreateResponse,
+    CategoryBulkNode,
     CategoryCreate,
     CategoryCreateResponse,
+    CategoryDeletionJobRead,
     CategoryRead,
     CategoryUpdate,
     ExtendedCategoryRead,
 )
 from products_app.controllers.schemas.common import ErrorDetail
-from products_app.domain.exceptions.category import CategoryNotFoundError
+from products_app.infra.compression import CompressionLevels, compression
+from products_app.infra.database.locks import advisory_lock
+from products_app.infra.database.routing import read_only_route
+from products_app.infra.database.session import session_scope
+from products_app.infra.database.timeouts import statement_timeout
+from products_app.infra.search_cache import SearchResultCache, category_tree_cache_key
+from products_app.domain.exceptions.category import (
+    CategoryDeletionJobNotFoundError,
+    CategoryNotFoundError,
+    CategoryTreeError,
+)
+
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter(route_class=DishkaRoute)
 
+CATEGORY_TREE = TypeAdapter(list[ExtendedCategoryRead])
+
+# Дерево категорий сжимается один раз на версию каталога и кодировку,
+# поэтому можно сжимать сильнее, чем ответы, которые сжимаются на каждый запрос
+CATEGORY_TREE_COMPRESSION = CompressionLevels(gzip=9, br=9, zstd=12)
+
+
+def _flatten_category_tree(nodes: list[CategoryBulkNode]) -> list[NewCategoryNodeDTO]:
+    flat_nodes = []
+    stack = [(node, node.parent_temp_id) for node in reversed(nodes)]
+    while stack:
+        node, parent_temp_id = stack.pop()
+        flat_nodes.append(
+            NewCategoryNodeDTO(
+                temp_id=node.temp_id,
+                name=node.name,
+                parent_temp_id=parent_temp_id,
+                parent_category_id=str(node.parent_category_id)
+                if node.parent_category_id
+                else None,
+            ),
+        )
+        stack.extend(
+            (sub_category, node.temp_id)
+            for sub_category in reversed(node.sub_categories)
+        )
+
+    return flat_nodes
+
+
+# Запущенные задачи удаления, чтобы их не собрал сборщик мусора до завершения
+_deletion_jobs: set[asyncio.Task] = set()
+
+
+async def _run_category_deletion_job(container: AsyncContainer, job_id: str) -> None:
+    # Задача выполняется после ответа, поэтому ей нужны свои сессии, а не сессии запроса
+    try:
+        engine = await container.get(AsyncEngine)
+        # Блокировка не даёт выполнять одну задачу в нескольких воркерах одновременно
+        async with advisory_lock(engine, f'category_deletion_job:{job_id}') as locked:
+            if not locked:
+                return
+
+            async with session_scope():
+                interactor = await container.get(RunCategoryDeletionJobInteractor)
+                await interactor(job_id=job_id)
+    except Exception:
+        logger.exception('Category deletion job %s failed', job_id)
+
+
+def _start_category_deletion_job(container: AsyncContainer, job_id: str) -> None:
+    """
+    Запускает задачу удаления отдельно от запроса.
+
+    Задача не ждётся запросом и выполняется в пустом контексте: дедлайн клиента,
+    маршрутизация чтений, трейс и статистика запроса для метрик на неё не действуют
+    """
+    task = asyncio.create_task(
+        _run_category_deletion_job(container=container, job_id=job_id),
+        context=contextvars.Context(),
+    )
+    _deletion_jobs.add(task)
+    task.add_done_callback(_deletion_jobs.discard)
+
+
+async def resume_category_deletion_jobs(container: AsyncContainer) -> list[str]:
+    """
+    Возобновляет задачи удаления, которые не завершились, например из-за перезапуска воркера.
+
+    Прогресс сохраняется после каждой пачки, поэтому задача продолжает с того места,
+    где остановилась. Задачи, которые сейчас выполняет другой воркер, пропускаются
+    """
+    async with session_scope():
+        interactor = await container.get(GetUnfinishedCategoryDeletionJobsInteractor)
+        jobs = await interactor()
+
+    for job in jobs:
+        _start_category_deletion_job(container=container, job_id=job.id)
+
+    return [job.id for job in jobs]
+
 
 @router.get(
     '/root',
     response_model=list[ExtendedCategoryRead],
+    dependencies=[
+        Depends(read_only_route),
+        Depends(statement_timeout(seconds=5)),
+        Depends(compression(levels=CATEGORY_TREE_COMPRESSION)),
+    ],
 )
 async def get_root_categories(
+    background_tasks: BackgroundTasks,
     depth: Annotated[int, Query(ge=0)] = 2,
     *,
     interactor: FromDishka[GetRootCategoriesInteractor],
+    search_cache: FromDishka[SearchResultCache],
 ):
     """
     Возвращает список корневых категорий *(у которых нет родительской категории)* с указанным уровнем вложенности.
@@ -51,31 +179,120 @@ async def get_root_categories(
     Примечание про `sub_categories` в ответе:
     - Если `sub_categories = null`, то вложенные категории были обрезаны.
     - Если `sub_categories = []`, то вложенные категории отсутствуют.
+
+    Ответы кешируются до изменения каталога вместе со сжатыми вариантами,
+    заголовок `X-Cache` показывает, был ли ответ взят из кеша.
     """
-    return await interactor(depth=depth)
+
+    async def load() -> bytes:
+        categories = await interactor(depth=depth)
+        return CATEGORY_TREE.dump_json(
+            CATEGORY_TREE.validate_python(categories, from_attributes=True),
+        )
+
+    return await cached_response(
+        search_cache,
+        category_tree_cache_key(depth),
+        load,
+        background_tasks,
+    )
 
 
 @router.get(
     '/',
     response_model=list[CategoryRead],
+    dependencies=[
+        Depends(read_only_route),
+        Depends(statement_timeout(seconds=5)),
+    ],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad cursor',
+            'model': ErrorDetail,
+        },
+    },
 )
 async def get_all_categories(
+    response: Response,
     offset: Annotated[int, Query(ge=0)] = 0,
     limit: Annotated[int, Query(gt=0, le=200)] = 200,
+    cursor: str | None = None,
+    parent_category_id: UUID | None = None,
     *,
     interactor: FromDishka[GetAllCategoriesInteractor],
 ):
     """
     Возвращает список всех категорий с пагинацией без вложенных категорий.
 
-    Сортировка по названию категории.
+    Сортировка по названию категории, затем по ID.
+
+    Если страница заполнена полностью, то в заголовке `X-Next-Cursor` возвращается курсор следующей страницы.
+    Для получения следующей страницы его нужно передать в параметре `cursor`.
+    В отличие от `offset`, курсорная пагинация не замедляется на дальних страницах.
+
+    Параметр `parent_category_id` оставляет только дочерние категории указанной категории.
     """
-    return await interactor(offset=offset, limit=limit)
+    after = None
+    if cursor is not None:
+        try:
+            name, category_id = decode_cursor(cursor, size=2)
+            after = CategoryCursorDTO(name=str(name), id=str(UUID(str(category_id))))
+        except (TypeError, ValueError) as error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Bad cursor',
+            ) from error
+
+    categories = await interactor(
+        offset=offset,
+        limit=limit,
+        parent_category_id=str(parent_category_id) if parent_category_id else None,
+        after=after,
+    )
+
+    if len(categories) == limit:
+        last_category = categories[-1]
+        response.headers['X-Next-Cursor'] = encode_cursor(
+            [last_category.name, last_category.id],
+        )
+
+    return categories
+
+
+@router.get(
+    '/deletion-jobs/{job_id}',
+    response_model=CategoryDeletionJobRead,
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            'description': 'Deletion job not found',
+            'model': ErrorDetail,
+        },
+    },
+)
+async def get_category_deletion_job(
+    job_id: UUID,
+    *,
+    interactor: FromDishka[GetCategoryDeletionJobInteractor],
+):
+    """
+    Возвращает статус фонового удаления категории.
+    """
+    try:
+        return await interactor(job_id=str(job_id))
+    except CategoryDeletionJobNotFoundError as error:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(error),
+        ) from error
 
 
 @router.get(
     '/{category_id}',
     response_model=CategoryRead,
+    dependencies=[
+        Depends(read_only_route),
+        Depends(statement_timeout(seconds=2)),
+    ],
     responses={
         status.HTTP_404_NOT_FOUND: {
             'description': 'Category not found',
@@ -135,6 +352,57 @@ async def create_category(
     return CategoryCreateResponse(id=category_id)
 
 
+@router.post(
+    '/bulk',
+    status_code=status.HTTP_201_CREATED,
+    response_model=CategoryBulkCreateResponse,
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Categories tree is invalid',
+            'model': ErrorDetail,
+        },
+        status.HTTP_404_NOT_FOUND: {
+            'description': 'Parent category not found',
+            'model': ErrorDetail,
+        },
+    },
+)
+async def bulk_create_categories(
+    categories: Annotated[list[CategoryBulkNode], Body(min_length=1)],
+    *,
+    interactor: FromDishka[BulkCreateCategoriesInteractor],
+):
+    """
+    Создает дерево категорий одним запросом в одной транзакции.
+
+    Дерево можно передать как вложенным *(через `sub_categories`)*, так и плоским списком.
+    У каждой категории должен быть уникальный в рамках запроса `temp_id`.
+    Родитель задаётся одним из полей:
+    - `parent_temp_id` - `temp_id` другой категории из этого же запроса
+    - `parent_category_id` - ID уже существующей категории
+
+    Вложенные категории наследуют родителя автоматически.
+    Порядок категорий в запросе не важен, циклы и ссылки на отсутствующих родителей
+    проверяются до записи в БД.
+
+    В ответе возвращается соответствие `temp_id` и ID созданных категорий.
+    """
+    try:
+        ids = await interactor(nodes=_flatten_category_tree(categories))
+    except CategoryTreeError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(error),
+        ) from error
+    except CategoryNotFoundError as error:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(error),
+        ) from error
+
+    return CategoryBulkCreateResponse(ids=ids)
+
+
 @router.put(
     '/{category_id}',
     status_code=status.HTTP_204_NO_CONTENT,
@@ -188,3 +456,46 @@ async def delete_category(
     Если категория содержит вложенные категории, то они не будут удалены, `category_parent_id` у них станет `Null`.
     """
     await interactor(category_id=str(category_id))
+
+
+@router.post(
+    '/{category_id}/deletion-jobs',
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=CategoryDeletionJobRead,
+    responses={
+        status.HTTP_404_NOT_FOUND: {
+            'description': 'Category not found',
+            'model': ErrorDetail,
+        },
+    },
+)
+async def start_category_deletion(
+    category_id: UUID,
+    request: Request,
+    batch_size: Annotated[int, Query(gt=0, le=10000)] = 1000,
+    *,
+    interactor: FromDishka[StartCategoryDeletionInteractor],
+):
+    """
+    Запускает фоновое удаление категории с большим количеством товаров.
+
+    В отличие от `DELETE /categories/{category_id}`, товары и дочерние категории отвязываются
+    пачками по `batch_size` штук, каждая пачка в своей короткой транзакции.
+    После этого удаляется сама категория.
+
+    Статус удаления можно получить через `GET /categories/deletion-jobs/{job_id}`.
+    """
+    try:
+        job = await interactor(category_id=str(category_id), batch_size=batch_size)
+    except CategoryNotFoundError as error:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(error),
+        ) from error
+
+    _start_category_deletion_job(
+        container=request.app.state.dishka_container,
+        job_id=job.id,
+    )
+
+    return job
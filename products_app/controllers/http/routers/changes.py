@@ -0,0 +1,99 @@
+from typing import Annotated
+
+from dishka import FromDishka
+from dishka.integrations.fastapi import DishkaRoute
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from products_app.application.dto.catalog_change import CatalogChangeCursorDTO
+from products_app.application.interactors.catalog_change import (
+    GetCatalogChangesInteractor,
+)
+from products_app.controllers.http.cursor import decode_cursor, encode_cursor
+from products_app.controllers.schemas.catalog_change import (
+    CatalogChangeRead,
+    CatalogChangesRead,
+)
+from products_app.controllers.schemas.common import ErrorDetail
+from products_app.domain.exceptions.catalog_change import (
+    CatalogChangeCursorExpiredError,
+)
+from products_app.infra.database.routing import read_only_route
+from products_app.infra.database.timeouts import statement_timeout
+
+
+router = APIRouter(route_class=DishkaRoute)
+
+
+@router.get(
+    '',
+    response_model=CatalogChangesRead,
+    dependencies=[
+        Depends(read_only_route),
+        Depends(statement_timeout(seconds=5)),
+    ],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad cursor',
+            'model': ErrorDetail,
+        },
+        status.HTTP_410_GONE: {
+            'description': 'Changes after the cursor were pruned',
+            'model': ErrorDetail,
+        },
+    },
+)
+async def get_catalog_changes(
+    since: str | None = None,
+    limit: Annotated[int, Query(gt=0, le=1000)] = 500,
+    *,
+    interactor: FromDishka[GetCatalogChangesInteractor],
+):
+    """
+    Возвращает изменения товаров и категорий после курсора `since` в порядке коммита транзакций.
+
+    Каждое изменение - создание или обновление (`deleted = false`) либо удаление (`deleted = true`)
+    товара или категории с указанным ID. Одна запись может встречаться в ленте несколько раз.
+
+    Лента хранит только изменения за срок хранения (см. `POST /internal/changes/prune`), а не полный
+    снимок каталога. Без `since` лента читается с самого старого хранимого изменения. Чтобы читать дальше,
+    нужно передать `next_cursor` из ответа в `since`, курсор возвращается и для пустой страницы.
+
+    Если изменения после `since` уже удалены, возвращается 410: потребитель должен начать чтение
+    без `since` и перечитать товары и категории целиком (`GET /products`, `GET /categories/`),
+    изменения из ленты после этого применяются поверх.
+
+    Изменения незавершённых транзакций, а также транзакций, начатых после них, появляются в ленте
+    только после завершения этих транзакций.
+    """
+    after = None
+    if since is not None:
+        try:
+            txid, change_id = decode_cursor(since, size=2)
+            after = CatalogChangeCursorDTO(txid=int(txid), id=int(change_id))
+        except (TypeError, ValueError) as error:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail='Bad cursor',
+            ) from error
+
+    try:
+        changes = await interactor(after=after, limit=limit)
+    except CatalogChangeCursorExpiredError as error:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(error),
+        ) from error
+
+    last = changes[-1].cursor if changes else after
+    return CatalogChangesRead(
+        changes=[
+            CatalogChangeRead(
+                entity=change.entity.value,
+                id=change.entity_id,
+                deleted=change.deleted,
+                changed_at=change.changed_at,
+            )
+            for change in changes
+        ],
+        next_cursor=encode_cursor([last.txid, last.id]) if last is not None else None,
+    )
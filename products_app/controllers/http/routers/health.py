@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+from products_app.controllers.schemas.common import ErrorDetail
+from products_app.controllers.schemas.monitoring import HealthRead
+
+
+router = APIRouter()
+
+
+@router.get(
+    '/ready',
+    response_model=HealthRead,
+    responses={
+        status.HTTP_503_SERVICE_UNAVAILABLE: {'model': ErrorDetail},
+    },
+)
+async def get_readiness(request: Request):
+    """
+    Проверка готовности воркера принимать трафик.
+
+    Возвращает 503, пока при старте не прогреты соединения с БД и подготовленные запросы.
+    """
+    if not request.app.state.ready:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Warm-up is not finished',
+        )
+
+    return HealthRead(status='ready')
@@ -0,0 +1,126 @@
+import datetime as dt
+from typing import Annotated
+from uuid import UUID
+
+from dishka import FromDishka
+from dishka.integrations.fastapi import DishkaRoute
+from fastapi import APIRouter, Depends, Query
+
+from products_app.application.interactors.catalog_change import (
+    PruneCatalogChangesInteractor,
+)
+from products_app.application.interactors.monitoring import (
+    GetPoolStatsInteractor,
+    GetSlowQueriesInteractor,
+)
+from products_app.application.interactors.product import (
+    CheckRenderedProductsInteractor,
+)
+from products_app.config import AppConfig
+from products_app.controllers.schemas.catalog_change import CatalogChangesPruneRead
+from products_app.controllers.schemas.monitoring import (
+    PoolStatsRead,
+    RenderedJsonCheckRead,
+    SlowQueryRead,
+)
+from products_app.infra.database.routing import read_only_route
+
+
+router = APIRouter(route_class=DishkaRoute)
+
+
+@router.get(
+    '/pool',
+    response_model=list[PoolStatsRead],
+)
+async def get_pool_stats(
+    *,
+    interactor: FromDishka[GetPoolStatsInteractor],
+):
+    """
+    Возвращает состояние пулов соединений с БД текущего воркера.
+
+    - `checked_out` - соединения, выданные запросам
+    - `waiting` - запросы, которые сейчас ждут соединение
+    - `checkout_wait` - гистограмма времени получения соединения из пула, в секундах
+    - `connect_latency` - гистограмма времени установки новых соединений, в секундах
+
+    Гистограммы накопительные, как в Prometheus: значение бакета - количество замеров не больше его границы.
+    """
+    return await interactor()
+
+
+@router.get(
+    '/slow-queries',
+    response_model=list[SlowQueryRead],
+)
+async def get_slow_queries(
+    *,
+    limit: Annotated[int, Query(gt=0, le=200)] = 20,
+    interactor: FromDishka[GetSlowQueriesInteractor],
+):
+    """
+    Возвращает самые тяжёлые медленные запросы текущего воркера по суммарному времени.
+
+    В журнал попадают запросы дольше `POSTGRES_SLOW_QUERY_THRESHOLD` секунд. У каждого воркера свой журнал,
+    поэтому ответ содержит только запросы воркера, обработавшего этот запрос, и при нескольких воркерах
+    эндпоинт нужно опросить несколько раз.
+
+    - `statement` - запрос с параметрами, заменёнными на `?`
+    - `shape` - форма запроса, для поиска товаров - набор фильтров
+    - `operation` - метод гейтвея, выполнивший запрос
+    - `total_time`, `mean_time`, `max_time` - время выполнения в секундах
+    - `plan` - план из `EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)`, снимается выборочно и только для SELECT
+    """
+    return await interactor(limit=limit)
+
+
+@router.get(
+    '/rendered-products/drift',
+    response_model=RenderedJsonCheckRead,
+    dependencies=[Depends(read_only_route)],
+)
+async def check_rendered_products(
+    *,
+    after_id: UUID | None = None,
+    limit: Annotated[int, Query(gt=0, le=10000)] = 1000,
+    interactor: FromDishka[CheckRenderedProductsInteractor],
+):
+    """
+    Сверяет сохранённый JSON товаров (`rendered_json`) с собранным заново из строки товара.
+
+    Проверяет `limit` товаров по порядку ID после `after_id`. Чтобы проверить все товары,
+    нужно повторять запрос, передавая `last_id` из ответа в `after_id`, пока `checked` не станет 0.
+
+    - `drifted_ids` - товары, у которых сохранённый JSON разошёлся с данными
+    """
+    return await interactor(
+        after_id=str(after_id) if after_id is not None else None,
+        limit=limit,
+    )
+
+
+@router.post(
+    '/changes/prune',
+    response_model=CatalogChangesPruneRead,
+)
+async def prune_catalog_changes(
+    *,
+    older_than_days: Annotated[int | None, Query(ge=1)] = None,
+    config: FromDishka[AppConfig],
+    interactor: FromDishka[PruneCatalogChangesInteractor],
+):
+    """
+    Удаляет из ленты изменений (`GET /changes`) записи старше `older_than_days` дней.
+
+    По умолчанию срок хранения берётся из `CATALOG_CHANGE_RETENTION_DAYS`. Позиция последнего удалённого
+    изменения сохраняется: потребитель, который не читал ленту дольше срока хранения, получит 410
+    на свой курсор и должен перечитать каталог целиком.
+
+    - `deleted` - количество удалённых записей
+    """
+    if older_than_days is None:
+        older_than_days = config.common.CATALOG_CHANGE_RETENTION_DAYS
+
+    deleted = await interactor(older_than=dt.timedelta(days=older_than_days))
+    return CatalogChangesPruneRead(deleted=deleted)
@@ -1,6 +1,13 @@
 from fastapi import APIRouter
 
-from products_app.controllers.http.routers import category, product
+from products_app.controllers.http.routers import (
+    category,
+    changes,
+    health,
+    internal,
+    metrics,
+    product,
+)
 from products_app.openapi import OpenAPITags
 
 
@@ -17,3 +24,26 @@ router.include_router(
     prefix='/products',
     tags=[OpenAPITags.products],
 )
+
+router.include_router(
+    changes.router,
+    prefix='/changes',
+    tags=[OpenAPITags.changes],
+)
+
+router.include_router(
+    internal.router,
+    prefix='/internal',
+    tags=[OpenAPITags.internal],
+)
+
+router.include_router(
+    health.router,
+    prefix='/health',
+    tags=[OpenAPITags.health],
+)
+
+router.include_router(
+    metrics.router,
+    tags=[OpenAPITags.internal],
+)
@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Response
+
+from products_app.infra.metrics import render_metrics
+
+
+router = APIRouter()
+
+
+@router.get('/metrics', response_class=Response)
+def get_metrics():
+    """
+    Метрики в формате Prometheus.
+
+    При запуске через gunicorn метрики собираются со всех воркеров из `PROMETHEUS_MULTIPROC_DIR`.
+    """
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
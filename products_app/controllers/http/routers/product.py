@@ -1,12 +1,31 @@
+import json
+import re
 from decimal import Decimal
 from typing import Annotated, Any
 from uuid import UUID
 
 from dishka import FromDishka
 from dishka.integrations.fastapi import DishkaRoute
-from fastapi import APIRouter, Body, HTTPException, Query, status
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Body,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    status,
+)
+from pydantic import TypeAdapter
 
-from products_app.application.dto.product import NewProductDTO, UpdateProductDTO
+from products_app.application.dto.product import (
+    ExpandedProductsDTO,
+    NewProductDTO,
+    ProductExpand,
+    ProductFieldsDTO,
+    UpdateProductDTO,
+)
 from products_app.application.interactors.product import (
     CreateProductInteractor,
     DeleteProductInteractor,
@@ -14,6 +33,15 @@ from products_app.application.interactors.product import (
     GetProductByIdInteractor,
     UpdateProductInteractor,
 )
+from products_app.config import AppConfig
+from products_app.controllers.http.fields import (
+    expanded_product_list,
+    expanded_product_read,
+    parse_product_fields,
+    partial_product_list,
+    partial_product_read,
+)
+from products_app.controllers.http.responses import cached_response
 from products_app.controllers.schemas.common import ErrorDetail
 from products_app.controllers.schemas.product import (
     ProductCreate,
@@ -26,54 +54,330 @@ from products_app.domain.exceptions.product import (
     ProductFilterParamError,
     ProductNotFoundError,
 )
+from products_app.infra.database.routing import (
+    is_pinned_to_primary,
+    read_only_route,
+)
+from products_app.infra.database.timeouts import statement_timeout
+from products_app.infra.search_cache import SearchResultCache, search_cache_key
 
 
 router = APIRouter(route_class=DishkaRoute)
 
+PRODUCT_LIST = TypeAdapter(list[ProductRead])
+
+# Число в записи JSON, остальные значения фильтров из строки запроса остаются строками
+NUMBER_PATTERN = re.compile(r'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?')
+
+# Параметры строки запроса, которые не являются фильтрами
+RESERVED_PARAMS = ('offset', 'limit', 'fields', 'expand')
+
+# Числовые столбцы товара, с ними числа сравниваются как числа и в фильтре `eq`
+NUMERIC_FILTER_FIELDS = ('price', 'stock', 'unit_size')
+
+FIELDS_DESCRIPTION = (
+    'Поля товара через запятую, например `id,name,price,attributes.color`. '
+    'По умолчанию возвращаются все поля'
+)
+
+EXPAND_DESCRIPTION = (
+    'Встроить в ответ категории товаров (`category`) или категории вместе '
+    'с родительскими (`category_path`). Ответ становится объектом с товарами в `data` '
+    'и категориями в `included.categories`'
+)
+
+
+def _query_filter_value(key: str, value: str) -> Any:
+    """
+    Приводит значение к числу, как в JSON, для фильтров `gt` и `lt`
+    и для числовых столбцов, остальные значения остаются строками
+    """
+    path, _, operator = key.partition('__')
+    if NUMBER_PATTERN.fullmatch(value) and (
+        operator in ('gt', 'lt') or path in NUMERIC_FILTER_FIELDS
+    ):
+        return json.loads(value)
+
+    return value
+
+
+def _query_filters(request: Request) -> dict[str, Any]:
+    """Собирает фильтры из строки запроса"""
+    return {
+        key: _query_filter_value(key, value)
+        for key, value in request.query_params.items()
+        if key not in RESERVED_PARAMS
+    }
+
+
+def _parse_fields(
+    fields: str | None,
+    expand: ProductExpand | None = None,
+) -> ProductFieldsDTO | None:
+    if fields is None:
+        return None
+
+    try:
+        # Без category_id клиент не свяжет товар со встроенной категорией
+        return parse_product_fields(
+            fields,
+            required=('category_id',) if expand is not None else (),
+        )
+    except ValueError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Bad fields',
+        ) from error
+
+
+def _with_included(expanded: ExpandedProductsDTO) -> dict[str, Any]:
+    return {
+        'data': expanded.products,
+        'included': {
+            'categories': {category.id: category for category in expanded.categories},
+        },
+    }
+
+
+async def _cached_search(
+    search_cache: SearchResultCache,
+    interactor: GetAllProductsInteractor,
+    background_tasks: BackgroundTasks,
+    filters: dict[str, Any] | None,
+    limit: int,
+    offset: int,
+    fields: ProductFieldsDTO | None,
+    expand: ProductExpand | None,
+    render_in_database: bool,
+) -> Response:
+    """
+    Отдаёт закодированный ответ поиска из кеша или ищет и кладёт ответ в кеш, см. `cached_response`.
+
+    С `render_in_database` ответ без `fields` и `expand` собирается из JSON товаров,
+    сохранённых в базе
+    """
+    key = search_cache_key(
+        filters,
+        limit=limit,
+        offset=offset,
+        fields=fields,
+        expand=expand,
+    )
+    if expand is not None:
+        adapter = expanded_product_list(fields.fields if fields else None)
+    elif fields is not None:
+        adapter = partial_product_list(fields.fields)
+    else:
+        adapter = PRODUCT_LIST
+
+    rendered = render_in_database and fields is None and expand is None
+
+    async def search() -> bytes:
+        if rendered:
+            return await interactor(
+                offset=offset,
+                limit=limit,
+                filters=filters,
+                rendered=True,
+            )
+
+        products = await interactor(
+            offset=offset,
+            limit=limit,
+            filters=filters,
+            fields=fields,
+            expand=expand,
+        )
+        if expand is not None:
+            products = _with_included(products)
+
+        return adapter.dump_json(
+            adapter.validate_python(products, from_attributes=True),
+        )
+
+    return await cached_response(search_cache, key, search, background_tasks)
+
 
 @router.get(
     '/{product_id}',
     response_model=ProductRead,
+    dependencies=[
+        Depends(read_only_route),
+        Depends(statement_timeout(seconds=2)),
+    ],
     responses={
         status.HTTP_404_NOT_FOUND: {
             'description': 'Product not found',
             'model': ErrorDetail,
         },
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad fields',
+            'model': ErrorDetail,
+        },
     },
 )
 async def get_product_by_id(
     product_id: UUID,
+    fields: Annotated[str | None, Query(description=FIELDS_DESCRIPTION)] = None,
+    expand: Annotated[
+        ProductExpand | None, Query(description=EXPAND_DESCRIPTION)
+    ] = None,
     *,
     interactor: FromDishka[GetProductByIdInteractor],
+    config: FromDishka[AppConfig],
 ):
     """
     Возвращает информацию о товаре по его ID.
+
+    Параметр `fields` ограничивает набор полей в ответе, из базы читаются только они.
+    С `expand` категория читается тем же запросом, что и товар.
     """
+    product_fields = _parse_fields(fields, expand)
+    rendered = (
+        'products_get' in config.common.DATABASE_RENDERED_ENDPOINTS
+        and product_fields is None
+        and expand is None
+    )
     try:
-        return await interactor(product_id=str(product_id))
+        product = await interactor(
+            product_id=str(product_id),
+            fields=product_fields,
+            expand=expand,
+            rendered=rendered,
+        )
     except ProductNotFoundError as error:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(error),
         ) from error
 
+    if rendered:
+        return Response(product, media_type='application/json')
+
+    if expand is not None:
+        [data] = product.products
+        response_model = expanded_product_read(
+            product_fields.fields if product_fields else None,
+        )
+        product = {**_with_included(product), 'data': data}
+    elif product_fields is not None:
+        response_model = partial_product_read(product_fields.fields)
+    else:
+        return product
+
+    return Response(
+        response_model.model_validate(product, from_attributes=True).model_dump_json(),
+        media_type='application/json',
+    )
+
+
+@router.get(
+    '',
+    response_model=list[ProductRead],
+    dependencies=[
+        Depends(read_only_route),
+        Depends(statement_timeout(seconds=5)),
+    ],
+    responses={
+        status.HTTP_400_BAD_REQUEST: {
+            'description': 'Bad filter params',
+            'model': ErrorDetail,
+        },
+        status.HTTP_504_GATEWAY_TIMEOUT: {
+            'description': 'Search took too long',
+            'model': ErrorDetail,
+        },
+    },
+)
+async def search_products(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    offset: Annotated[int, Query(ge=0)] = 0,
+    limit: Annotated[int, Query(gt=0, le=200)] = 200,
+    fields: Annotated[str | None, Query(description=FIELDS_DESCRIPTION)] = None,
+    expand: Annotated[
+        ProductExpand | None, Query(description=EXPAND_DESCRIPTION)
+    ] = None,
+    *,
+    interactor: FromDishka[GetAllProductsInteractor],
+    search_cache: FromDishka[SearchResultCache],
+    config: FromDishka[AppConfig],
+):
+    """
+    Возвращает список товаров с пагинацией, фильтры передаются в строке запроса.
+
+    Фильтры те же, что и у `POST /products/search`, каждый фильтр - отдельный параметр:
+    ```
+    GET /products?price__gt=100&price__lt=500&color__eq=red
+    ```
+    Значения `gt` и `lt`, а также значения для `price`, `stock` и `unit_size` сравниваются как числа,
+    остальные - как строки.
+    Параметры `offset`, `limit`, `fields` и `expand` фильтрами не считаются.
+
+    Ответ можно кешировать в HTTP кешах, время жизни задаёт заголовок `Cache-Control`.
+    Клиентам, закреплённым за мастером после записи, ответ отдаётся с `Cache-Control: no-store`.
+    """
+    try:
+        response = await _cached_search(
+            search_cache=search_cache,
+            interactor=interactor,
+            background_tasks=background_tasks,
+            filters=_query_filters(request),
+            limit=limit,
+            offset=offset,
+            fields=_parse_fields(fields, expand),
+            expand=expand,
+            render_in_database=(
+                'products_list' in config.common.DATABASE_RENDERED_ENDPOINTS
+            ),
+        )
+    except ProductFilterParamError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Bad filter params',
+        ) from error
+
+    if is_pinned_to_primary():
+        response.headers['Cache-Control'] = 'no-store'
+    else:
+        response.headers['Cache-Control'] = (
+            f'public, max-age={config.search_cache.SEARCH_CACHE_HTTP_MAX_AGE}'
+        )
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
 
 @router.post(
     '/search',
     response_model=list[ProductRead],
+    dependencies=[
+        Depends(read_only_route),
+        Depends(statement_timeout(seconds=5)),
+    ],
     responses={
         status.HTTP_400_BAD_REQUEST: {
             'description': 'Bad filter params',
             'model': ErrorDetail,
         },
+        status.HTTP_504_GATEWAY_TIMEOUT: {
+            'description': 'Search took too long',
+            'model': ErrorDetail,
+        },
     },
 )
 async def get_all_products(
+    background_tasks: BackgroundTasks,
     offset: Annotated[int, Query(ge=0)] = 0,
     limit: Annotated[int, Query(gt=0, le=200)] = 200,
     filters: Annotated[dict[str, Any] | None, Body()] = None,
+    fields: Annotated[str | None, Query(description=FIELDS_DESCRIPTION)] = None,
+    expand: Annotated[
+        ProductExpand | None, Query(description=EXPAND_DESCRIPTION)
+    ] = None,
     *,
     interactor: FromDishka[GetAllProductsInteractor],
+    search_cache: FromDishka[SearchResultCache],
+    config: FromDishka[AppConfig],
 ):
     """
     Возвращает список товаров с пагинацией.
@@ -100,9 +404,29 @@ async def get_all_products(
     Вернёт товары, у которых цена между 100 и 500.
 
     Товары сортируются по названию.
+
+    Параметр `fields` ограничивает набор полей в ответе, из базы читаются только они,
+    а для `attributes.{key}` - только нужные ключи атрибутов.
+
+    Параметр `expand` встраивает в ответ категории товаров, они читаются тем же запросом,
+    что и товары, и не повторяются для товаров из одной категории.
+
+    Ответы кешируются до изменения каталога, заголовок `X-Cache` показывает, был ли ответ взят из кеша.
     """
     try:
-        return await interactor(offset=offset, limit=limit, filters=filters)
+        return await _cached_search(
+            search_cache=search_cache,
+            interactor=interactor,
+            background_tasks=background_tasks,
+            filters=filters,
+            limit=limit,
+            offset=offset,
+            fields=_parse_fields(fields, expand),
+            expand=expand,
+            render_in_database=(
+                'products_search' in config.common.DATABASE_RENDERED_ENDPOINTS
+            ),
+        )
     except ProductFilterParamError as error:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -0,0 +1,21 @@
+from uuid import UUID
+import datetime as dt
+
+from pydantic import BaseModel
+from typing_extensions import Literal
+
+
+class CatalogChangeRead(BaseModel):
+    entity: Literal['product', 'category']
+    id: UUID
+    deleted: bool
+    changed_at: dt.datetime
+
+
+class CatalogChangesRead(BaseModel):
+    changes: list[CatalogChangeRead]
+    next_cursor: str | None
+
+
+class CatalogChangesPruneRead(BaseModel):
+    deleted: int
@@ -1,7 +1,8 @@
 from uuid import UUID
 import datetime as dt
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+from typing_extensions import Annotated, Literal, Self
 
 
 class CategoryBase(BaseModel):
@@ -26,3 +27,45 @@ class CategoryUpdate(CategoryBase): ...
 
 class CategoryCreateResponse(BaseModel):
     id: UUID
+
+
+class CategoryBulkNode(BaseModel):
+    temp_id: Annotated[str, Field(min_length=1, max_length=64)]
+    name: str
+    parent_temp_id: str | None = None
+    parent_category_id: UUID | None = None
+    sub_categories: list['CategoryBulkNode'] = []
+
+    @model_validator(mode='after')
+    def check_parent(self) -> Self:
+        if self.parent_temp_id is not None and self.parent_category_id is not None:
+            raise ValueError(
+                'Only one of parent_temp_id and parent_category_id can be set',
+            )
+
+        for sub_category in self.sub_categories:
+            if (
+                sub_category.parent_temp_id is not None
+                or sub_category.parent_category_id is not None
+            ):
+                raise ValueError(
+                    'Nested categories inherit their parent and cannot set it',
+                )
+
+        return self
+
+
+class CategoryBulkCreateResponse(BaseModel):
+    ids: dict[str, UUID]
+
+
+class CategoryDeletionJobRead(BaseModel):
+    id: UUID
+    created_at: dt.datetime
+    category_id: UUID
+    batch_size: int
+    status: Literal['pending', 'running', 'done', 'failed']
+    detached_products: int
+    detached_sub_categories: int
+    finished_at: dt.datetime | None
+    error: str | None
@@ -0,0 +1,45 @@
+import datetime as dt
+from typing import Any
+from uuid import UUID
+
+from pydantic import BaseModel
+
+
+class HistogramRead(BaseModel):
+    buckets: dict[str, int]
+    count: int
+    sum: float
+
+
+class PoolStatsRead(BaseModel):
+    name: str
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waiting: int
+    checkout_wait: HistogramRead
+    connect_latency: HistogramRead
+
+
+class HealthRead(BaseModel):
+    status: str
+
+
+class SlowQueryRead(BaseModel):
+    database: str
+    statement: str
+    shape: list[str]
+    operation: str
+    calls: int
+    total_time: float
+    mean_time: float
+    max_time: float
+    last_seen: dt.datetime
+    plan: Any | None
+
+
+class RenderedJsonCheckRead(BaseModel):
+    checked: int
+    drifted_ids: list[UUID]
+    last_id: UUID | None
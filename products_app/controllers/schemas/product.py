@@ -4,6 +4,8 @@ import datetime as dt
 from pydantic import BaseModel, ConfigDict, Field
 from typing_extensions import Annotated, Literal
 
+from products_app.controllers.schemas.category import CategoryRead
+
 
 class ProductBase(BaseModel):
     model_config = ConfigDict(
@@ -33,3 +35,18 @@ class ProductUpdate(ProductBase): ...
 
 class ProductCreateResponse(BaseModel):
     id: UUID
+
+
+class IncludedRead(BaseModel):
+    # Категории товаров из ответа по ID, каждая один раз
+    categories: dict[UUID, CategoryRead]
+
+
+class ExpandedProductRead(BaseModel):
+    data: ProductRead
+    included: IncludedRead
+
+
+class ExpandedProductListRead(BaseModel):
+    data: list[ProductRead]
+    included: IncludedRead
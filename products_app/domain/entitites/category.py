@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from enum import Enum
 import datetime as dt
 
 
@@ -13,3 +14,23 @@ class CategoryEntity:
 @dataclass(slots=True)
 class ExtendedCategoryEntity(CategoryEntity):
     sub_categories: list['ExtendedCategoryEntity']
+
+
+class CategoryDeletionStatus(str, Enum):
+    pending = 'pending'
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
+
+
+@dataclass(slots=True)
+class CategoryDeletionJobEntity:
+    id: str
+    created_at: dt.datetime
+    category_id: str
+    batch_size: int
+    status: CategoryDeletionStatus
+    detached_products: int
+    detached_sub_categories: int
+    finished_at: dt.datetime | None
+    error: str | None
@@ -0,0 +1,9 @@
+from products_app.domain.exceptions.base import CoreError
+
+
+class CatalogChangeError(CoreError): ...
+
+
+class CatalogChangeCursorExpiredError(CatalogChangeError):
+    def __str__(self):
+        return 'Changes after the cursor were pruned, resync the catalog'
@@ -11,3 +11,46 @@ class CategoryNotFoundError(CategoryError):
 
     def __str__(self):
         return f'Category<{self.identifier}> not found'
+
+
+class CategoryDeletionJobNotFoundError(CategoryError):
+    def __init__(self, identifier: str):
+        self.identifier = identifier
+        super().__init__()
+
+    def __str__(self):
+        return f'Category deletion job<{self.identifier}> not found'
+
+
+class CategoryTreeError(CategoryError): ...
+
+
+class CategoryTreeDuplicateNodeError(CategoryTreeError):
+    def __init__(self, identifier: str):
+        self.identifier = identifier
+        super().__init__()
+
+    def __str__(self):
+        return f'Category node<{self.identifier}> is defined more than once'
+
+
+class CategoryTreeDanglingParentError(CategoryTreeError):
+    def __init__(self, identifier: str, parent_identifier: str):
+        self.identifier = identifier
+        self.parent_identifier = parent_identifier
+        super().__init__()
+
+    def __str__(self):
+        return (
+            f'Category node<{self.identifier}> refers to '
+            f'unknown parent node<{self.parent_identifier}>'
+        )
+
+
+class CategoryTreeCycleError(CategoryTreeError):
+    def __init__(self, identifiers: list[str]):
+        self.identifiers = identifiers
+        super().__init__()
+
+    def __str__(self):
+        return f'Category nodes<{", ".join(self.identifiers)}> form a cycle'
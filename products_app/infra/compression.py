@@ -0,0 +1,176 @@
+import gzip
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Sequence
+
+import brotli
+import zstandard
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from products_app.config import CompressionConfig
+
+
+COMPRESSORS: dict[str, Callable[[bytes, int], bytes]] = {
+    'zstd': lambda body, level: zstandard.compress(body, level),
+    'br': lambda body, level: brotli.compress(body, quality=level),
+    # mtime=0, чтобы одинаковые ответы сжимались в одинаковые байты
+    'gzip': lambda body, level: gzip.compress(body, compresslevel=level, mtime=0),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class CompressionLevels:
+    gzip: int
+    br: int
+    zstd: int
+
+
+@dataclass(slots=True)
+class ResponseCompression:
+    # Кодировка, выбранная по Accept-Encoding, None - клиент не принимает сжатые ответы
+    encoding: str | None
+    min_size: int
+    levels: CompressionLevels
+
+    def compress(self, body: bytes) -> bytes | None:
+        """Сжатый ответ или None, если ответ не нужно сжимать"""
+        if self.encoding is None or len(body) < self.min_size:
+            return None
+
+        return COMPRESSORS[self.encoding](body, getattr(self.levels, self.encoding))
+
+
+_response_compression: ContextVar[ResponseCompression | None] = ContextVar(
+    'response_compression',
+    default=None,
+)
+
+
+def response_compression() -> ResponseCompression | None:
+    return _response_compression.get()
+
+
+def compression(
+    min_size: int | None = None,
+    levels: CompressionLevels | None = None,
+):
+    """FastAPI-зависимость, задающая порог и уровни сжатия ответов роута"""
+
+    async def set_route_compression() -> None:
+        state = _response_compression.get()
+        if state is None:
+            return
+
+        if min_size is not None:
+            state.min_size = min_size
+        if levels is not None:
+            state.levels = levels
+
+    return set_route_compression
+
+
+def negotiate_encoding(accept_encoding: str, encodings: Sequence[str]) -> str | None:
+    """
+    Выбирает кодировку с наибольшим весом `q` из `Accept-Encoding`.
+
+    При равных весах выигрывает кодировка, которая раньше в `encodings`
+    """
+    weights = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.partition(';')
+        weight = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get('*', 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+
+    return best
+
+
+def _compressible(content_type: str) -> bool:
+    return content_type.startswith('text/') or 'json' in content_type
+
+
+class CompressionMiddleware:
+    """
+    Сжимает ответы кодировкой, выбранной по заголовку `Accept-Encoding`.
+
+    Ответы меньше порога, не текстовые и уже сжатые роутом (с `Content-Encoding`,
+    например взятые из кеша) отдаются как есть. Роуты задают свой порог и уровни сжатия
+    зависимостью `compression`. Тело ответа собирается целиком перед сжатием
+    """
+
+    def __init__(self, app: ASGIApp, config: CompressionConfig):
+        self.app = app
+        self.encodings = config.COMPRESSION_ENCODINGS
+        self.min_size = config.COMPRESSION_MIN_SIZE
+        self.levels = CompressionLevels(
+            gzip=config.COMPRESSION_GZIP_LEVEL,
+            br=config.COMPRESSION_BROTLI_LEVEL,
+            zstd=config.COMPRESSION_ZSTD_LEVEL,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http' or not self.encodings:
+            return await self.app(scope, receive, send)
+
+        state = ResponseCompression(
+            encoding=negotiate_encoding(
+                Request(scope).headers.get('accept-encoding', ''),
+                self.encodings,
+            ),
+            min_size=self.min_size,
+            levels=self.levels,
+        )
+        start: Message | None = None
+        chunks = []
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start
+            if message['type'] == 'http.response.start':
+                headers = Headers(raw=message['headers'])
+                if 'content-encoding' in headers or not _compressible(
+                    headers.get('content-type', ''),
+                ):
+                    return await send(message)
+
+                start = message
+                return
+
+            if message['type'] != 'http.response.body' or start is None:
+                return await send(message)
+
+            chunks.append(message.get('body', b''))
+            if message.get('more_body', False):
+                return
+
+            body = b''.join(chunks)
+            if len(body) >= state.min_size:
+                headers = MutableHeaders(scope=start)
+                headers.add_vary_header('Accept-Encoding')
+                compressed = state.compress(body)
+                if compressed is not None:
+                    body = compressed
+                    headers['Content-Encoding'] = state.encoding
+                    headers['Content-Length'] = str(len(body))
+
+            await send(start)
+            await send({'type': 'http.response.body', 'body': body})
+
+        token = _response_compression.set(state)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _response_compression.reset(token)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+
+import asyncpg
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from products_app.config import PostgresConfig
+
+
+logger = logging.getLogger(__name__)
+
+# Канал, в который триггеры на таблицах product и category шлют уведомление после каждой записи
+CATALOG_CHANGED_CHANNEL = 'catalog_changed'
+
+CONNECTION_ERRORS = (OSError, asyncpg.PostgresError, asyncpg.InterfaceError)
+
+
+class CatalogVersion:
+    """
+    Версия каталога в воркере.
+
+    Растёт после каждого коммита в этом воркере и после уведомления
+    о записи в товары или категории из других воркеров
+    """
+
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0
+
+    def bump(self) -> None:
+        self.value += 1
+
+
+catalog_version = CatalogVersion()
+
+
+@event.listens_for(Session, 'after_commit')
+def _bump_catalog_version(session: Session) -> None:
+    # Уведомление о своей же записи приходит асинхронно, поэтому версия
+    # поднимается сразу, чтобы следующий запрос клиента не получил старый результат
+    catalog_version.bump()
+
+
+class CatalogChangeListener:
+    """
+    Слушает уведомления об изменениях каталога на отдельном соединении с мастером.
+
+    Пока соединения нет, уведомления теряются, поэтому `listening` сбрасывается,
+    а после переподключения версия каталога поднимается
+    """
+
+    def __init__(self, config: PostgresConfig, reconnect_delay: float = 1):
+        self._config = config
+        self._reconnect_delay = reconnect_delay
+        self._listening = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def listening(self) -> bool:
+        return self._listening.is_set()
+
+    async def wait_listening(self) -> None:
+        await self._listening.wait()
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _connect(self) -> asyncpg.Connection:
+        return await asyncpg.connect(
+            user=self._config.POSTGRES_USER,
+            password=self._config.POSTGRES_PASSWORD,
+            database=self._config.POSTGRES_DB,
+            host=self._config.POSTGRES_HOST,
+            port=self._config.POSTGRES_PORT,
+        )
+
+    async def _listen(self, connection: asyncpg.Connection) -> None:
+        """Слушает уведомления, пока соединение не закроется"""
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        await connection.add_listener(
+            CATALOG_CHANGED_CHANNEL,
+            lambda *_: catalog_version.bump(),
+        )
+        # Изменения, сделанные пока соединения не было, могли быть пропущены
+        catalog_version.bump()
+        self._listening.set()
+        await closed.wait()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                connection = await self._connect()
+            except CONNECTION_ERRORS:
+                logger.warning('Failed to connect for catalog changes', exc_info=True)
+                await asyncio.sleep(self._reconnect_delay)
+                continue
+
+            try:
+                await self._listen(connection)
+                logger.warning('Catalog changes connection lost, reconnecting')
+            except CONNECTION_ERRORS:
+                logger.warning('Failed to listen for catalog changes', exc_info=True)
+            finally:
+                self._listening.clear()
+                if not connection.is_closed():
+                    await connection.close()
+
+            await asyncio.sleep(self._reconnect_delay)
@@ -1,13 +1,78 @@
+from uuid import uuid4
+
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from sqlalchemy.ext.asyncio import create_async_engine
 
+from products_app.config import PostgresConfig
+from products_app.infra.database.pool import (
+    InstrumentedAsyncAdaptedQueuePool,
+    instrument_engine,
+)
+from products_app.infra.database.slow_queries import (
+    SlowQueryLog,
+    record_slow_queries,
+)
+from products_app.infra.database.timeouts import track_statement_timeout
+
+
+def _connect_args(config: PostgresConfig) -> dict:
+    if config.POSTGRES_POOL_PROFILE == 'pgbouncer':
+        # Таймаут запросов за PgBouncer задаётся в настройках роли или самого PgBouncer
+        # В transaction mode PgBouncer соединение с сервером меняется между транзакциями,
+        # поэтому подготовленные запросы не переиспользуются, а их имена должны быть уникальными
+        return {
+            'statement_cache_size': 0,
+            'prepared_statement_cache_size': 0,
+            'prepared_statement_name_func': lambda: f'__asyncpg_{uuid4()}__',
+        }
+
+    return {
+        'statement_cache_size': config.POSTGRES_STATEMENT_CACHE_SIZE,
+        'prepared_statement_cache_size': config.POSTGRES_STATEMENT_CACHE_SIZE,
+        'server_settings': {
+            'statement_timeout': str(_default_statement_timeout(config)),
+        },
+    }
+
+
+def _default_statement_timeout(config: PostgresConfig) -> int | None:
+    if config.POSTGRES_POOL_PROFILE == 'pgbouncer':
+        return None
+
+    return int(config.POSTGRES_STATEMENT_TIMEOUT * 1000)
+
 
-def new_engine(database_uri: str) -> AsyncEngine:
-    return create_async_engine(
+def new_engine(
+    database_uri: str,
+    config: PostgresConfig,
+    name: str = 'primary',
+    slow_query_log: SlowQueryLog | None = None,
+) -> AsyncEngine:
+    engine = create_async_engine(
         database_uri,
-        pool_size=15,
-        max_overflow=15,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=config.POSTGRES_POOL_SIZE,
+        max_overflow=config.POSTGRES_MAX_OVERFLOW,
+        pool_timeout=config.POSTGRES_POOL_TIMEOUT,
+        pool_recycle=config.POSTGRES_POOL_RECYCLE,
+        pool_pre_ping=config.POSTGRES_POOL_PRE_PING,
+        connect_args=_connect_args(config),
     )
+    instrument_engine(engine=engine, name=name)
+    track_statement_timeout(
+        engine=engine,
+        default=_default_statement_timeout(config),
+    )
+    if slow_query_log is not None:
+        record_slow_queries(
+            engine=engine,
+            name=name,
+            log=slow_query_log,
+            threshold=config.POSTGRES_SLOW_QUERY_THRESHOLD,
+            explain_ratio=config.POSTGRES_SLOW_QUERY_EXPLAIN_RATIO,
+        )
+
+    return engine
 
 
 def new_session_maker(
@@ -19,3 +84,13 @@ def new_session_maker(
         autoflush=False,
         expire_on_commit=False,
     )
+
+
+def new_reader_session_maker(
+    engine: AsyncEngine,
+) -> async_sessionmaker[AsyncSession]:
+    # В autocommit не отправляются BEGIN и ROLLBACK. При READ COMMITTED каждый запрос
+    # и так берёт свой снимок, поэтому для чтения это ничего не меняет
+    return new_session_maker(
+        engine=engine.execution_options(isolation_level='AUTOCOMMIT'),
+    )
@@ -0,0 +1,153 @@
+import asyncio
+import contextvars
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from products_app.application.interfaces.product import ProductSaver, ProductWriter
+from products_app.application.interfaces.unit_of_work import UnitOfWork
+from products_app.domain.entitites.product import ProductEntity
+from products_app.domain.exceptions.category import CategoryNotFoundError
+from products_app.infra.database.routing import mark_written
+from products_app.infra.database.timeouts import statement_timeout_scope
+from products_app.infra.gateways.product import ProductGateway
+from products_app.infra.tracing import span
+
+
+class SessionProductWriter(ProductWriter):
+    """Сохраняет товар в сессии запроса и сразу коммитит"""
+
+    def __init__(self, product_gateway: ProductSaver, uow: UnitOfWork):
+        self._product_gateway = product_gateway
+        self._uow = uow
+
+    async def create(self, product: ProductEntity) -> None:
+        await self._product_gateway.save(product=product)
+        await self._uow.commit()
+
+
+class GroupCommitProductWriter(ProductWriter):
+    """
+    Групповой коммит новых товаров.
+
+    Товары, созданные в течение `delay` секунд после первого из них, вставляются
+    одним многострочным INSERT в отдельной транзакции, и вся пачка платит за один коммит.
+    Если пачка нарушила ограничение, товары вставляются заново по одному в SAVEPOINT,
+    и ошибку получает только тот запрос, чей товар её вызвал.
+
+    Пачка пишется в пустом контексте с таймаутом `statement_timeout`:
+    дедлайн, трассировка и метрики отдельного запроса на неё не переносятся.
+    """
+
+    # Ошибки конкретной строки, а не соединения или базы целиком
+    row_errors = (CategoryNotFoundError, IntegrityError, DataError)
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        delay: float,
+        max_batch_size: int,
+        statement_timeout: float,
+    ):
+        self._session_maker = session_maker
+        self._delay = delay
+        self._max_batch_size = max_batch_size
+        self._statement_timeout = statement_timeout
+        self._pending: list[tuple[ProductEntity, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def create(self, product: ProductEntity) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((product, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(
+                self._delay,
+                self._dispatch,
+                context=contextvars.Context(),
+            )
+
+        # Запросы пачки не попадают в трассировку запроса, вместо них ожидание пачки
+        with span('GroupCommitProductWriter.create', layer='db'):
+            # Отмена одного запроса не должна отменять запись остальных товаров пачки
+            await asyncio.shield(future)
+        # Коммит пачки мог пройти в контексте другого запроса
+        mark_written()
+
+    async def close(self) -> None:
+        """Записывает накопленные товары и дожидается всех пачек"""
+        self._dispatch()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.create_task(
+            self._write_batch(batch),
+            context=contextvars.Context(),
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _write_batch(
+        self, batch: list[tuple[ProductEntity, asyncio.Future]]
+    ) -> None:
+        try:
+            with statement_timeout_scope() as timeout_state:
+                timeout_state.timeout = self._statement_timeout
+                errors = await self._write([product for product, _ in batch])
+        except asyncio.CancelledError:
+            for _, future in batch:
+                future.cancel()
+            raise
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+        else:
+            for (_, future), error in zip(batch, errors, strict=True):
+                if error is None:
+                    future.set_result(None)
+                else:
+                    future.set_exception(error)
+
+    async def _write(self, products: list[ProductEntity]) -> list[Exception | None]:
+        async with self._session_maker() as session:
+            product_gateway = ProductGateway(session=session)
+            try:
+                await product_gateway.save_many(products)
+                errors = [None] * len(products)
+            except self.row_errors:
+                await session.rollback()
+                errors = [
+                    await self._save_one(session, product_gateway, product)
+                    for product in products
+                ]
+
+            await session.commit()
+
+        return errors
+
+    async def _save_one(
+        self,
+        session: AsyncSession,
+        product_gateway: ProductGateway,
+        product: ProductEntity,
+    ) -> Exception | None:
+        try:
+            async with session.begin_nested():
+                await product_gateway.save(product=product)
+        except self.row_errors as error:
+            return error
+
+        return None
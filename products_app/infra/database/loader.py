@@ -0,0 +1,162 @@
+import asyncio
+import contextvars
+from typing import Generic, Literal, TypeVar
+from uuid import UUID
+
+from sqlalchemy import Select, Uuid, any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from products_app.config import PostgresConfig
+from products_app.infra.database.models.base import BaseModel
+from products_app.infra.database.routing import ReaderSessionMakers
+from products_app.infra.database.timeouts import statement_timeout_scope
+from products_app.infra.metrics import current_database_operation, database_operation
+from products_app.infra.tracing import span
+
+
+ModelT = TypeVar('ModelT', bound=BaseModel)
+
+ReadTarget = Literal['primary', 'replica']
+
+
+def select_by_ids(model: type[ModelT], ids: list[UUID]) -> Select:
+    # Один массив вместо IN (...): текст запроса не зависит от размера пачки
+    # и подготовленный запрос переиспользуется
+    return select(model).where(
+        model.id == any_(bindparam('ids', ids, type_=ARRAY(Uuid))),
+    )
+
+
+class PointLoader(Generic[ModelT]):
+    """
+    Точечные чтения по id, общие для всех запросов воркера.
+
+    Пока загрузка id выполняется, повторные чтения того же id ждут её результат,
+    а разные id, запрошенные на одном такте event loop, загружаются одним
+    `WHERE id = ANY(...)`. Пачки собираются отдельно для мастера и реплик,
+    чтобы клиент, закреплённый за мастером, не получил данные с отстающей реплики.
+
+    Пачка выполняется в пустом контексте: дедлайн, трассировка и метрики запроса,
+    первым запросившего id, на неё не переносятся, а таймаут задаётся `statement_timeout`.
+    В метриках запросов пачка подписывается операцией гейтвея, который её начал.
+    """
+
+    def __init__(
+        self,
+        model: type[ModelT],
+        session_makers: ReaderSessionMakers,
+        max_batch_size: int,
+        statement_timeout: float,
+    ):
+        self._model = model
+        self._session_makers = session_makers
+        self._max_batch_size = max_batch_size
+        self._statement_timeout = statement_timeout
+        self._in_flight: dict[tuple[ReadTarget, str], asyncio.Future] = {}
+        # Id, которые ещё не отправлены в базу, и операция гейтвея, начавшего пачку
+        self._pending: dict[ReadTarget, tuple[str, list[str]]] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def is_available(self) -> bool:
+        """
+        Внутри транзакции запроса читать нужно в её сессии,
+        иначе не будут видны собственные незакоммиченные изменения
+        """
+        return self._session_makers.read_target() is not None
+
+    async def load(self, key: str) -> ModelT | None:
+        target = self._session_makers.read_target()
+        if target is None:
+            raise RuntimeError('PointLoader is used outside of read-only request')
+
+        future = self._in_flight.get((target, key))
+        if future is None:
+            future = self._in_flight[target, key] = (
+                asyncio.get_running_loop().create_future()
+            )
+            self._enqueue(target, key)
+
+        # Запросы пачки не попадают в трассировку запроса, вместо них ожидание пачки
+        with span('PointLoader.load', layer='db', table=self._model.__tablename__):
+            # Отмена одного запроса не должна отменять загрузку для остальных
+            return await asyncio.shield(future)
+
+    def _enqueue(self, target: ReadTarget, key: str) -> None:
+        pending = self._pending.get(target)
+        if pending is None:
+            pending = self._pending[target] = (current_database_operation(), [])
+            asyncio.get_running_loop().call_soon(
+                self._dispatch,
+                target,
+                context=contextvars.Context(),
+            )
+
+        _, batch = pending
+        batch.append(key)
+        if len(batch) >= self._max_batch_size:
+            self._dispatch(target)
+
+    def _dispatch(self, target: ReadTarget) -> None:
+        pending = self._pending.pop(target, None)
+        if pending is None:
+            return
+
+        operation, keys = pending
+        task = asyncio.create_task(
+            self._load_batch(target, keys, operation),
+            context=contextvars.Context(),
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load_batch(
+        self,
+        target: ReadTarget,
+        keys: list[str],
+        operation: str,
+    ) -> None:
+        try:
+            session_maker = self._session_makers.session_maker(target)
+            with (
+                database_operation(operation),
+                statement_timeout_scope() as timeout_state,
+            ):
+                timeout_state.timeout = self._statement_timeout
+                async with session_maker() as session:
+                    models = await session.scalars(
+                        select_by_ids(self._model, [UUID(key) for key in keys]),
+                    )
+                    found = {str(model.id): model for model in models}
+        except asyncio.CancelledError:
+            for future in self._take_futures(target, keys):
+                future.cancel()
+            raise
+        except Exception as error:
+            for future in self._take_futures(target, keys):
+                future.set_exception(error)
+        else:
+            for key, future in zip(keys, self._take_futures(target, keys), strict=True):
+                future.set_result(found.get(key))
+
+    def _take_futures(
+        self,
+        target: ReadTarget,
+        keys: list[str],
+    ) -> list[asyncio.Future]:
+        return [self._in_flight.pop((target, key)) for key in keys]
+
+
+def new_point_loader(
+    model: type[ModelT],
+    session_makers: ReaderSessionMakers,
+    config: PostgresConfig,
+) -> PointLoader[ModelT] | None:
+    if not config.POSTGRES_POINT_LOOKUP_BATCHING:
+        return None
+
+    return PointLoader(
+        model=model,
+        session_makers=session_makers,
+        max_batch_size=config.POSTGRES_POINT_LOOKUP_MAX_BATCH_SIZE,
+        statement_timeout=config.POSTGRES_POINT_LOOKUP_STATEMENT_TIMEOUT,
+    )
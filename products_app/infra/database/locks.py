@@ -0,0 +1,22 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+@asynccontextmanager
+async def advisory_lock(engine: AsyncEngine, key: str) -> AsyncIterator[bool]:
+    """
+    Пытается взять advisory-блокировку по ключу `key` и держит её до выхода из блока.
+
+    Возвращает False, если блокировку уже держит другое соединение. Блокировка берётся
+    в транзакции отдельного соединения и снимается вместе с ней, в том числе когда процесс
+    падает и соединение обрывается, поэтому она работает и за PgBouncer в режиме transaction.
+    Транзакция не пишет данных, поэтому не мешает VACUUM и ленте изменений
+    """
+    async with engine.connect() as connection, connection.begin():
+        locked = await connection.scalar(
+            select(func.pg_try_advisory_xact_lock(func.hashtextextended(key, 0))),
+        )
+        yield locked
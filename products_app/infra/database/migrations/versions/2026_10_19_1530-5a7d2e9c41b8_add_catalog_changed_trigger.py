@@ -0,0 +1,43 @@
+"""Add catalog changed trigger
+
+Revision ID: 5a7d2e9c41b8
+Revises: 8e14f0a6c2b7
+Create Date: 2026-10-19 15:30:12.418305
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a7d2e9c41b8'
+down_revision: Union[str, None] = '8e14f0a6c2b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION notify_catalog_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('catalog_changed', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    )
+    op.execute(
+        """
+        CREATE TRIGGER product_catalog_changed
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON product
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed()
+        """,
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER product_catalog_changed ON product')
+    op.execute('DROP FUNCTION notify_catalog_changed()')
@@ -0,0 +1,191 @@
+"""Add product rendered json
+
+Revision ID: c41f7a2d9e63
+Revises: 5a7d2e9c41b8
+Create Date: 2026-10-19 18:10:47.215093
+
+"""
+
+from typing import Sequence, Union
+from uuid import UUID
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41f7a2d9e63'
+down_revision: Union[str, None] = '5a7d2e9c41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Товары заполняются пачками по id в отдельных транзакциях, чтобы не держать блокировку
+# на всю таблицу, каждая пачка начинается с id, на котором закончилась предыдущая
+BACKFILL_BATCH_SIZE = 5000
+
+
+def upgrade() -> None:
+    op.add_column('product', sa.Column('rendered_json', sa.Text(), nullable=True))
+    # JSON совпадает с ProductRead.model_dump_json() байт в байт, числа и attributes
+    # записываются так же, как их записывает pydantic
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION pydantic_json_number(value text) RETURNS text AS $$
+        DECLARE
+            shortest text;
+            sign text := '';
+            mantissa text;
+            digits text;
+            exponent int := 0;
+            point int;
+        BEGIN
+            -- Число без точки Python читает как int и выводит как есть
+            IF strpos(value, '.') = 0 THEN
+                RETURN value;
+            END IF;
+
+            -- Число с точкой Python читает как float и выводит кратчайшей записью,
+            -- которая читается обратно в то же число, - как float8 при extra_float_digits = 1
+            BEGIN
+                shortest := value::float8::text;
+            EXCEPTION WHEN numeric_value_out_of_range THEN
+                -- Слишком большое число становится inf, его pydantic выводит как null,
+                -- слишком маленькое - нулём со знаком
+                IF abs(value::numeric) > 1 THEN
+                    RETURN 'null';
+                END IF;
+                shortest := CASE WHEN left(value, 1) = '-' THEN '-0' ELSE '0' END;
+            END;
+
+            IF left(shortest, 1) = '-' THEN
+                sign := '-';
+                shortest := substr(shortest, 2);
+            END IF;
+            IF strpos(shortest, 'e') > 0 THEN
+                exponent := split_part(shortest, 'e', 2)::int;
+                shortest := split_part(shortest, 'e', 1);
+            END IF;
+
+            -- Значащие цифры и число цифр до точки
+            mantissa := replace(shortest, '.', '');
+            digits := ltrim(mantissa, '0');
+            point := strpos(shortest || '.', '.') - 1 + exponent - (length(mantissa) - length(digits));
+            digits := rtrim(digits, '0');
+            IF digits = '' THEN
+                RETURN sign || '0.0';
+            END IF;
+
+            -- Как repr(float): экспоненциальная запись для порядков меньше -5 и от 16
+            IF point - 1 < -5 OR point - 1 >= 16 THEN
+                RETURN sign || left(digits, 1)
+                    || CASE WHEN length(digits) > 1 THEN '.' || substr(digits, 2) ELSE '' END
+                    || 'e' || CASE WHEN point - 1 < 0 THEN '-' ELSE '+' END || abs(point - 1);
+            END IF;
+            IF point <= 0 THEN
+                RETURN sign || '0.' || repeat('0', -point) || digits;
+            END IF;
+            IF length(digits) <= point THEN
+                RETURN sign || digits || repeat('0', point - length(digits)) || '.0';
+            END IF;
+            RETURN sign || left(digits, point) || '.' || substr(digits, point + 1);
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE SET extra_float_digits = 1
+        """,
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION pydantic_json(value jsonb) RETURNS text AS $$
+        BEGIN
+            RETURN CASE jsonb_typeof(value)
+                WHEN 'object' THEN '{' || coalesce((
+                    SELECT string_agg(to_json(item.key)::text || ':' || pydantic_json(item.value), ',' ORDER BY item.position)
+                    FROM jsonb_each(value) WITH ORDINALITY AS item(key, value, position)
+                ), '') || '}'
+                WHEN 'array' THEN '[' || coalesce((
+                    SELECT string_agg(pydantic_json(item.value), ',' ORDER BY item.position)
+                    FROM jsonb_array_elements(value) WITH ORDINALITY AS item(value, position)
+                ), '') || ']'
+                WHEN 'number' THEN pydantic_json_number(value::text)
+                ELSE value::text
+            END;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+        """,
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION product_rendered_json(p product) RETURNS text AS $$
+            -- Поля в порядке ProductRead и без пробелов, строки to_json экранирует как pydantic
+            SELECT '{"name":' || to_json(p.name)::text
+                || ',"description":' || to_json(p.description)::text
+                || ',"price":' || pydantic_json_number(p.price::text)
+                || ',"stock":' || pydantic_json_number(p.stock::text)
+                || ',"unit":' || to_json(p.unit)::text
+                || ',"unit_size":' || pydantic_json_number(p.unit_size::text)
+                || ',"category_id":' || coalesce(to_json(p.category_id)::text, 'null')
+                || ',"attributes":' || pydantic_json(p.attributes)
+                || ',"id":' || to_json(p.id)::text
+                -- Как datetime.isoformat(): без долей секунды, если они нулевые
+                || ',"created_at":"' || to_char(
+                    p.created_at,
+                    CASE
+                        WHEN date_trunc('second', p.created_at) = p.created_at
+                        THEN 'YYYY-MM-DD"T"HH24:MI:SS'
+                        ELSE 'YYYY-MM-DD"T"HH24:MI:SS.US'
+                    END
+                ) || '"}'
+        $$ LANGUAGE sql STABLE
+        """,
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION render_product_json() RETURNS trigger AS $$
+        BEGIN
+            NEW.rendered_json := product_rendered_json(NEW);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    )
+    # После создания триггера новые и изменённые товары заполняются сами
+    op.execute(
+        """
+        CREATE TRIGGER product_render_json
+        BEFORE INSERT OR UPDATE ON product
+        FOR EACH ROW EXECUTE FUNCTION render_product_json()
+        """,
+    )
+
+    backfill = sa.text(
+        """
+        UPDATE product SET rendered_json = product_rendered_json(product)
+        WHERE id IN (
+            SELECT id FROM product WHERE id > :last_id
+            ORDER BY id
+            LIMIT :batch_size
+        )
+        RETURNING id
+        """,
+    ).bindparams(sa.bindparam('last_id', type_=sa.Uuid))
+    with op.get_context().autocommit_block():
+        connection = op.get_bind()
+        last_id = UUID(int=0)
+        while True:
+            updated_ids = connection.execute(
+                backfill,
+                {'last_id': last_id, 'batch_size': BACKFILL_BATCH_SIZE},
+            ).scalars()
+            last_id = max(updated_ids, default=None)
+            if last_id is None:
+                break
+
+    op.alter_column('product', 'rendered_json', nullable=False)
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER product_render_json ON product')
+    op.execute('DROP FUNCTION render_product_json()')
+    op.drop_column('product', 'rendered_json')
+    op.execute('DROP FUNCTION product_rendered_json(product)')
+    op.execute('DROP FUNCTION pydantic_json(jsonb)')
+    op.execute('DROP FUNCTION pydantic_json_number(text)')
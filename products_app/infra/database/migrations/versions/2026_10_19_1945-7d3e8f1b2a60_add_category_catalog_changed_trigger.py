@@ -0,0 +1,32 @@
+"""Add category catalog changed trigger
+
+Revision ID: 7d3e8f1b2a60
+Revises: c41f7a2d9e63
+Create Date: 2026-10-19 19:45:03.671942
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3e8f1b2a60'
+down_revision: Union[str, None] = 'c41f7a2d9e63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TRIGGER category_catalog_changed
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON category
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed()
+        """,
+    )
+
+
+def downgrade() -> None:
+    op.execute('DROP TRIGGER category_catalog_changed ON category')
@@ -0,0 +1,125 @@
+"""Add catalog change feed
+
+Revision ID: e82b6c0d4f19
+Revises: 7d3e8f1b2a60
+Create Date: 2026-10-19 21:20:36.904512
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e82b6c0d4f19'
+down_revision: Union[str, None] = '7d3e8f1b2a60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TRACKED_TABLES = ('category', 'product')
+
+
+def upgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.add_column(
+            table,
+            sa.Column(
+                'updated_at',
+                sa.DateTime(),
+                server_default=sa.text("timezone('utc', now())"),
+                nullable=False,
+            ),
+        )
+
+    op.create_table(
+        'catalog_change',
+        sa.Column('id', sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column(
+            'created_at',
+            sa.DateTime(),
+            server_default=sa.text("timezone('utc', now())"),
+            nullable=False,
+        ),
+        sa.Column(
+            'txid',
+            sa.BigInteger(),
+            server_default=sa.text('pg_current_xact_id()::text::bigint'),
+            nullable=False,
+        ),
+        sa.Column('entity', sa.String(), nullable=False),
+        sa.Column('entity_id', sa.Uuid(), nullable=False),
+        sa.Column('deleted', sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_catalog_change_txid_id',
+        'catalog_change',
+        ['txid', 'id'],
+        unique=False,
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := timezone('utc', now());
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    )
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION record_catalog_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO catalog_change (entity, entity_id, deleted)
+                VALUES (TG_TABLE_NAME, OLD.id, true);
+            ELSE
+                INSERT INTO catalog_change (entity, entity_id, deleted)
+                VALUES (TG_TABLE_NAME, NEW.id, false);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    )
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_set_updated_at
+            BEFORE UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+            """,
+        )
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_record_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION record_catalog_change()
+            """,
+        )
+
+    # Существующие записи попадают в начало ленты, чтобы потребитель мог начать с полной выгрузки
+    for table in TRACKED_TABLES:
+        op.execute(
+            f"""
+            INSERT INTO catalog_change (entity, entity_id, deleted)
+            SELECT '{table}', id, false FROM {table} ORDER BY id
+            """,
+        )
+
+
+def downgrade() -> None:
+    for table in TRACKED_TABLES:
+        op.execute(f'DROP TRIGGER {table}_record_change ON {table}')
+        op.execute(f'DROP TRIGGER {table}_set_updated_at ON {table}')
+    op.execute('DROP FUNCTION record_catalog_change()')
+    op.execute('DROP FUNCTION set_updated_at()')
+
+    op.drop_index('ix_catalog_change_txid_id', table_name='catalog_change')
+    op.drop_table('catalog_change')
+    for table in TRACKED_TABLES:
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,50 @@
+"""Add catalog change prune
+
+Revision ID: d045722f5dbc
+Revises: e82b6c0d4f19
+Create Date: 2026-10-19 23:05:12.640318
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd045722f5dbc'
+down_revision: Union[str, None] = 'e82b6c0d4f19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'catalog_change_prune',
+        sa.Column('txid', sa.BigInteger(), nullable=False),
+        sa.Column('change_id', sa.BigInteger(), nullable=False),
+        sa.Column('deleted_changes', sa.BigInteger(), nullable=False),
+        sa.Column(
+            'id',
+            sa.Uuid(),
+            server_default=sa.text('gen_random_uuid()'),
+            nullable=False,
+        ),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index(
+        'ix_catalog_change_prune_txid_change_id',
+        'catalog_change_prune',
+        ['txid', 'change_id'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        'ix_catalog_change_prune_txid_change_id',
+        table_name='catalog_change_prune',
+    )
+    op.drop_table('catalog_change_prune')
@@ -1,8 +1,18 @@
+from products_app.infra.database.models.catalog_change import (
+    CatalogChangeModel,
+    CatalogChangePruneModel,
+)
 from products_app.infra.database.models.category import CategoryModel
+from products_app.infra.database.models.category_deletion_job import (
+    CategoryDeletionJobModel,
+)
 from products_app.infra.database.models.product import ProductModel
 
 
 __all__ = [
     ProductModel,
     CategoryModel,
+    CategoryDeletionJobModel,
+    CatalogChangeModel,
+    CatalogChangePruneModel,
 ]
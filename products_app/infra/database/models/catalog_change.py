@@ -0,0 +1,110 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy import DDL, BigInteger, Identity, Index, event, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from products_app.infra.database.models.base import BaseModel
+
+
+class CatalogChangeModel(BaseModel):
+    """
+    Лента изменений товаров и категорий, её заполняют триггеры в той же транзакции, что и запись.
+
+    Порядок ленты - (txid, id): изменения транзакции идут подряд, транзакции - по их ID
+    """
+
+    __tablename__ = 'catalog_change'
+    __table_args__ = (Index('ix_catalog_change_txid_id', 'txid', 'id'),)
+
+    id: Mapped[int] = mapped_column(BigInteger, Identity(), primary_key=True)
+    created_at: Mapped[datetime] = mapped_column(
+        server_default=text("timezone('utc', now())"),
+    )
+    # ID транзакции, в которой сделано изменение
+    txid: Mapped[int] = mapped_column(
+        BigInteger,
+        server_default=text('pg_current_xact_id()::text::bigint'),
+    )
+    entity: Mapped[str] = mapped_column()
+    entity_id: Mapped[UUID] = mapped_column()
+    deleted: Mapped[bool] = mapped_column()
+
+
+class CatalogChangePruneModel(BaseModel):
+    """
+    Очистки ленты изменений, см. PruneCatalogChangesInteractor.
+
+    Курсор меньше позиции последнего удалённого изменения указывает на удалённую часть ленты
+    """
+
+    __tablename__ = 'catalog_change_prune'
+    __table_args__ = (
+        Index('ix_catalog_change_prune_txid_change_id', 'txid', 'change_id'),
+    )
+
+    # Позиция последнего удалённого изменения
+    txid: Mapped[int] = mapped_column(BigInteger)
+    change_id: Mapped[int] = mapped_column(BigInteger)
+    deleted_changes: Mapped[int] = mapped_column(BigInteger)
+
+
+# Для баз из миграций функции и триггеры создаёт миграция, здесь - для create_all в тестах.
+# Триггеры ставятся на product и category, поэтому создаются после всех таблиц
+event.listen(
+    BaseModel.metadata,
+    'after_create',
+    DDL(
+        """
+        CREATE OR REPLACE FUNCTION set_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := timezone('utc', now());
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    ),
+)
+event.listen(
+    BaseModel.metadata,
+    'after_create',
+    DDL(
+        """
+        CREATE OR REPLACE FUNCTION record_catalog_change() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                INSERT INTO catalog_change (entity, entity_id, deleted)
+                VALUES (TG_TABLE_NAME, OLD.id, true);
+            ELSE
+                INSERT INTO catalog_change (entity, entity_id, deleted)
+                VALUES (TG_TABLE_NAME, NEW.id, false);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    ),
+)
+for table in ('product', 'category'):
+    event.listen(
+        BaseModel.metadata,
+        'after_create',
+        DDL(
+            f"""
+            CREATE OR REPLACE TRIGGER {table}_set_updated_at
+            BEFORE UPDATE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION set_updated_at()
+            """,
+        ),
+    )
+    event.listen(
+        BaseModel.metadata,
+        'after_create',
+        DDL(
+            f"""
+            CREATE OR REPLACE TRIGGER {table}_record_change
+            AFTER INSERT OR UPDATE OR DELETE ON {table}
+            FOR EACH ROW EXECUTE FUNCTION record_catalog_change()
+            """,
+        ),
+    )
@@ -1,7 +1,8 @@
+from datetime import datetime
 from typing import Optional
 from uuid import UUID
 
-from sqlalchemy import ForeignKey
+from sqlalchemy import FetchedValue, ForeignKey, Index, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from products_app.infra.database.models.base import BaseModel
@@ -9,11 +10,13 @@ from products_app.infra.database.models.base import BaseModel
 
 class CategoryModel(BaseModel):
     __tablename__ = 'category'
+    __table_args__ = (Index('ix_category_name_id', 'name', 'id'),)
 
     name: Mapped[str] = mapped_column()
 
     parent_category_id: Mapped[UUID | None] = mapped_column(
         ForeignKey('category.id', ondelete='SET NULL'),
+        index=True,
     )
 
     parent_category: Mapped[Optional['CategoryModel']] = relationship(
@@ -23,3 +26,9 @@ class CategoryModel(BaseModel):
     sub_categories: Mapped[list['CategoryModel']] = relationship(
         back_populates='parent_category',
     )
+
+    # Время последней записи (UTC), при обновлении выставляется триггером
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=text("timezone('utc', now())"),
+        server_onupdate=FetchedValue(),
+    )
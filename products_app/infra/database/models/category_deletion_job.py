@@ -0,0 +1,19 @@
+from datetime import datetime
+from uuid import UUID
+
+from sqlalchemy.orm import Mapped, mapped_column
+
+from products_app.infra.database.models.base import BaseModel
+
+
+class CategoryDeletionJobModel(BaseModel):
+    __tablename__ = 'category_deletion_job'
+
+    # Без внешнего ключа, так как категория удаляется в конце задачи
+    category_id: Mapped[UUID] = mapped_column()
+    batch_size: Mapped[int] = mapped_column()
+    status: Mapped[str] = mapped_column()
+    detached_products: Mapped[int] = mapped_column(default=0)
+    detached_sub_categories: Mapped[int] = mapped_column(default=0)
+    finished_at: Mapped[datetime | None] = mapped_column()
+    error: Mapped[str | None] = mapped_column()
@@ -1,7 +1,8 @@
+from datetime import datetime
 from typing import Optional, TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import ForeignKey, Numeric
+from sqlalchemy import DDL, FetchedValue, ForeignKey, Numeric, Text, event, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -25,6 +26,220 @@ class ProductModel(BaseModel):
 
     category_id: Mapped[UUID | None] = mapped_column(
         ForeignKey('category.id', ondelete='SET NULL'),
+        index=True,
     )
 
     category: Mapped[Optional['CategoryModel']] = relationship()
+
+    # Время последней записи (UTC), при обновлении выставляется триггером
+    updated_at: Mapped[datetime] = mapped_column(
+        server_default=text("timezone('utc', now())"),
+        server_onupdate=FetchedValue(),
+    )
+
+    # Товар в формате ответа API, заполняется триггером при каждой записи.
+    # Не загружается вместе с товаром, читается отдельно
+    rendered_json: Mapped[str] = mapped_column(
+        Text,
+        server_default=FetchedValue(),
+        server_onupdate=FetchedValue(),
+        deferred=True,
+    )
+
+
+# Уведомляет воркеры об изменении каталога, см. CatalogChangeListener.
+# Для баз из миграций триггер создаёт миграция, здесь - для create_all в тестах
+event.listen(
+    ProductModel.__table__,
+    'after_create',
+    DDL(
+        """
+        CREATE OR REPLACE FUNCTION notify_catalog_changed() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('catalog_changed', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    ),
+)
+event.listen(
+    ProductModel.__table__,
+    'after_create',
+    DDL(
+        """
+        CREATE TRIGGER product_catalog_changed
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON product
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed()
+        """,
+    ),
+)
+# Категории тоже входят в кешируемые ответы (дерево категорий).
+# Таблица category к этому моменту уже создана, товары ссылаются на неё
+event.listen(
+    ProductModel.__table__,
+    'after_create',
+    DDL(
+        """
+        CREATE TRIGGER category_catalog_changed
+        AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON category
+        FOR EACH STATEMENT EXECUTE FUNCTION notify_catalog_changed()
+        """,
+    ),
+)
+
+# Готовый JSON товара, см. rendered_json. Для баз из миграций функции и триггер создаёт миграция
+# Он совпадает с ProductRead.model_dump_json() байт в байт, числа и attributes
+# записываются так же, как их записывает pydantic
+event.listen(
+    ProductModel.__table__,
+    'after_create',
+    DDL(
+        """
+        CREATE OR REPLACE FUNCTION pydantic_json_number(value text) RETURNS text AS $$
+        DECLARE
+            shortest text;
+            sign text := '';
+            mantissa text;
+            digits text;
+            exponent int := 0;
+            point int;
+        BEGIN
+            -- Число без точки Python читает как int и выводит как есть
+            IF strpos(value, '.') = 0 THEN
+                RETURN value;
+            END IF;
+
+            -- Число с точкой Python читает как float и выводит кратчайшей записью,
+            -- которая читается обратно в то же число, - как float8 при extra_float_digits = 1
+            BEGIN
+                shortest := value::float8::text;
+            EXCEPTION WHEN numeric_value_out_of_range THEN
+                -- Слишком большое число становится inf, его pydantic выводит как null,
+                -- слишком маленькое - нулём со знаком
+                IF abs(value::numeric) > 1 THEN
+                    RETURN 'null';
+                END IF;
+                shortest := CASE WHEN left(value, 1) = '-' THEN '-0' ELSE '0' END;
+            END;
+
+            IF left(shortest, 1) = '-' THEN
+                sign := '-';
+                shortest := substr(shortest, 2);
+            END IF;
+            IF strpos(shortest, 'e') > 0 THEN
+                exponent := split_part(shortest, 'e', 2)::int;
+                shortest := split_part(shortest, 'e', 1);
+            END IF;
+
+            -- Значащие цифры и число цифр до точки
+            mantissa := replace(shortest, '.', '');
+            digits := ltrim(mantissa, '0');
+            point := strpos(shortest || '.', '.') - 1 + exponent - (length(mantissa) - length(digits));
+            digits := rtrim(digits, '0');
+            IF digits = '' THEN
+                RETURN sign || '0.0';
+            END IF;
+
+            -- Как repr(float): экспоненциальная запись для порядков меньше -5 и от 16
+            IF point - 1 < -5 OR point - 1 >= 16 THEN
+                RETURN sign || left(digits, 1)
+                    || CASE WHEN length(digits) > 1 THEN '.' || substr(digits, 2) ELSE '' END
+                    || 'e' || CASE WHEN point - 1 < 0 THEN '-' ELSE '+' END || abs(point - 1);
+            END IF;
+            IF point <= 0 THEN
+                RETURN sign || '0.' || repeat('0', -point) || digits;
+            END IF;
+            IF length(digits) <= point THEN
+                RETURN sign || digits || repeat('0', point - length(digits)) || '.0';
+            END IF;
+            RETURN sign || left(digits, point) || '.' || substr(digits, point + 1);
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE SET extra_float_digits = 1
+        """,
+    ),
+)
+event.listen(
+    ProductModel.__table__,
+    'after_create',
+    DDL(
+        """
+        CREATE OR REPLACE FUNCTION pydantic_json(value jsonb) RETURNS text AS $$
+        BEGIN
+            RETURN CASE jsonb_typeof(value)
+                WHEN 'object' THEN '{' || coalesce((
+                    SELECT string_agg(to_json(item.key)::text || ':' || pydantic_json(item.value), ',' ORDER BY item.position)
+                    FROM jsonb_each(value) WITH ORDINALITY AS item(key, value, position)
+                ), '') || '}'
+                WHEN 'array' THEN '[' || coalesce((
+                    SELECT string_agg(pydantic_json(item.value), ',' ORDER BY item.position)
+                    FROM jsonb_array_elements(value) WITH ORDINALITY AS item(value, position)
+                ), '') || ']'
+                WHEN 'number' THEN pydantic_json_number(value::text)
+                ELSE value::text
+            END;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+        """,
+    ),
+)
+event.listen(
+    ProductModel.__table__,
+    'after_create',
+    DDL(
+        """
+        CREATE OR REPLACE FUNCTION product_rendered_json(p product) RETURNS text AS $$
+            -- Поля в порядке ProductRead и без пробелов, строки to_json экранирует как pydantic
+            SELECT '{"name":' || to_json(p.name)::text
+                || ',"description":' || to_json(p.description)::text
+                || ',"price":' || pydantic_json_number(p.price::text)
+                || ',"stock":' || pydantic_json_number(p.stock::text)
+                || ',"unit":' || to_json(p.unit)::text
+                || ',"unit_size":' || pydantic_json_number(p.unit_size::text)
+                || ',"category_id":' || coalesce(to_json(p.category_id)::text, 'null')
+                || ',"attributes":' || pydantic_json(p.attributes)
+                || ',"id":' || to_json(p.id)::text
+                -- Как datetime.isoformat(): без долей секунды, если они нулевые
+                || ',"created_at":"' || to_char(
+                    p.created_at,
+                    CASE
+                        WHEN date_trunc('second', p.created_at) = p.created_at
+                        THEN 'YYYY-MM-DD"T"HH24:MI:SS'
+                        ELSE 'YYYY-MM-DD"T"HH24:MI:SS.US'
+                    END
+                ) || '"}'
+        $$ LANGUAGE sql STABLE
+        """,
+    ),
+)
+event.listen(
+    ProductModel.__table__,
+    'after_create',
+    DDL(
+        """
+        CREATE OR REPLACE FUNCTION render_product_json() RETURNS trigger AS $$
+        BEGIN
+            NEW.rendered_json := product_rendered_json(NEW);
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+    ),
+)
+event.listen(
+    ProductModel.__table__,
+    'after_create',
+    DDL(
+        """
+        CREATE TRIGGER product_render_json
+        BEFORE INSERT OR UPDATE ON product
+        FOR EACH ROW EXECUTE FUNCTION render_product_json()
+        """,
+    ),
+)
+# Функция принимает строку товара, и без её удаления таблицу не удалить
+event.listen(
+    ProductModel.__table__,
+    'before_drop',
+    DDL('DROP FUNCTION IF EXISTS product_rendered_json(product)'),
+)
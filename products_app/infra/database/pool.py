@@ -0,0 +1,138 @@
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from products_app.application.dto.monitoring import HistogramDTO, PoolStatsDTO
+from products_app.application.interfaces.monitoring import PoolStatsReader
+from products_app.infra.metrics import (
+    POOL_CHECKED_OUT,
+    POOL_CHECKOUT_WAIT,
+    POOL_CONNECT_LATENCY,
+    POOL_OVERFLOW,
+    POOL_SIZE,
+    POOL_WAITING,
+)
+
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dto(self) -> HistogramDTO:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip((*self.buckets, '+Inf'), self.counts, strict=True):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+
+        return HistogramDTO(buckets=buckets, count=self.count, sum=self.sum)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.name = 'primary'
+        self.waiting = 0
+        self.checkout_wait = Histogram()
+        self.connect_latency = Histogram()
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Пул, который считает ожидающих соединение и время ожидания"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        self.metrics.waiting += 1
+        POOL_WAITING.labels(self.metrics.name).inc()
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            wait = time.perf_counter() - started
+            self.metrics.waiting -= 1
+            self.metrics.checkout_wait.observe(wait)
+            POOL_WAITING.labels(self.metrics.name).dec()
+            POOL_CHECKOUT_WAIT.labels(self.metrics.name).observe(wait)
+
+    def recreate(self) -> 'InstrumentedAsyncAdaptedQueuePool':
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def _export_pool_gauges(pool: InstrumentedAsyncAdaptedQueuePool) -> None:
+    name = pool.metrics.name
+    POOL_SIZE.labels(name).set(pool.size())
+    POOL_CHECKED_OUT.labels(name).set(pool.checkedout())
+    POOL_OVERFLOW.labels(name).set(max(pool.overflow(), 0))
+
+
+def instrument_engine(engine: AsyncEngine, name: str) -> None:
+    """Замеряет время установки новых соединений и выгружает состояние пула в Prometheus"""
+    engine.sync_engine.pool.metrics.name = name
+    _export_pool_gauges(engine.sync_engine.pool)
+
+    @event.listens_for(engine.sync_engine.pool, 'checkout')
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        _export_pool_gauges(engine.sync_engine.pool)
+
+    @event.listens_for(engine.sync_engine.pool, 'checkin')
+    def _on_checkin(dbapi_connection, connection_record):
+        _export_pool_gauges(engine.sync_engine.pool)
+
+    @event.listens_for(engine.sync_engine, 'do_connect')
+    def _on_connect_start(dialect, connection_record, cargs, cparams):
+        connection_record.info['connect_started'] = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine.pool, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        started = connection_record.info.pop('connect_started', None)
+        if started is not None:
+            latency = time.perf_counter() - started
+            engine.sync_engine.pool.metrics.connect_latency.observe(latency)
+            POOL_CONNECT_LATENCY.labels(name).observe(latency)
+
+
+class EnginePoolStatsReader(PoolStatsReader):
+    def __init__(self, engines: dict[str, AsyncEngine]):
+        self._engines = engines
+
+    @staticmethod
+    def _pool_stats(
+        name: str,
+        pool: InstrumentedAsyncAdaptedQueuePool,
+    ) -> PoolStatsDTO:
+        metrics = pool.metrics
+
+        return PoolStatsDTO(
+            name=name,
+            size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            waiting=metrics.waiting,
+            checkout_wait=metrics.checkout_wait.to_dto(),
+            connect_latency=metrics.connect_latency.to_dto(),
+        )
+
+    def get_pool_stats(self) -> list[PoolStatsDTO]:
+        return [
+            self._pool_stats(name=name, pool=engine.sync_engine.pool)
+            for name, engine in self._engines.items()
+        ]
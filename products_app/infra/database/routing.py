@@ -0,0 +1,180 @@
+import itertools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from http.cookies import SimpleCookie
+from typing import Iterator, Literal
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from products_app.infra.database.database import new_reader_session_maker
+
+
+@dataclass(slots=True)
+class DatabaseRoutingState:
+    use_primary: bool = True
+    # Роут помечен зависимостью `read_only_route`
+    read_only: bool = False
+    has_written: bool = False
+    # Клиент недавно писал и закреплён за мастером cookie
+    pinned: bool = False
+
+
+_routing_state: ContextVar[DatabaseRoutingState | None] = ContextVar(
+    'database_routing_state',
+    default=None,
+)
+
+
+@contextmanager
+def routing_scope(
+    use_primary: bool,
+    read_only: bool,
+    pinned: bool = False,
+) -> Iterator[DatabaseRoutingState]:
+    state = DatabaseRoutingState(
+        use_primary=use_primary,
+        read_only=read_only,
+        pinned=pinned,
+    )
+    token = _routing_state.set(state)
+    try:
+        yield state
+    finally:
+        _routing_state.reset(token)
+
+
+def is_pinned_to_primary() -> bool:
+    state = _routing_state.get()
+    return state is not None and state.pinned
+
+
+async def read_only_route() -> None:
+    """
+    FastAPI-зависимость, помечающая роут как только читающий.
+
+    Reader-гейтвеи таких роутов читают в отдельной autocommit-сессии,
+    с реплики, если клиент не закреплён за мастером
+    """
+    state = _routing_state.get()
+    if state is not None:
+        state.read_only = True
+        state.use_primary = state.pinned
+
+
+def mark_written() -> None:
+    """Отмечает, что текущий запрос записал данные и клиента нужно закрепить за мастером"""
+    state = _routing_state.get()
+    if state is not None:
+        state.has_written = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _mark_written(session: Session) -> None:
+    mark_written()
+
+
+class ReaderSessionMakers:
+    def __init__(self, primary_engine: AsyncEngine, replica_engines: list[AsyncEngine]):
+        self.replica_engines = replica_engines
+        self._primary_session_maker = new_reader_session_maker(engine=primary_engine)
+        self._replica_session_makers = itertools.cycle(
+            [new_reader_session_maker(engine=engine) for engine in replica_engines],
+        )
+        self._has_replicas = bool(replica_engines)
+
+    def read_target(self) -> Literal['primary', 'replica'] | None:
+        """
+        Откуда читать в текущем запросе или None,
+        если читать нужно в общей сессии запроса
+        """
+        state = _routing_state.get()
+        if state is None or not state.read_only:
+            return None
+
+        if state.use_primary or not self._has_replicas:
+            return 'primary'
+
+        return 'replica'
+
+    def session_maker(
+        self,
+        target: Literal['primary', 'replica'],
+    ) -> async_sessionmaker[AsyncSession]:
+        if target == 'primary':
+            return self._primary_session_maker
+
+        return next(self._replica_session_makers)
+
+    def choose(self) -> async_sessionmaker[AsyncSession] | None:
+        """
+        Возвращает фабрику сессий только для чтения или None,
+        если читать нужно в общей сессии запроса
+        """
+        target = self.read_target()
+        if target is None:
+            return None
+
+        return self.session_maker(target)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Закрепляет клиента за мастером на `window` секунд после записи,
+    чтобы он сразу видел свои изменения, даже если реплика отстаёт.
+
+    Запросы читают с мастера в общей сессии запроса, пока роут
+    не помечен зависимостью `read_only_route`.
+    """
+
+    cookie_name = 'db_primary_until'
+
+    def __init__(self, app: ASGIApp, window: float):
+        self.app = app
+        self.window = window
+
+    def _is_pinned(self, scope: Scope) -> bool:
+        pinned_until = Request(scope).cookies.get(self.cookie_name)
+        try:
+            return pinned_until is not None and float(pinned_until) > time.time()
+        except ValueError:
+            return False
+
+    def _pin_cookie(self) -> str:
+        cookie = SimpleCookie()
+        cookie[self.cookie_name] = str(time.time() + self.window)
+        cookie[self.cookie_name]['max-age'] = int(self.window) + 1
+        cookie[self.cookie_name]['path'] = '/'
+        cookie[self.cookie_name]['httponly'] = True
+        cookie[self.cookie_name]['samesite'] = 'lax'
+        return cookie.output(header='').strip()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        with routing_scope(
+            use_primary=True,
+            read_only=False,
+            pinned=self._is_pinned(scope),
+        ) as state:
+
+            async def send_wrapper(message: Message) -> None:
+                if (
+                    message['type'] == 'http.response.start'
+                    and state.has_written
+                    and self.window > 0
+                ):
+                    MutableHeaders(scope=message).append(
+                        'set-cookie',
+                        self._pin_cookie(),
+                    )
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
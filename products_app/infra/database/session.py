@@ -0,0 +1,95 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Callable, NewType
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SessionScope:
+    """Сессии, открытые в рамках одного запроса"""
+
+    __slots__ = ('sessions',)
+
+    def __init__(self):
+        self.sessions: dict[SessionHandle, AsyncSession] = {}
+
+    async def close(self) -> None:
+        # Сессия для чтения может совпадать с основной, закрываем каждую один раз
+        for session in {
+            id(session): session for session in self.sessions.values()
+        }.values():
+            await session.close()
+
+
+_session_scope: ContextVar[SessionScope | None] = ContextVar(
+    'database_session_scope',
+    default=None,
+)
+
+
+@asynccontextmanager
+async def session_scope() -> AsyncIterator[SessionScope]:
+    scope = SessionScope()
+    token = _session_scope.set(scope)
+    try:
+        yield scope
+    finally:
+        _session_scope.reset(token)
+        await scope.close()
+
+
+class SessionHandle:
+    """
+    Лёгкая ссылка на сессию текущего запроса, которую можно держать в APP scope.
+
+    Ведёт себя как `AsyncSession`: сессия создаётся при первом обращении
+    и закрывается вместе с `session_scope`.
+    """
+
+    __slots__ = ('_session_factory',)
+
+    def __init__(self, session_factory: Callable[[], AsyncSession]):
+        self._session_factory = session_factory
+
+    @property
+    def session(self) -> AsyncSession:
+        scope = _session_scope.get()
+        if scope is None:
+            raise RuntimeError('Database session is used outside of session_scope()')
+
+        session = scope.sessions.get(self)
+        if session is None:
+            session = scope.sessions[self] = self._session_factory()
+
+        return session
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.session, name)
+
+    async def commit(self) -> None:
+        await self.session.commit()
+
+    async def flush(self) -> None:
+        await self.session.flush()
+
+    async def rollback(self) -> None:
+        await self.session.rollback()
+
+
+# Ссылка на сессию для Reader-гейтвеев, см. ReaderSessionMakers
+ReaderSessionHandle = NewType('ReaderSessionHandle', SessionHandle)
+
+
+class SessionScopeMiddleware:
+    """Открывает `session_scope` на каждый HTTP запрос"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        async with session_scope():
+            await self.app(scope, receive, send)
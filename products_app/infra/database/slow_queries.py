@@ -0,0 +1,255 @@
+import asyncio
+import contextvars
+import datetime as dt
+import json
+import logging
+import random
+import re
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Iterator
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from products_app.application.dto.monitoring import SlowQueryDTO
+from products_app.application.interfaces.monitoring import SlowQueryReader
+from products_app.infra.metrics import current_database_operation
+
+
+logger = logging.getLogger(__name__)
+
+EXPLAIN = 'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) '
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_PARAMETER_RE = re.compile(r'\$\d+')
+_PARAMETER_LIST_RE = re.compile(r'\?(?:, \?)+')
+_ROW_LIST_RE = re.compile(r'(\([?, .]+\))(?:, \([?, .]+\))+')
+_LOCKING_RE = re.compile(r'\bFOR (?:NO KEY |KEY )?(?:UPDATE|SHARE)\b', re.IGNORECASE)
+
+_query_shape: ContextVar[tuple[str, ...]] = ContextVar('query_shape', default=())
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Приводит запрос к виду, общему для всех его вызовов:
+    параметры заменяются на `?`, списки параметров в IN и VALUES сворачиваются
+    """
+    statement = _WHITESPACE_RE.sub(' ', statement).strip()
+    statement = _PARAMETER_RE.sub('?', statement)
+    statement = _PARAMETER_LIST_RE.sub('?, ...', statement)
+    return _ROW_LIST_RE.sub(r'\1, ...', statement)
+
+
+@contextmanager
+def query_shape(*keys: str) -> Iterator[None]:
+    """
+    Задаёт форму запроса для журнала медленных запросов, например набор фильтров поиска.
+
+    Запросы с одинаковым SQL, но разной формой, учитываются в журнале отдельно
+    """
+    token = _query_shape.set(tuple(sorted(keys)))
+    try:
+        yield
+    finally:
+        _query_shape.reset(token)
+
+
+@dataclass(slots=True)
+class SlowQueryStats:
+    database: str
+    statement: str
+    shape: tuple[str, ...]
+    operation: str
+    last_seen: dt.datetime
+    calls: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    plan: Any | None = None
+    plan_pending: bool = False
+
+    def to_dto(self) -> SlowQueryDTO:
+        return SlowQueryDTO(
+            database=self.database,
+            statement=self.statement,
+            shape=list(self.shape),
+            operation=self.operation,
+            calls=self.calls,
+            total_time=self.total_time,
+            mean_time=self.total_time / self.calls,
+            max_time=self.max_time,
+            last_seen=self.last_seen,
+            plan=self.plan,
+        )
+
+
+class SlowQueryLog(SlowQueryReader):
+    """
+    Журнал медленных запросов воркера.
+
+    Хранит не больше `max_size` разных запросов, при переполнении вытесняется тот,
+    что дольше всех не появлялся
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._queries: OrderedDict[tuple, SlowQueryStats] = OrderedDict()
+        self._explain_tasks: set[asyncio.Task] = set()
+
+    def record(
+        self,
+        database: str,
+        statement: str,
+        shape: tuple[str, ...],
+        operation: str,
+        duration: float,
+    ) -> SlowQueryStats:
+        statement = normalize_statement(statement)
+        key = (database, statement, shape)
+
+        stats = self._queries.get(key)
+        if stats is None:
+            stats = SlowQueryStats(
+                database=database,
+                statement=statement,
+                shape=shape,
+                operation=operation,
+                last_seen=dt.datetime.now(dt.UTC),
+            )
+            self._queries[key] = stats
+            if len(self._queries) > self._max_size:
+                self._queries.popitem(last=False)
+        else:
+            self._queries.move_to_end(key)
+
+        stats.calls += 1
+        stats.total_time += duration
+        stats.max_time = max(stats.max_time, duration)
+        stats.last_seen = dt.datetime.now(dt.UTC)
+        return stats
+
+    def explain(
+        self,
+        engine: AsyncEngine,
+        stats: SlowQueryStats,
+        statement: str,
+        parameters: Any,
+    ) -> None:
+        stats.plan_pending = True
+        # План снимается в пустом контексте: таймаут, метрики и трейс запроса,
+        # в котором попался медленный запрос, на него не действуют
+        task = asyncio.get_running_loop().create_task(
+            _explain(engine, stats, statement, parameters),
+            context=contextvars.Context(),
+        )
+        self._explain_tasks.add(task)
+        task.add_done_callback(self._explain_tasks.discard)
+
+    async def wait_for_plans(self) -> None:
+        """Дожидается снятия планов, запущенных к этому моменту"""
+        if self._explain_tasks:
+            await asyncio.gather(*self._explain_tasks)
+
+    def get_top_slow_queries(self, limit: int) -> list[SlowQueryDTO]:
+        top = sorted(
+            self._queries.values(),
+            key=lambda stats: stats.total_time,
+            reverse=True,
+        )
+        return [stats.to_dto() for stats in top[:limit]]
+
+
+async def _explain(
+    engine: AsyncEngine,
+    stats: SlowQueryStats,
+    statement: str,
+    parameters: Any,
+) -> None:
+    try:
+        # План снимается на отдельном соединении, чтобы не задерживать ответ на запрос
+        async with engine.connect() as connection:
+            plan = await connection.exec_driver_sql(EXPLAIN + statement, parameters)
+            plan = plan.scalar_one()
+    except Exception:
+        logger.warning('Failed to explain slow query', exc_info=True)
+    else:
+        stats.plan = json.loads(plan) if isinstance(plan, str) else plan
+    finally:
+        stats.plan_pending = False
+
+
+def _is_service_statement(statement: str) -> bool:
+    # Собственные EXPLAIN журнала и SET statement_timeout перед запросами гейтвеев
+    words = statement.lstrip()[:8].split(None, 1)
+    return bool(words) and words[0].upper() in ('EXPLAIN', 'SET')
+
+
+def _can_explain(statement: str) -> bool:
+    # EXPLAIN ANALYZE выполняет запрос, поэтому повторять можно только чтение без блокировок
+    return statement.lstrip()[:6].upper() == 'SELECT' and not _LOCKING_RE.search(
+        statement,
+    )
+
+
+def record_slow_queries(
+    engine: AsyncEngine,
+    name: str,
+    log: SlowQueryLog,
+    threshold: float,
+    explain_ratio: float,
+) -> None:
+    """Записывает в журнал запросы движка дольше `threshold` секунд"""
+    if threshold <= 0:
+        return
+
+    @event.listens_for(engine.sync_engine, 'before_cursor_execute')
+    def _before_cursor_execute(
+        conn,
+        cursor,
+        statement,
+        parameters,
+        context,
+        executemany,
+    ):
+        if context is not None:
+            context._slow_query_started = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, 'after_cursor_execute')
+    def _after_cursor_execute(
+        conn,
+        cursor,
+        statement,
+        parameters,
+        context,
+        executemany,
+    ):
+        started = getattr(context, '_slow_query_started', None)
+        if started is None:
+            return
+
+        duration = time.perf_counter() - started
+        if duration < threshold or _is_service_statement(statement):
+            return
+
+        stats = log.record(
+            database=name,
+            statement=statement,
+            shape=_query_shape.get(),
+            operation=current_database_operation(),
+            duration=duration,
+        )
+        if (
+            not executemany
+            and not stats.plan_pending
+            and (stats.plan is None or random.random() < explain_ratio)
+            and _can_explain(statement)
+        ):
+            log.explain(
+                engine=engine,
+                stats=stats,
+                statement=statement,
+                parameters=parameters,
+            )
@@ -0,0 +1,159 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator
+
+from sqlalchemy import Connection, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session, SessionTransaction
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+# SQLSTATE query_canceled, его возвращает Postgres при срабатывании statement_timeout
+QUERY_CANCELED_SQLSTATE = '57014'
+
+
+@dataclass(slots=True)
+class StatementTimeoutState:
+    # Таймаут запросов роута в секундах, None - таймаут из настроек
+    timeout: float | None = None
+    # Дедлайн клиента по time.monotonic()
+    deadline: float | None = None
+
+    def effective_timeout(self) -> float | None:
+        timeouts = []
+        if self.timeout is not None:
+            timeouts.append(self.timeout)
+        if self.deadline is not None:
+            timeouts.append(self.deadline - time.monotonic())
+
+        return min(timeouts) if timeouts else None
+
+
+_statement_timeout_state: ContextVar[StatementTimeoutState | None] = ContextVar(
+    'statement_timeout_state',
+    default=None,
+)
+
+
+@contextmanager
+def statement_timeout_scope(
+    deadline: float | None = None,
+) -> Iterator[StatementTimeoutState]:
+    state = StatementTimeoutState(deadline=deadline)
+    token = _statement_timeout_state.set(state)
+    try:
+        yield state
+    finally:
+        _statement_timeout_state.reset(token)
+
+
+def statement_timeout(seconds: float):
+    """FastAPI-зависимость, задающая таймаут запросов к БД для роута"""
+
+    async def set_route_statement_timeout() -> None:
+        state = _statement_timeout_state.get()
+        if state is not None:
+            state.timeout = seconds
+
+    return set_route_statement_timeout
+
+
+def _to_milliseconds(seconds: float) -> int:
+    # 0 в Postgres отключает таймаут, поэтому истёкший дедлайн превращается в 1 мс
+    return max(int(seconds * 1000), 1)
+
+
+def track_statement_timeout(engine: AsyncEngine, default: int | None) -> None:
+    """
+    Запоминает таймаут в миллисекундах, выставленный соединению при подключении.
+
+    None означает, что таймаут соединения неизвестен (например, за PgBouncer).
+    """
+
+    @event.listens_for(engine.sync_engine.pool, 'connect')
+    def _on_connect(dbapi_connection, connection_record):
+        connection_record.info['statement_timeout'] = default
+        connection_record.info['default_statement_timeout'] = default
+
+
+@event.listens_for(Session, 'after_begin')
+def _apply_statement_timeout(
+    session: Session,
+    transaction: SessionTransaction,
+    connection: Connection,
+) -> None:
+    state = _statement_timeout_state.get()
+    timeout = state.effective_timeout() if state is not None else None
+
+    current = connection.info.get('statement_timeout')
+    if timeout is None:
+        desired = connection.info.get('default_statement_timeout')
+    else:
+        desired = _to_milliseconds(timeout)
+
+    if desired is None or desired == current:
+        return
+
+    if connection.get_execution_options().get('isolation_level') != 'AUTOCOMMIT':
+        # SET LOCAL действует до конца транзакции, соединение возвращается в пул как было
+        connection.exec_driver_sql(f'SET LOCAL statement_timeout = {desired}')
+    elif current is not None:
+        # Без транзакции SET LOCAL не работает, поэтому меняем таймаут соединения и запоминаем его
+        connection.exec_driver_sql(f'SET statement_timeout = {desired}')
+        connection.info['statement_timeout'] = desired
+
+
+class StatementTimeoutMiddleware:
+    """
+    Ограничивает время запросов к БД дедлайном клиента.
+
+    Дедлайн передаётся заголовком `X-Request-Deadline` (Unix time в секундах)
+    или `X-Request-Timeout` (секунды от получения запроса).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    @staticmethod
+    def _parse_deadline(scope: Scope) -> float | None:
+        headers = Request(scope).headers
+        timeouts = []
+        if 'x-request-deadline' in headers:
+            timeouts.append(float(headers['x-request-deadline']) - time.time())
+        if 'x-request-timeout' in headers:
+            timeouts.append(float(headers['x-request-timeout']))
+
+        if not timeouts:
+            return None
+        if not all(math.isfinite(timeout) for timeout in timeouts):
+            raise ValueError('Deadline must be a finite number')
+
+        return time.monotonic() + min(timeouts)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        try:
+            deadline = self._parse_deadline(scope)
+        except ValueError:
+            response = JSONResponse(
+                {'detail': 'Bad request deadline header'},
+                status_code=400,
+            )
+            return await response(scope, receive, send)
+
+        if deadline is not None and deadline <= time.monotonic():
+            response = JSONResponse(
+                {'detail': 'Request deadline exceeded'},
+                status_code=504,
+            )
+            return await response(scope, receive, send)
+
+        with statement_timeout_scope(deadline=deadline):
+            await self.app(scope, receive, send)
@@ -0,0 +1,62 @@
+import asyncio
+from contextlib import AsyncExitStack
+from uuid import UUID
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+from products_app.infra.database.loader import select_by_ids
+from products_app.infra.database.models import CategoryModel, ProductModel
+from products_app.infra.gateways.category import CategoryGateway
+from products_app.infra.gateways.product import ProductGateway
+
+
+async def _prepare_hot_statements(
+    connection: AsyncConnection,
+    category_tree_depth: int,
+) -> None:
+    """
+    Выполняет горячие запросы гейтвеев, чтобы asyncpg загрузил типы
+    и закешировал подготовленные запросы на этом соединении
+    """
+    missing_id = str(UUID(int=0))
+
+    async with AsyncSession(bind=connection) as session:
+        category_gateway = CategoryGateway(session=session)
+        product_gateway = ProductGateway(session=session)
+
+        await category_gateway.get_by_id(missing_id)
+        await category_gateway.get_all(limit=1, offset=0)
+        await category_gateway.get_all_root(depth=category_tree_depth)
+        await product_gateway.get_by_id(missing_id)
+        await product_gateway.get_all(limit=1, offset=0, filters=None)
+
+        # Точечные чтения в запросах на чтение идут пачками через PointLoader
+        await session.scalars(select_by_ids(CategoryModel, [UUID(missing_id)]))
+        await session.scalars(select_by_ids(ProductModel, [UUID(missing_id)]))
+
+    await connection.rollback()
+
+
+async def warm_up_engine(
+    engine: AsyncEngine,
+    connections: int,
+    category_tree_depth: int,
+) -> None:
+    connections = min(connections, engine.pool.size())
+    if connections <= 0:
+        return
+
+    # Соединения держатся открытыми одновременно, чтобы пул вырос до нужного размера
+    async with AsyncExitStack() as stack:
+        opened_connections = await asyncio.gather(
+            *(stack.enter_async_context(engine.connect()) for _ in range(connections)),
+        )
+        await asyncio.gather(
+            *(
+                _prepare_hot_statements(
+                    connection=connection,
+                    category_tree_depth=category_tree_depth,
+                )
+                for connection in opened_connections
+            ),
+        )
@@ -0,0 +1,105 @@
+import datetime as dt
+
+from sqlalchemy import BigInteger, Text, delete, func, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from products_app.application.dto.catalog_change import (
+    CatalogChangeCursorDTO,
+    CatalogChangeDTO,
+    CatalogChangeEntity,
+)
+from products_app.application.interfaces.catalog_change import (
+    CatalogChangePruner,
+    CatalogChangeReader,
+)
+from products_app.infra.database.models import (
+    CatalogChangeModel,
+    CatalogChangePruneModel,
+)
+from products_app.infra.metrics import instrument_gateway
+
+
+@instrument_gateway
+class CatalogChangeGateway(CatalogChangeReader, CatalogChangePruner):
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    @staticmethod
+    def to_dto(change: CatalogChangeModel) -> CatalogChangeDTO:
+        return CatalogChangeDTO(
+            entity=CatalogChangeEntity(change.entity),
+            entity_id=str(change.entity_id),
+            deleted=change.deleted,
+            changed_at=change.created_at,
+            cursor=CatalogChangeCursorDTO(txid=change.txid, id=change.id),
+        )
+
+    async def get_changes(
+        self,
+        after: CatalogChangeCursorDTO | None,
+        limit: int,
+    ) -> list[CatalogChangeDTO]:
+        # Транзакции с ID от xmin снимка могут быть ещё не закоммичены. Если отдать изменения
+        # более поздних транзакций раньше, курсор уйдёт вперёд, и их изменения будут пропущены
+        committed_before = func.pg_snapshot_xmin(func.pg_current_snapshot())
+        stmt = (
+            select(CatalogChangeModel)
+            .where(
+                CatalogChangeModel.txid < committed_before.cast(Text).cast(BigInteger),
+            )
+            .order_by(CatalogChangeModel.txid, CatalogChangeModel.id)
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(CatalogChangeModel.txid, CatalogChangeModel.id)
+                > tuple_(after.txid, after.id),
+            )
+
+        changes = await self._session.scalars(stmt)
+        return [self.to_dto(change) for change in changes]
+
+    async def get_low_water_mark(self) -> CatalogChangeCursorDTO | None:
+        stmt = (
+            select(CatalogChangePruneModel.txid, CatalogChangePruneModel.change_id)
+            .order_by(
+                CatalogChangePruneModel.txid.desc(),
+                CatalogChangePruneModel.change_id.desc(),
+            )
+            .limit(1)
+        )
+        mark = (await self._session.execute(stmt)).first()
+        if mark is None:
+            return None
+
+        return CatalogChangeCursorDTO(txid=mark.txid, id=mark.change_id)
+
+    async def delete_before(self, before: dt.datetime) -> int:
+        # Удаление и запись позиции последнего удалённого изменения - один запрос,
+        # удалённые строки не передаются в приложение
+        deleted = (
+            delete(CatalogChangeModel)
+            .where(CatalogChangeModel.created_at < before)
+            .returning(CatalogChangeModel.txid, CatalogChangeModel.id)
+            .cte('deleted')
+        )
+        last_deleted = (
+            select(
+                func.timezone('utc', func.now()),
+                deleted.c.txid,
+                deleted.c.id,
+                func.count().over(),
+            )
+            .order_by(deleted.c.txid.desc(), deleted.c.id.desc())
+            .limit(1)
+        )
+        stmt = (
+            insert(CatalogChangePruneModel)
+            .from_select(
+                ['created_at', 'txid', 'change_id', 'deleted_changes'],
+                last_deleted,
+            )
+            .returning(CatalogChangePruneModel.deleted_changes)
+        )
+
+        return await self._session.scalar(stmt) or 0
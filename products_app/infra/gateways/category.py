@@ -1,20 +1,31 @@
-from sqlalchemy import delete, insert, select, update
-from sqlalchemy.exc import IntegrityError, MissingGreenlet
+from sqlalchemy import delete, insert, literal, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
 
+from products_app.application.dto.category import CategoryCursorDTO
 from products_app.application.interfaces.category import CategoryGatewayProtocol
 from products_app.domain.entitites.category import (
     CategoryEntity,
     ExtendedCategoryEntity,
 )
 from products_app.domain.exceptions.category import CategoryNotFoundError
+from products_app.infra.database.loader import PointLoader
 from products_app.infra.database.models import CategoryModel
+from products_app.infra.metrics import instrument_gateway
 
 
+@instrument_gateway
 class CategoryGateway(CategoryGatewayProtocol):
-    def __init__(self, session: AsyncSession):
+    # asyncpg allows at most 32767 bind parameters per statement
+    save_many_chunk_size = 1000
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        loader: PointLoader[CategoryModel] | None = None,
+    ):
         self._session = session
+        self._loader = loader
 
     @staticmethod
     def to_entity(category: CategoryModel | None) -> CategoryEntity | None:
@@ -30,52 +41,99 @@ class CategoryGateway(CategoryGatewayProtocol):
 
     @staticmethod
     def to_extended_entity(
-        category: CategoryModel | None,
-    ) -> ExtendedCategoryEntity | None:
-        if category is None:
-            return None
-
-        try:
-            sub_categories = [
-                CategoryGateway.to_extended_entity(sub_category)
-                for sub_category in category.sub_categories
-            ]
-        except MissingGreenlet:
-            sub_categories = None
-
+        category: CategoryModel,
+        truncated: bool,
+    ) -> ExtendedCategoryEntity:
         return ExtendedCategoryEntity(
             id=str(category.id),
             created_at=category.created_at,
             name=category.name,
             parent_category_id=category.parent_category_id,
-            sub_categories=sub_categories,
+            # Вложенные категории обрезаны по глубине
+            sub_categories=None if truncated else [],
         )
 
     async def get_by_id(self, category_id: str) -> CategoryEntity | None:
-        return self.to_entity(await self._session.get(CategoryModel, category_id))
+        if self._loader is not None and self._loader.is_available():
+            category = await self._loader.load(category_id)
+        else:
+            category = await self._session.get(CategoryModel, category_id)
+
+        return self.to_entity(category)
+
+    async def get_by_ids(self, category_ids: list[str]) -> list[CategoryEntity]:
+        stmt = select(CategoryModel).where(CategoryModel.id.in_(category_ids))
+
+        categories = await self._session.scalars(stmt)
+
+        return [CategoryGateway.to_entity(category) for category in categories]
 
     async def get_all_root(self, depth: int) -> list[ExtendedCategoryEntity]:
-        stmt = (
-            select(CategoryModel)
+        """
+        Дерево категорий до глубины `depth` одним запросом с рекурсивным CTE,
+        поэтому количество запросов не зависит от глубины
+        """
+        tree = (
+            select(CategoryModel.id, literal(0).label('level'))
             .where(CategoryModel.parent_category_id.is_(None))
-            .order_by(CategoryModel.name)
+            .cte('category_tree', recursive=True)
+        )
+        tree = tree.union_all(
+            select(CategoryModel.id, tree.c.level + 1)
+            .join(tree, CategoryModel.parent_category_id == tree.c.id)
+            .where(tree.c.level < depth),
+        )
+        stmt = (
+            select(CategoryModel, tree.c.level)
+            .join(tree, CategoryModel.id == tree.c.id)
+            .order_by(CategoryModel.name, CategoryModel.id)
         )
-        if depth > 0:
-            depth = None if depth == 1 else depth
-            stmt = stmt.options(
-                selectinload(CategoryModel.sub_categories, recursion_depth=depth),
-            )
-
-        categories = await self._session.scalars(stmt)
 
-        return [CategoryGateway.to_extended_entity(category) for category in categories]
+        rows = await self._session.execute(stmt)
 
-    async def get_all(self, limit: int, offset: int) -> list[CategoryEntity]:
+        roots = []
+        categories = {}
+        # Строки отсортированы по названию, поэтому и вложенные категории идут по названию
+        for category, level in rows.all():
+            entity = CategoryGateway.to_extended_entity(
+                category,
+                truncated=level >= depth,
+            )
+            categories[entity.id] = entity
+            if level == 0:
+                roots.append(entity)
+
+        for entity in categories.values():
+            if entity.parent_category_id is not None:
+                parent = categories[str(entity.parent_category_id)]
+                parent.sub_categories.append(entity)
+
+        return roots
+
+    async def get_all(
+        self,
+        limit: int,
+        offset: int,
+        parent_category_id: str | None = None,
+        after: CategoryCursorDTO | None = None,
+    ) -> list[CategoryEntity]:
+        stmt = select(CategoryModel)
+        if parent_category_id is not None:
+            stmt = stmt.where(CategoryModel.parent_category_id == parent_category_id)
+        if after is not None:
+            # Сравнение кортежей использует индекс ix_category_name_id
+            stmt = stmt.where(
+                tuple_(CategoryModel.name, CategoryModel.id)
+                > tuple_(
+                    after.name,
+                    after.id,
+                    types=[CategoryModel.name.type, CategoryModel.id.type],
+                ),
+            )
         stmt = (
-            select(CategoryModel)
-            .limit(limit)
+            stmt.limit(limit)
             .offset(offset)
-            .order_by(CategoryModel.name)
+            .order_by(CategoryModel.name, CategoryModel.id)
         )
 
         categories = await self._session.scalars(stmt)
@@ -97,6 +155,33 @@ class CategoryGateway(CategoryGatewayProtocol):
                 identifier=category.parent_category_id,
             ) from error
 
+    async def save_many(self, categories: list[CategoryEntity]) -> None:
+        for start in range(0, len(categories), self.save_many_chunk_size):
+            chunk = categories[start : start + self.save_many_chunk_size]
+            stmt = insert(CategoryModel).values(
+                [
+                    {
+                        'id': category.id,
+                        'created_at': category.created_at,
+                        'name': category.name,
+                        'parent_category_id': category.parent_category_id,
+                    }
+                    for category in chunk
+                ],
+            )
+
+            try:
+                await self._session.execute(stmt)
+            except IntegrityError as error:
+                parent_ids = {
+                    str(category.parent_category_id)
+                    for category in chunk
+                    if category.parent_category_id is not None
+                }
+                raise CategoryNotFoundError(
+                    identifier=', '.join(sorted(parent_ids)),
+                ) from error
+
     async def update(self, category: CategoryEntity) -> None:
         stmt = (
             update(CategoryModel)
@@ -118,3 +203,20 @@ class CategoryGateway(CategoryGatewayProtocol):
         await self._session.execute(
             delete(CategoryModel).where(CategoryModel.id == category_id),
         )
+
+    async def detach_sub_categories(self, category_id: str, limit: int) -> int:
+        batch = (
+            select(CategoryModel.id)
+            .where(CategoryModel.parent_category_id == category_id)
+            .limit(limit)
+        )
+        stmt = (
+            update(CategoryModel)
+            .where(CategoryModel.id.in_(batch))
+            .values(parent_category_id=None)
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self._session.execute(stmt)
+
+        return result.rowcount
@@ -0,0 +1,93 @@
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from products_app.application.interfaces.category import (
+    CategoryDeletionJobGatewayProtocol,
+)
+from products_app.domain.entitites.category import (
+    CategoryDeletionJobEntity,
+    CategoryDeletionStatus,
+)
+from products_app.infra.database.models import CategoryDeletionJobModel
+from products_app.infra.metrics import instrument_gateway
+
+
+@instrument_gateway
+class CategoryDeletionJobGateway(CategoryDeletionJobGatewayProtocol):
+    def __init__(self, session: AsyncSession):
+        self._session = session
+
+    @staticmethod
+    def to_entity(
+        job: CategoryDeletionJobModel | None,
+    ) -> CategoryDeletionJobEntity | None:
+        if job is None:
+            return None
+
+        return CategoryDeletionJobEntity(
+            id=str(job.id),
+            created_at=job.created_at,
+            category_id=str(job.category_id),
+            batch_size=job.batch_size,
+            status=CategoryDeletionStatus(job.status),
+            detached_products=job.detached_products,
+            detached_sub_categories=job.detached_sub_categories,
+            finished_at=job.finished_at,
+            error=job.error,
+        )
+
+    async def get_by_id(self, job_id: str) -> CategoryDeletionJobEntity | None:
+        # populate_existing, чтобы не получить устаревшее состояние из identity map
+        job = await self._session.get(
+            CategoryDeletionJobModel,
+            job_id,
+            populate_existing=True,
+        )
+        return self.to_entity(job)
+
+    async def get_unfinished(self) -> list[CategoryDeletionJobEntity]:
+        stmt = (
+            select(CategoryDeletionJobModel)
+            .where(
+                CategoryDeletionJobModel.status.in_(
+                    (
+                        CategoryDeletionStatus.pending.value,
+                        CategoryDeletionStatus.running.value,
+                    ),
+                ),
+            )
+            .order_by(CategoryDeletionJobModel.created_at)
+        )
+
+        jobs = await self._session.scalars(stmt)
+        return [self.to_entity(job) for job in jobs]
+
+    async def save(self, job: CategoryDeletionJobEntity) -> None:
+        stmt = insert(CategoryDeletionJobModel).values(
+            id=job.id,
+            created_at=job.created_at,
+            category_id=job.category_id,
+            batch_size=job.batch_size,
+            status=job.status.value,
+            detached_products=job.detached_products,
+            detached_sub_categories=job.detached_sub_categories,
+            finished_at=job.finished_at,
+            error=job.error,
+        )
+
+        await self._session.execute(stmt)
+
+    async def update(self, job: CategoryDeletionJobEntity) -> None:
+        stmt = (
+            update(CategoryDeletionJobModel)
+            .where(CategoryDeletionJobModel.id == job.id)
+            .values(
+                status=job.status.value,
+                detached_products=job.detached_products,
+                detached_sub_categories=job.detached_sub_categories,
+                finished_at=job.finished_at,
+                error=job.error,
+            )
+        )
+
+        await self._session.execute(stmt)
@@ -1,19 +1,66 @@
+import math
 from decimal import Decimal
-from typing import Any
+from typing import Any, Iterable, Sequence
 
-from sqlalchemy import DECIMAL, Select, delete, insert, inspect, select, update
-from sqlalchemy.exc import DBAPIError
+from sqlalchemy import (
+    DECIMAL,
+    Numeric,
+    Select,
+    delete,
+    func,
+    insert,
+    inspect,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import array_agg
+from sqlalchemy.exc import DBAPIError, IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
+from products_app.application.dto.product import (
+    ExpandedProductsDTO,
+    ProductExpand,
+    ProductFieldsDTO,
+    RenderedJsonCheckDTO,
+)
 from products_app.application.interfaces.product import ProductGatewayProtocol
+from products_app.domain.entitites.category import CategoryEntity
 from products_app.domain.entitites.product import ProductEntity
+from products_app.domain.exceptions.category import CategoryNotFoundError
 from products_app.domain.exceptions.product import ProductFilterParamError
-from products_app.infra.database.models import ProductModel
+from products_app.infra.database.loader import PointLoader
+from products_app.infra.database.models import CategoryModel, ProductModel
+from products_app.infra.database.slow_queries import query_shape
+from products_app.infra.gateways.category import CategoryGateway
+from products_app.infra.metrics import instrument_gateway
 
 
+# Класс SQLSTATE data_exception: неверное значение для типа, переполнение числа и т.п.
+DATA_EXCEPTION_SQLSTATE_CLASS = '22'
+
+
+def _finite(value: int | float) -> int | float:
+    """Бесконечность и NaN в фильтрах не допускаются"""
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError(f'Not a finite number: {value}')
+
+    return value
+
+
+@instrument_gateway
 class ProductGateway(ProductGatewayProtocol):
-    def __init__(self, session: AsyncSession):
+    # asyncpg allows at most 32767 bind parameters per statement
+    save_many_chunk_size = 1000
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        loader: PointLoader[ProductModel] | None = None,
+    ):
         self._session = session
+        self._loader = loader
 
     @staticmethod
     def to_entity(product: ProductModel | None) -> ProductEntity | None:
@@ -29,7 +76,7 @@ class ProductGateway(ProductGatewayProtocol):
             stock=Decimal(product.stock),
             unit=product.unit,
             unit_size=Decimal(product.unit_size),
-            category_id=str(product.category_id),
+            category_id=str(product.category_id) if product.category_id else None,
             attributes=product.attributes,
         )
 
@@ -45,71 +92,386 @@ class ProductGateway(ProductGatewayProtocol):
             try:
                 path, operator = key.split('__', 1)
 
-                if ProductGateway._has_column(ProductModel, path):
+                is_column = ProductGateway._has_column(ProductModel, path)
+                if is_column:
                     left = getattr(ProductModel, path)
+                    # Строковые столбцы с числом сравниваются как строки
+                    numeric = isinstance(left.type, Numeric)
                 else:
                     left = ProductModel.attributes[path].astext
+                    numeric = True
                     if operator in ('gt', 'lt'):
                         left = left.cast(DECIMAL)
 
                 if operator == 'eq':
-                    if isinstance(value, (int, float)):
-                        stmt = stmt.where(left.cast(DECIMAL) == value)
+                    if numeric and isinstance(value, (int, float)):
+                        stmt = stmt.where(left.cast(DECIMAL) == _finite(value))
+                    elif numeric and is_column:
+                        stmt = stmt.where(left == _finite(float(value)))
                     else:
                         stmt = stmt.where(left == str(value))
+                elif operator in ('gt', 'lt') and not numeric:
+                    raise ProductFilterParamError(f'Column is not numeric: {path}')
                 elif operator == 'gt':
-                    stmt = stmt.where(left > float(value))
+                    stmt = stmt.where(left > _finite(float(value)))
                 elif operator == 'lt':
-                    stmt = stmt.where(left < float(value))
+                    stmt = stmt.where(left < _finite(float(value)))
                 else:
                     raise ProductFilterParamError(f'Invalid operator: {operator}')
-            except ValueError as error:
+            except (ValueError, OverflowError) as error:
                 raise ProductFilterParamError(
                     f"Bad filter param: '{key}' or value: '{value}'",
                 ) from error
 
         return stmt
 
-    async def get_all(
-        self,
+    @staticmethod
+    def _search(
+        stmt: Select,
         limit: int,
         offset: int,
         filters: dict[str, Any] | None,
-    ) -> list[ProductEntity]:
-        stmt = select(ProductModel)
+    ) -> Select:
         if filters is not None:
-            stmt = self._apply_filters(stmt, filters)
-        stmt = stmt.limit(limit).offset(offset).order_by(ProductModel.name)
+            stmt = ProductGateway._apply_filters(stmt, filters)
+        return stmt.limit(limit).offset(offset).order_by(ProductModel.name)
 
+    async def _execute_search(self, stmt: Select, filters: dict[str, Any] | None):
         try:
-            products = await self._session.scalars(stmt)
+            with query_shape(*(filters or ())):
+                return await self._session.execute(stmt)
         except DBAPIError as error:
-            if 'InvalidParameterValueError' in str(error):
+            # Значение фильтра не приводится к типу столбца или атрибута
+            sqlstate = getattr(error.orig, 'sqlstate', None) or ''
+            if sqlstate.startswith(DATA_EXCEPTION_SQLSTATE_CLASS):
                 raise ProductFilterParamError from error
 
             raise
 
+    async def get_all(
+        self,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any] | None,
+    ) -> list[ProductEntity]:
+        stmt = self._search(select(ProductModel), limit, offset, filters)
+        products = (await self._execute_search(stmt, filters)).scalars()
+
         return [self.to_entity(product) for product in products]
 
+    @staticmethod
+    def join_rendered(documents: Iterable[str]) -> bytes:
+        """Собирает JSON-массив из готовых JSON товаров"""
+        return b'[' + ','.join(documents).encode() + b']'
+
+    async def get_all_json(
+        self,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any] | None,
+    ) -> bytes:
+        stmt = self._search(select(ProductModel.rendered_json), limit, offset, filters)
+        documents = (await self._execute_search(stmt, filters)).scalars()
+
+        return self.join_rendered(documents)
+
+    async def get_json_by_id(self, product_id: str) -> bytes | None:
+        stmt = select(ProductModel.rendered_json).where(ProductModel.id == product_id)
+        document = await self._session.scalar(stmt)
+
+        return document.encode() if document is not None else None
+
+    async def check_rendered_json(
+        self,
+        after_id: str | None,
+        limit: int,
+    ) -> RenderedJsonCheckDTO:
+        expected = func.product_rendered_json(ProductModel.__table__.table_valued())
+        stmt = (
+            select(
+                ProductModel.id,
+                ProductModel.rendered_json.is_distinct_from(expected).label('drifted'),
+            )
+            .order_by(ProductModel.id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            stmt = stmt.where(ProductModel.id > after_id)
+
+        rows = (await self._session.execute(stmt)).all()
+
+        return RenderedJsonCheckDTO(
+            checked=len(rows),
+            drifted_ids=[str(row.id) for row in rows if row.drifted],
+            last_id=str(rows[-1].id) if rows else None,
+        )
+
+    @staticmethod
+    def _partial_columns(fields: ProductFieldsDTO) -> list:
+        """Столбцы для выборки только запрошенных полей, атрибуты - по ключам `attributes -> key`"""
+        columns = []
+        for field in fields.fields:
+            if field == 'attributes' and fields.attribute_keys is not None:
+                columns.extend(
+                    ProductModel.attributes[key] for key in fields.attribute_keys
+                )
+            else:
+                columns.append(getattr(ProductModel, field))
+
+        return columns
+
+    @staticmethod
+    def to_partial(row: Sequence[Any], fields: ProductFieldsDTO) -> dict[str, Any]:
+        product = {}
+        position = 0
+        for field in fields.fields:
+            if field == 'attributes' and fields.attribute_keys is not None:
+                keys = fields.attribute_keys
+                values = row[position : position + len(keys)]
+                position += len(keys)
+                # Отсутствующие у товара атрибуты в ответ не попадают
+                product[field] = {
+                    key: value
+                    for key, value in zip(keys, values, strict=True)
+                    if value is not None
+                }
+                continue
+
+            value = row[position]
+            position += 1
+            if field in ('id', 'category_id'):
+                value = str(value) if value else None
+            elif field in ('price', 'stock', 'unit_size'):
+                value = Decimal(value)
+            product[field] = value
+
+        return product
+
+    async def get_partial_by_id(
+        self,
+        product_id: str,
+        fields: ProductFieldsDTO,
+    ) -> dict[str, Any] | None:
+        stmt = select(*self._partial_columns(fields)).where(
+            ProductModel.id == product_id,
+        )
+        row = (await self._session.execute(stmt)).one_or_none()
+
+        return self.to_partial(row, fields) if row is not None else None
+
+    async def get_all_partial(
+        self,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any] | None,
+        fields: ProductFieldsDTO,
+    ) -> list[dict[str, Any]]:
+        stmt = self._search(
+            select(*self._partial_columns(fields)),
+            limit,
+            offset,
+            filters,
+        )
+        rows = await self._execute_search(stmt, filters)
+
+        return [self.to_partial(row, fields) for row in rows]
+
+    @staticmethod
+    def _category_path():
+        """
+        Категория товара и все её родительские категории, по строке на товар:
+        столбцы категорий собраны в массивы, у товара без категории они NULL
+        """
+        path = (
+            select(
+                CategoryModel.id,
+                CategoryModel.created_at,
+                CategoryModel.name,
+                CategoryModel.parent_category_id,
+            )
+            .where(CategoryModel.id == ProductModel.category_id)
+            .correlate(ProductModel)
+            .cte('category_path', recursive=True, nesting=True)
+        )
+        parent = aliased(CategoryModel)
+        # UNION вместо UNION ALL останавливает рекурсию, если в родителях категорий есть цикл
+        path = path.union(
+            select(
+                parent.id,
+                parent.created_at,
+                parent.name,
+                parent.parent_category_id,
+            ).join(path, parent.id == path.c.parent_category_id),
+        )
+
+        return select(
+            array_agg(path.c.id),
+            array_agg(path.c.created_at),
+            array_agg(path.c.name),
+            array_agg(path.c.parent_category_id),
+        ).lateral('category_path_rows')
+
+    @staticmethod
+    def _expanded_select(
+        fields: ProductFieldsDTO | None,
+        expand: ProductExpand,
+    ) -> Select:
+        """
+        Выборка товаров с категориями, категории - последние столбцы строки.
+
+        Путь категорий читается тем же запросом через LATERAL с рекурсивным CTE
+        """
+        columns = (
+            [ProductModel]
+            if fields is None
+            else ProductGateway._partial_columns(fields)
+        )
+        if expand is ProductExpand.category_path:
+            category_path = ProductGateway._category_path()
+            return select(*columns, *category_path.c).outerjoin(category_path, true())
+
+        return select(*columns, CategoryModel).outerjoin(
+            CategoryModel,
+            ProductModel.category_id == CategoryModel.id,
+        )
+
+    @staticmethod
+    def _row_categories(
+        row: Sequence[Any],
+        expand: ProductExpand,
+    ) -> tuple[Sequence[Any], list[CategoryEntity]]:
+        """Делит строку выборки `_expanded_select` на столбцы товара и его категории"""
+        if expand is not ProductExpand.category_path:
+            category = row[-1]
+            categories = (
+                [] if category is None else [CategoryGateway.to_entity(category)]
+            )
+            return row[:-1], categories
+
+        ids, created_ats, names, parent_ids = row[-4:]
+        if ids is None:
+            return row[:-4], []
+
+        return row[:-4], [
+            CategoryEntity(
+                id=str(category_id),
+                created_at=created_at,
+                name=name,
+                parent_category_id=parent_id,
+            )
+            for category_id, created_at, name, parent_id in zip(
+                ids,
+                created_ats,
+                names,
+                parent_ids,
+                strict=True,
+            )
+        ]
+
+    @staticmethod
+    def to_expanded(
+        rows: Sequence[Sequence[Any]],
+        fields: ProductFieldsDTO | None,
+        expand: ProductExpand,
+    ) -> ExpandedProductsDTO:
+        products = []
+        # Категории без повторов, даже если в них все товары страницы или у них общие родители
+        categories = {}
+        for row in rows:
+            product_row, row_categories = ProductGateway._row_categories(row, expand)
+            if fields is None:
+                products.append(ProductGateway.to_entity(product_row[0]))
+            else:
+                products.append(ProductGateway.to_partial(product_row, fields))
+
+            for category in row_categories:
+                categories.setdefault(category.id, category)
+
+        return ExpandedProductsDTO(
+            products=products,
+            categories=list(categories.values()),
+        )
+
+    async def get_expanded_by_id(
+        self,
+        product_id: str,
+        fields: ProductFieldsDTO | None,
+        expand: ProductExpand,
+    ) -> ExpandedProductsDTO:
+        stmt = self._expanded_select(fields, expand).where(
+            ProductModel.id == product_id,
+        )
+        rows = (await self._session.execute(stmt)).all()
+
+        return self.to_expanded(rows, fields, expand)
+
+    async def get_all_expanded(
+        self,
+        limit: int,
+        offset: int,
+        filters: dict[str, Any] | None,
+        fields: ProductFieldsDTO | None,
+        expand: ProductExpand,
+    ) -> ExpandedProductsDTO:
+        stmt = self._search(
+            self._expanded_select(fields, expand),
+            limit,
+            offset,
+            filters,
+        )
+        rows = (await self._execute_search(stmt, filters)).all()
+
+        return self.to_expanded(rows, fields, expand)
+
     async def get_by_id(self, product_id: str) -> ProductEntity | None:
-        product = await self._session.get(ProductModel, product_id)
+        if self._loader is not None and self._loader.is_available():
+            product = await self._loader.load(product_id)
+        else:
+            product = await self._session.get(ProductModel, product_id)
+
         return self.to_entity(product)
 
+    @staticmethod
+    def to_row(product: ProductEntity) -> dict[str, Any]:
+        return {
+            'id': product.id,
+            'created_at': product.created_at,
+            'name': product.name,
+            'description': product.description,
+            'price': product.price,
+            'stock': product.stock,
+            'unit': product.unit,
+            'unit_size': product.unit_size,
+            'category_id': product.category_id,
+            'attributes': product.attributes,
+        }
+
     async def save(self, product: ProductEntity) -> None:
-        stmt = insert(ProductModel).values(
-            id=product.id,
-            created_at=product.created_at,
-            name=product.name,
-            description=product.description,
-            price=product.price,
-            stock=product.stock,
-            unit=product.unit,
-            unit_size=product.unit_size,
-            category_id=product.category_id,
-            attributes=product.attributes,
-        )
+        stmt = insert(ProductModel).values(self.to_row(product))
 
-        await self._session.execute(stmt)
+        try:
+            await self._session.execute(stmt)
+        except IntegrityError as error:
+            raise CategoryNotFoundError(identifier=product.category_id) from error
+
+    async def save_many(self, products: list[ProductEntity]) -> None:
+        for start in range(0, len(products), self.save_many_chunk_size):
+            chunk = products[start : start + self.save_many_chunk_size]
+            stmt = insert(ProductModel).values(
+                [self.to_row(product) for product in chunk],
+            )
+
+            try:
+                await self._session.execute(stmt)
+            except IntegrityError as error:
+                category_ids = {
+                    product.category_id
+                    for product in chunk
+                    if product.category_id is not None
+                }
+                raise CategoryNotFoundError(
+                    identifier=', '.join(sorted(category_ids)),
+                ) from error
 
     async def update(self, product: ProductEntity) -> None:
         stmt = (
@@ -129,6 +491,23 @@ class ProductGateway(ProductGatewayProtocol):
 
         await self._session.execute(stmt)
 
+    async def detach_from_category(self, category_id: str, limit: int) -> int:
+        batch = (
+            select(ProductModel.id)
+            .where(ProductModel.category_id == category_id)
+            .limit(limit)
+        )
+        stmt = (
+            update(ProductModel)
+            .where(ProductModel.id.in_(batch))
+            .values(category_id=None)
+            .execution_options(synchronize_session=False)
+        )
+
+        result = await self._session.execute(stmt)
+
+        return result.rowcount
+
     async def delete(self, product_id: str) -> None:
         await self._session.execute(
             delete(ProductModel).where(ProductModel.id == product_id),
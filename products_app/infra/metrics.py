@@ -0,0 +1,261 @@
+import inspect
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+from typing import Iterator, TypeVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import CacheStats
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from products_app.infra.tracing import span
+
+
+# Запросы, выполненные не из гейтвея (прогрев, служебные запросы)
+UNKNOWN_OPERATION = 'other'
+UNMATCHED_ROUTE = '<unmatched>'
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'HTTP request latency by route template',
+    ['method', 'route', 'status'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries per HTTP request',
+    ['route'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_DURATION = Histogram(
+    'http_request_db_duration_seconds',
+    'Database time per HTTP request',
+    ['route'],
+)
+REQUEST_DB_ROWS = Histogram(
+    'http_request_db_rows',
+    'Rows returned or affected by database queries per HTTP request',
+    ['route'],
+    buckets=(0, 1, 10, 100, 1000, 10000, 100000),
+)
+
+DB_QUERIES = Counter(
+    'db_queries_total',
+    'Database queries by gateway method',
+    ['operation'],
+)
+DB_QUERY_DURATION = Histogram(
+    'db_query_duration_seconds',
+    'Database query latency by gateway method',
+    ['operation'],
+)
+DB_ROWS = Counter(
+    'db_rows_total',
+    'Rows returned or affected by database queries by gateway method',
+    ['operation'],
+)
+DB_STATEMENT_CACHE = Counter(
+    'db_statement_cache_total',
+    'SQLAlchemy compiled statement cache lookups',
+    ['result'],
+)
+
+# Пулы создаются в каждом воркере, livesum складывает значения живых воркеров
+POOL_SIZE = Gauge(
+    'db_pool_size',
+    'Connection pool size',
+    ['pool'],
+    multiprocess_mode='livesum',
+)
+POOL_CHECKED_OUT = Gauge(
+    'db_pool_checked_out',
+    'Connections in use',
+    ['pool'],
+    multiprocess_mode='livesum',
+)
+POOL_OVERFLOW = Gauge(
+    'db_pool_overflow',
+    'Connections opened above the pool size',
+    ['pool'],
+    multiprocess_mode='livesum',
+)
+POOL_WAITING = Gauge(
+    'db_pool_waiting',
+    'Requests waiting for a connection',
+    ['pool'],
+    multiprocess_mode='livesum',
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting for a connection from the pool',
+    ['pool'],
+)
+POOL_CONNECT_LATENCY = Histogram(
+    'db_pool_connect_latency_seconds',
+    'Time spent opening new database connections',
+    ['pool'],
+)
+
+SEARCH_CACHE_LOOKUPS = Counter(
+    'search_cache_lookups_total',
+    'Product search result cache lookups',
+    ['result'],
+)
+SEARCH_CACHE_SIZE = Gauge(
+    'search_cache_size_bytes',
+    'Encoded responses held in the product search result cache',
+    multiprocess_mode='livesum',
+)
+
+
+@dataclass(slots=True)
+class RequestDatabaseStats:
+    queries: int = 0
+    duration: float = 0.0
+    rows: int = 0
+
+
+_operation: ContextVar[str] = ContextVar(
+    'database_operation', default=UNKNOWN_OPERATION
+)
+_request_stats: ContextVar[RequestDatabaseStats | None] = ContextVar(
+    'request_database_stats',
+    default=None,
+)
+
+
+@contextmanager
+def database_operation(name: str) -> Iterator[None]:
+    token = _operation.set(name)
+    try:
+        yield
+    finally:
+        _operation.reset(token)
+
+
+def current_database_operation() -> str:
+    return _operation.get()
+
+
+GatewayT = TypeVar('GatewayT', bound=type)
+
+
+def instrument_gateway(cls: GatewayT) -> GatewayT:
+    """
+    Подписывает запросы публичных методов гейтвея как `Gateway.method` в метриках
+    и оборачивает методы в спаны слоя gateway
+    """
+    for name, method in list(vars(cls).items()):
+        if name.startswith('_') or not inspect.iscoroutinefunction(method):
+            continue
+
+        setattr(cls, name, _with_operation(method, f'{cls.__name__}.{name}'))
+
+    return cls
+
+
+def _with_operation(method, operation: str):
+    @wraps(method)
+    async def wrapper(*args, **kwargs):
+        with database_operation(operation), span(operation, layer='gateway'):
+            return await method(*args, **kwargs)
+
+    return wrapper
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, '_metrics_started', None)
+    if started is None:
+        return
+
+    duration = time.perf_counter() - started
+    # asyncpg берёт rowcount из статуса команды, в том числе для SELECT;
+    # -1 бывает только у серверных курсоров, их строки не считаются
+    rows = max(cursor.rowcount, 0)
+
+    operation = _operation.get()
+    DB_QUERIES.labels(operation).inc()
+    DB_QUERY_DURATION.labels(operation).observe(duration)
+    DB_ROWS.labels(operation).inc(rows)
+
+    if context.cache_hit is CacheStats.CACHE_HIT:
+        DB_STATEMENT_CACHE.labels('hit').inc()
+    elif context.cache_hit is CacheStats.CACHE_MISS:
+        DB_STATEMENT_CACHE.labels('miss').inc()
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.duration += duration
+        stats.rows += rows
+
+
+class PrometheusMiddleware:
+    """Замеряет время HTTP запросов и работу с БД в разрезе шаблонов роутов"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        stats = RequestDatabaseStats()
+        token = _request_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - started
+            _request_stats.reset(token)
+
+            route = scope.get('route')
+            route_path = route.path if route is not None else UNMATCHED_ROUTE
+
+            REQUEST_DURATION.labels(
+                scope['method'],
+                route_path,
+                str(status_code),
+            ).observe(duration)
+            REQUEST_DB_QUERIES.labels(route_path).observe(stats.queries)
+            REQUEST_DB_DURATION.labels(route_path).observe(stats.duration)
+            REQUEST_DB_ROWS.labels(route_path).observe(stats.rows)
+
+
+def render_metrics() -> tuple[bytes, str]:
+    """Метрики в текстовом формате Prometheus, при работе в gunicorn - по всем воркерам"""
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return generate_latest(registry), CONTENT_TYPE_LATEST
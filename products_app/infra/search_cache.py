@@ -0,0 +1,196 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
+
+from products_app.application.dto.product import ProductExpand, ProductFieldsDTO
+from products_app.infra.database.catalog_changes import (
+    CatalogChangeListener,
+    catalog_version,
+)
+from products_app.infra.database.routing import is_pinned_to_primary
+from products_app.infra.metrics import SEARCH_CACHE_LOOKUPS, SEARCH_CACHE_SIZE
+
+
+logger = logging.getLogger(__name__)
+
+
+def _canonical_value(value: Any) -> Any:
+    # 500 и 500.0 фильтруют одинаково
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def search_cache_key(
+    filters: dict[str, Any] | None,
+    limit: int,
+    offset: int,
+    fields: ProductFieldsDTO | None = None,
+    expand: ProductExpand | None = None,
+) -> str:
+    """Ключ, одинаковый для запросов с одними и теми же фильтрами в любом порядке"""
+    return json.dumps(
+        {
+            'filters': {
+                key: _canonical_value(value) for key, value in (filters or {}).items()
+            },
+            'limit': limit,
+            'offset': offset,
+            'fields': fields and [fields.fields, fields.attribute_keys],
+            'expand': expand,
+        },
+        sort_keys=True,
+        separators=(',', ':'),
+        ensure_ascii=False,
+    )
+
+
+def category_tree_cache_key(depth: int) -> str:
+    return json.dumps({'category_tree': {'depth': depth}}, separators=(',', ':'))
+
+
+@dataclass(slots=True)
+class CacheEntry:
+    body: bytes
+    version: int
+    created_at: float
+    stale_since: float | None = None
+    # Сжатые варианты ответа по кодировкам
+    encoded: dict[str, bytes] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + sum(len(body) for body in self.encoded.values())
+
+
+@dataclass(slots=True)
+class CacheLookup:
+    body: bytes | None = None
+    # Ответ, сжатый запрошенной кодировкой, если он уже есть в кеше
+    encoded: bytes | None = None
+    stale: bool = False
+    # Устаревший ответ отдан, и этот запрос должен обновить запись в фоне
+    refresh: bool = False
+
+
+class SearchResultCache:
+    """
+    Кеш закодированных ответов поиска товаров и дерева категорий в воркере.
+
+    Запись действительна, пока не изменилась версия каталога и не прошло `ttl` секунд.
+    Устаревшую запись можно отдавать ещё `stale_ttl` секунд, пока один из запросов
+    обновляет её в фоне. Вместе с ответом хранятся его сжатые варианты, чтобы сжимать ответ
+    один раз на кодировку. Размер ограничен `max_bytes` с учётом сжатых вариантов,
+    вытесняются давно не запрошенные записи.
+
+    Кеш работает, только пока `listener` получает уведомления об изменениях из других воркеров,
+    и не используется для клиентов, закреплённых за мастером после записи
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        ttl: float,
+        stale_ttl: float,
+        listener: CatalogChangeListener | None,
+    ):
+        self.listener = listener
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._stale_ttl = stale_ttl
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._size = 0
+        self._refreshing: set[str] = set()
+
+    @property
+    def enabled(self) -> bool:
+        return self.listener is not None and self.listener.listening
+
+    @property
+    def version(self) -> int:
+        return catalog_version.value
+
+    def lookup(self, key: str, encoding: str | None = None) -> CacheLookup:
+        if not self.enabled or is_pinned_to_primary():
+            SEARCH_CACHE_LOOKUPS.labels('bypass').inc()
+            return CacheLookup()
+
+        entry = self._entries.get(key)
+        if entry is None:
+            SEARCH_CACHE_LOOKUPS.labels('miss').inc()
+            return CacheLookup()
+
+        now = time.monotonic()
+        self._entries.move_to_end(key)
+        if entry.version == self.version and now - entry.created_at < self._ttl:
+            SEARCH_CACHE_LOOKUPS.labels('hit').inc()
+            return CacheLookup(body=entry.body, encoded=entry.encoded.get(encoding))
+
+        if entry.stale_since is None:
+            entry.stale_since = min(now, entry.created_at + self._ttl)
+
+        if now - entry.stale_since >= self._stale_ttl:
+            SEARCH_CACHE_LOOKUPS.labels('miss').inc()
+            self._remove(key)
+            return CacheLookup()
+
+        SEARCH_CACHE_LOOKUPS.labels('stale').inc()
+        refresh = key not in self._refreshing
+        if refresh:
+            self._refreshing.add(key)
+        return CacheLookup(
+            body=entry.body,
+            encoded=entry.encoded.get(encoding),
+            stale=True,
+            refresh=refresh,
+        )
+
+    def store(self, key: str, body: bytes, version: int) -> None:
+        """`version` - версия каталога до начала запроса, из которого получен ответ"""
+        if not self.enabled or len(body) > self._max_bytes:
+            return
+
+        self._remove(key)
+        self._entries[key] = CacheEntry(
+            body=body,
+            version=version,
+            created_at=time.monotonic(),
+        )
+        self._size += len(body)
+        self._evict()
+
+    def store_encoded(self, key: str, encoding: str, body: bytes) -> None:
+        """Добавляет к записи ответ, сжатый кодировкой `encoding`"""
+        entry = self._entries.get(key)
+        if entry is None or encoding in entry.encoded:
+            return
+
+        entry.encoded[encoding] = body
+        self._size += len(body)
+        self._evict()
+
+    async def refresh(self, key: str, load: Callable[[], Awaitable[bytes]]) -> None:
+        version = self.version
+        try:
+            self.store(key, await load(), version)
+        except Exception:
+            logger.warning('Failed to refresh search cache entry', exc_info=True)
+        finally:
+            self._refreshing.discard(key)
+
+    def _remove(self, key: str) -> None:
+        # Новой или заново сохранённой записи снова нужен запрос, который её обновит
+        self._refreshing.discard(key)
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+            SEARCH_CACHE_SIZE.set(self._size)
+
+    def _evict(self) -> None:
+        while self._size > self._max_bytes:
+            self._remove(next(iter(self._entries)))
+
+        SEARCH_CACHE_SIZE.set(self._size)
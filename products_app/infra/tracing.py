@@ -0,0 +1,406 @@
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Iterator, Protocol
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from products_app.config import TracingConfig
+
+
+logger = logging.getLogger(__name__)
+
+TRACEPARENT_RE = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+# Виды спанов OTLP
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+# Слои, время которых попадает в Server-Timing
+LAYERS = ('interactor', 'gateway', 'db')
+
+
+@dataclass(slots=True)
+class Span:
+    name: str
+    layer: str
+    trace_id: str
+    span_id: str
+    parent_span_id: str | None
+    kind: int = SPAN_KIND_INTERNAL
+    start_time_ns: int = field(default_factory=time.time_ns)
+    end_time_ns: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    duration: float = 0.0
+    attributes: dict[str, Any] = field(default_factory=dict)
+    error: bool = False
+
+    def end(self) -> None:
+        self.end_time_ns = time.time_ns()
+        self.duration = time.perf_counter() - self.started
+
+    def to_otlp(self) -> dict:
+        otlp_span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': self.kind,
+            'startTimeUnixNano': str(self.start_time_ns),
+            'endTimeUnixNano': str(self.end_time_ns),
+            'attributes': [
+                {'key': key, 'value': _otlp_value(value)}
+                for key, value in self.attributes.items()
+            ],
+            'status': {'code': 2 if self.error else 0},
+        }
+        if self.parent_span_id is not None:
+            otlp_span['parentSpanId'] = self.parent_span_id
+
+        return otlp_span
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+@dataclass(slots=True)
+class Trace:
+    trace_id: str
+    sampled: bool
+    spans: list[Span] = field(default_factory=list)
+    layer_durations: dict[str, float] = field(
+        default_factory=lambda: dict.fromkeys(LAYERS, 0.0),
+    )
+
+
+_trace: ContextVar[Trace | None] = ContextVar('trace', default=None)
+_current_span: ContextVar[Span | None] = ContextVar('current_span', default=None)
+
+
+def _new_id(bits: int) -> str:
+    return f'{random.getrandbits(bits):0{bits // 4}x}'
+
+
+def start_span(
+    name: str,
+    layer: str,
+    kind: int = SPAN_KIND_INTERNAL,
+    **attributes: Any,
+) -> Span | None:
+    """Начинает спан в текущем трейсе, без активного трейса ничего не делает"""
+    trace = _trace.get()
+    if trace is None:
+        return None
+
+    parent = _current_span.get()
+    return Span(
+        name=name,
+        layer=layer,
+        kind=kind,
+        trace_id=trace.trace_id,
+        span_id=_new_id(64),
+        parent_span_id=parent.span_id if parent is not None else None,
+        attributes=attributes,
+    )
+
+
+def end_span(span: Span, parent: Span | None) -> None:
+    span.end()
+
+    trace = _trace.get()
+    if trace is None:
+        return
+
+    trace.spans.append(span)
+    # Вложенные спаны того же слоя уже учтены во внешнем
+    if span.layer in trace.layer_durations and (
+        parent is None or parent.layer != span.layer
+    ):
+        trace.layer_durations[span.layer] += span.duration
+
+
+@contextmanager
+def span(name: str, layer: str, **attributes: Any) -> Iterator[Span | None]:
+    current = start_span(name=name, layer=layer, **attributes)
+    if current is None:
+        yield None
+        return
+
+    parent = _current_span.get()
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException:
+        current.error = True
+        raise
+    finally:
+        _current_span.reset(token)
+        end_span(current, parent)
+
+
+def instrument_interactor(cls: type) -> type:
+    """Оборачивает вызов интерактора в спан слоя interactor"""
+    call = cls.__call__
+
+    @wraps(call)
+    async def traced_call(self, *args, **kwargs):
+        if _trace.get() is None:
+            return await call(self, *args, **kwargs)
+
+        with span(cls.__name__, layer='interactor'):
+            return await call(self, *args, **kwargs)
+
+    cls.__call__ = traced_call
+    return cls
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is None or _trace.get() is None:
+        return
+
+    db_span = start_span(
+        name=statement.split(None, 1)[0] if statement else 'query',
+        layer='db',
+        kind=SPAN_KIND_CLIENT,
+        **{'db.system': 'postgresql', 'db.statement': statement[:1000]},
+    )
+    context._trace_span = db_span
+    context._trace_parent_span = _current_span.get()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    db_span = getattr(context, '_trace_span', None)
+    if db_span is not None:
+        context._trace_span = None
+        end_span(db_span, context._trace_parent_span)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    db_span = getattr(context, '_trace_span', None)
+    if db_span is not None:
+        context._trace_span = None
+        db_span.error = True
+        end_span(db_span, context._trace_parent_span)
+
+
+class SpanExporter(Protocol):
+    def export(self, payload: dict) -> None:
+        raise NotImplementedError
+
+
+class FileSpanExporter(SpanExporter):
+    """Пишет спаны в файл в формате OTLP JSON, по запросу на строку"""
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def export(self, payload: dict) -> None:
+        with open(self._path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(payload, separators=(',', ':')) + '\n')
+
+
+class OTLPHttpSpanExporter(SpanExporter):
+    """Отправляет спаны в коллектор по OTLP/HTTP в JSON"""
+
+    def __init__(self, endpoint: str, timeout: float = 5):
+        self._endpoint = endpoint
+        self._timeout = timeout
+
+    def export(self, payload: dict) -> None:
+        request = urllib.request.Request(
+            self._endpoint,
+            data=json.dumps(payload).encode(),
+            headers={'Content-Type': 'application/json'},
+            method='POST',
+        )
+        with urllib.request.urlopen(request, timeout=self._timeout):
+            pass
+
+
+class BackgroundSpanExporter:
+    """Экспортирует трейсы в отдельном потоке, чтобы не блокировать event loop"""
+
+    def __init__(
+        self, exporter: SpanExporter, service_name: str, max_queue_size: int = 2048
+    ):
+        self._exporter = exporter
+        self._resource = {
+            'attributes': [
+                {'key': 'service.name', 'value': {'stringValue': service_name}},
+                {'key': 'process.pid', 'value': {'intValue': str(os.getpid())}},
+            ],
+        }
+        self._queue: queue.Queue[list[Span]] = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(
+            target=self._run, name='span-exporter', daemon=True
+        )
+        self._thread.start()
+
+    def export(self, spans: list[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            # Лучше потерять трейс, чем копить память, если коллектор недоступен
+            logger.warning('Span export queue is full, trace dropped')
+
+    def _payload(self, spans: list[Span]) -> dict:
+        return {
+            'resourceSpans': [
+                {
+                    'resource': self._resource,
+                    'scopeSpans': [
+                        {
+                            'scope': {'name': 'products_app'},
+                            'spans': [span.to_otlp() for span in spans],
+                        },
+                    ],
+                },
+            ],
+        }
+
+    def _run(self) -> None:
+        while True:
+            spans = self._queue.get()
+            try:
+                self._exporter.export(self._payload(spans))
+            except Exception:
+                logger.exception('Failed to export spans')
+
+
+def new_span_exporter(config: TracingConfig) -> BackgroundSpanExporter | None:
+    if config.TRACING_EXPORTER == 'file':
+        exporter = FileSpanExporter(path=config.TRACING_FILE_PATH)
+    elif config.TRACING_EXPORTER == 'otlp':
+        exporter = OTLPHttpSpanExporter(endpoint=config.TRACING_OTLP_ENDPOINT)
+    else:
+        return None
+
+    return BackgroundSpanExporter(
+        exporter=exporter,
+        service_name=config.TRACING_SERVICE_NAME,
+    )
+
+
+class TracingMiddleware:
+    """
+    Открывает трейс на каждый HTTP запрос.
+
+    Продолжает трейс из заголовка W3C `traceparent`, если он есть.
+    С `server_timing=True` добавляет в ответ заголовок `Server-Timing` с временем по слоям.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        exporter: BackgroundSpanExporter | None,
+        server_timing: bool,
+        sample_ratio: float,
+    ):
+        self.app = app
+        self.exporter = exporter
+        self.server_timing = server_timing
+        self.sample_ratio = sample_ratio
+
+    def _new_trace(self, scope: Scope) -> tuple[Trace, str | None]:
+        traceparent = Request(scope).headers.get('traceparent', '')
+        match = TRACEPARENT_RE.match(traceparent)
+        if (
+            match is not None
+            and match.group(1) != '0' * 32
+            and match.group(2) != '0' * 16
+        ):
+            trace_id, parent_span_id, flags = match.groups()
+            sampled = bool(int(flags, 16) & 1)
+            return Trace(trace_id=trace_id, sampled=sampled), parent_span_id
+
+        sampled = random.random() < self.sample_ratio
+        return Trace(trace_id=_new_id(128), sampled=sampled), None
+
+    @staticmethod
+    def _server_timing(trace: Trace, root: Span) -> str:
+        total = time.perf_counter() - root.started
+        # Всё, что вне интерактора: валидация, сериализация ответа, middleware
+        router = max(total - trace.layer_durations['interactor'], 0.0)
+        metrics = [f'total;dur={total * 1000:.2f}', f'router;dur={router * 1000:.2f}']
+        metrics.extend(
+            f'{layer};dur={duration * 1000:.2f}'
+            for layer, duration in trace.layer_durations.items()
+        )
+        flags = '01' if trace.sampled else '00'
+        metrics.append(f'traceparent;desc="00-{trace.trace_id}-{root.span_id}-{flags}"')
+        return ', '.join(metrics)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+
+        trace, parent_span_id = self._new_trace(scope)
+        root = Span(
+            name=scope['method'],
+            layer='request',
+            kind=SPAN_KIND_SERVER,
+            trace_id=trace.trace_id,
+            span_id=_new_id(64),
+            parent_span_id=parent_span_id,
+            attributes={
+                'http.request.method': scope['method'],
+                'url.path': scope['path'],
+            },
+        )
+
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                root.attributes['http.response.status_code'] = message['status']
+                root.error = message['status'] >= 500
+                if self.server_timing:
+                    MutableHeaders(scope=message).append(
+                        'server-timing',
+                        self._server_timing(trace, root),
+                    )
+            await send(message)
+
+        trace_token = _trace.set(trace)
+        span_token = _current_span.set(root)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            root.error = True
+            raise
+        finally:
+            _current_span.reset(span_token)
+            _trace.reset(trace_token)
+
+            route = scope.get('route')
+            if route is not None:
+                root.name = f'{scope["method"]} {route.path}'
+                root.attributes['http.route'] = route.path
+            root.end()
+            trace.spans.append(root)
+
+            if self.exporter is not None and trace.sampled:
+                self.exporter.export(trace.spans)
@@ -1,7 +1,18 @@
+from typing import AsyncIterator
+
 from dishka import AnyOf, Provider, Scope, provide
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from products_app.application.interfaces.catalog_change import (
+    CatalogChangePruner,
+    CatalogChangeReader,
+)
 from products_app.application.interfaces.category import (
     CategoryDeleter,
+    CategoryDeletionJobGatewayProtocol,
+    CategoryDeletionJobReader,
+    CategoryDeletionJobSaver,
+    CategoryDeletionJobUpdater,
     CategoryGatewayProtocol,
     CategoryReader,
     CategorySaver,
@@ -13,32 +24,130 @@ from products_app.application.interfaces.product import (
     ProductReader,
     ProductSaver,
     ProductUpdater,
+    ProductWriter,
 )
+from products_app.application.interfaces.unit_of_work import UnitOfWork
+from products_app.config import AppConfig
+from products_app.infra.database.group_commit import (
+    GroupCommitProductWriter,
+    SessionProductWriter,
+)
+from products_app.infra.database.loader import new_point_loader
+from products_app.infra.database.models import CategoryModel, ProductModel
+from products_app.infra.database.routing import ReaderSessionMakers
+from products_app.infra.database.session import ReaderSessionHandle, SessionHandle
+from products_app.infra.gateways.catalog_change import CatalogChangeGateway
 from products_app.infra.gateways.category import CategoryGateway
+from products_app.infra.gateways.category_deletion_job import (
+    CategoryDeletionJobGateway,
+)
 from products_app.infra.gateways.product import ProductGateway
 
 
 class GatewaysProvider(Provider):
-    scope = Scope.REQUEST
-
-    category_gateway = provide(
-        CategoryGateway,
-        provides=AnyOf[
-            CategoryReader,
-            CategorySaver,
-            CategoryDeleter,
-            CategoryUpdater,
-            CategoryGatewayProtocol,
-        ],
-    )
-
-    product_gateway = provide(
-        ProductGateway,
-        provides=AnyOf[
-            ProductReader,
-            ProductSaver,
-            ProductDeleter,
-            ProductUpdater,
-            ProductGatewayProtocol,
-        ],
-    )
+    # Гейтвеи без состояния живут всё время работы приложения,
+    # сессию текущего запроса они получают через SessionHandle
+    scope = Scope.APP
+
+    @provide
+    def get_category_gateway(
+        self,
+        session: SessionHandle,
+    ) -> AnyOf[
+        CategorySaver,
+        CategoryDeleter,
+        CategoryUpdater,
+        CategoryGatewayProtocol,
+    ]:
+        return CategoryGateway(session=session)
+
+    @provide
+    def get_category_reader(
+        self,
+        session: ReaderSessionHandle,
+        config: AppConfig,
+        reader_session_makers: ReaderSessionMakers,
+    ) -> CategoryReader:
+        return CategoryGateway(
+            session=session,
+            loader=new_point_loader(
+                model=CategoryModel,
+                session_makers=reader_session_makers,
+                config=config.postgres,
+            ),
+        )
+
+    @provide
+    def get_product_gateway(
+        self,
+        session: SessionHandle,
+    ) -> AnyOf[
+        ProductSaver,
+        ProductDeleter,
+        ProductUpdater,
+        ProductGatewayProtocol,
+    ]:
+        return ProductGateway(session=session)
+
+    @provide
+    def get_product_reader(
+        self,
+        session: ReaderSessionHandle,
+        config: AppConfig,
+        reader_session_makers: ReaderSessionMakers,
+    ) -> ProductReader:
+        return ProductGateway(
+            session=session,
+            loader=new_point_loader(
+                model=ProductModel,
+                session_makers=reader_session_makers,
+                config=config.postgres,
+            ),
+        )
+
+    @provide
+    async def get_product_writer(
+        self,
+        config: AppConfig,
+        async_session_maker: async_sessionmaker[AsyncSession],
+        product_gateway: ProductSaver,
+        uow: UnitOfWork,
+    ) -> AsyncIterator[ProductWriter]:
+        if not config.postgres.POSTGRES_WRITE_BATCHING:
+            yield SessionProductWriter(product_gateway=product_gateway, uow=uow)
+            return
+
+        product_writer = GroupCommitProductWriter(
+            session_maker=async_session_maker,
+            delay=config.postgres.POSTGRES_WRITE_BATCH_DELAY,
+            max_batch_size=config.postgres.POSTGRES_WRITE_BATCH_MAX_SIZE,
+            statement_timeout=config.postgres.POSTGRES_WRITE_BATCH_STATEMENT_TIMEOUT,
+        )
+        yield product_writer
+        await product_writer.close()
+
+    @provide
+    def get_category_deletion_job_gateway(
+        self,
+        session: SessionHandle,
+    ) -> AnyOf[
+        CategoryDeletionJobReader,
+        CategoryDeletionJobSaver,
+        CategoryDeletionJobUpdater,
+        CategoryDeletionJobGatewayProtocol,
+    ]:
+        return CategoryDeletionJobGateway(session=session)
+
+    @provide
+    def get_catalog_change_reader(
+        self,
+        session: ReaderSessionHandle,
+    ) -> CatalogChangeReader:
+        return CatalogChangeGateway(session=session)
+
+    @provide
+    def get_catalog_change_pruner(
+        self,
+        session: SessionHandle,
+    ) -> CatalogChangePruner:
+        return CatalogChangeGateway(session=session)
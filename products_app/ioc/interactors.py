@@ -1,35 +1,66 @@
 from dishka import Provider, Scope, provide_all
 
+from products_app.application.interactors.catalog_change import (
+    GetCatalogChangesInteractor,
+    PruneCatalogChangesInteractor,
+)
 from products_app.application.interactors.category import (
+    BulkCreateCategoriesInteractor,
     CreateCategoryInteractor,
     DeleteCategoryInteractor,
     GetAllCategoriesInteractor,
+    GetCategoryDeletionJobInteractor,
     GetRootCategoriesInteractor,
     GetCategoryByIdInteractor,
+    GetUnfinishedCategoryDeletionJobsInteractor,
+    RunCategoryDeletionJobInteractor,
+    StartCategoryDeletionInteractor,
     UpdateCategoryInteractor,
 )
+from products_app.application.interactors.monitoring import (
+    GetPoolStatsInteractor,
+    GetSlowQueriesInteractor,
+)
 from products_app.application.interactors.product import (
+    CheckRenderedProductsInteractor,
     CreateProductInteractor,
     DeleteProductInteractor,
     GetAllProductsInteractor,
     GetProductByIdInteractor,
     UpdateProductInteractor,
 )
+from products_app.infra.tracing import instrument_interactor
+
+
+INTERACTORS = (
+    GetRootCategoriesInteractor,
+    GetCategoryByIdInteractor,
+    CreateCategoryInteractor,
+    BulkCreateCategoriesInteractor,
+    GetAllCategoriesInteractor,
+    UpdateCategoryInteractor,
+    DeleteCategoryInteractor,
+    StartCategoryDeletionInteractor,
+    RunCategoryDeletionJobInteractor,
+    GetCategoryDeletionJobInteractor,
+    GetUnfinishedCategoryDeletionJobsInteractor,
+    GetAllProductsInteractor,
+    GetProductByIdInteractor,
+    UpdateProductInteractor,
+    DeleteProductInteractor,
+    CreateProductInteractor,
+    CheckRenderedProductsInteractor,
+    GetPoolStatsInteractor,
+    GetSlowQueriesInteractor,
+    GetCatalogChangesInteractor,
+    PruneCatalogChangesInteractor,
+)
+
+for interactor in INTERACTORS:
+    instrument_interactor(interactor)
 
 
 class InteractorsProvider(Provider):
-    scope = Scope.REQUEST
+    scope = Scope.APP
 
-    interactors = provide_all(
-        GetRootCategoriesInteractor,
-        GetCategoryByIdInteractor,
-        CreateCategoryInteractor,
-        GetAllCategoriesInteractor,
-        UpdateCategoryInteractor,
-        DeleteCategoryInteractor,
-        GetAllProductsInteractor,
-        GetProductByIdInteractor,
-        UpdateProductInteractor,
-        DeleteProductInteractor,
-        CreateProductInteractor,
-    )
+    interactors = provide_all(*INTERACTORS)
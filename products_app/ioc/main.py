@@ -1,6 +1,5 @@
 import datetime as dt
-from typing import AsyncIterable
-
+from typing import AsyncIterator
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 from uuid import uuid4
 
@@ -10,9 +9,19 @@ from products_app.application.interfaces.common import (
     DateTimeNowGenerator,
     UUIDGenerator,
 )
+from products_app.application.interfaces.monitoring import (
+    PoolStatsReader,
+    SlowQueryReader,
+)
 from products_app.application.interfaces.unit_of_work import UnitOfWork
 from products_app.config import AppConfig
+from products_app.infra.database.catalog_changes import CatalogChangeListener
 from products_app.infra.database.database import new_engine, new_session_maker
+from products_app.infra.database.pool import EnginePoolStatsReader
+from products_app.infra.database.routing import ReaderSessionMakers
+from products_app.infra.database.slow_queries import SlowQueryLog
+from products_app.infra.database.session import ReaderSessionHandle, SessionHandle
+from products_app.infra.search_cache import SearchResultCache
 from products_app.ioc.gateways import GatewaysProvider
 from products_app.ioc.interactors import InteractorsProvider
 
@@ -29,8 +38,22 @@ class AppProvider(Provider):
         return dt.datetime.utcnow
 
     @provide(scope=Scope.APP)
-    def get_async_engine(self, config: AppConfig) -> AsyncEngine:
-        return new_engine(database_uri=config.postgres.database_uri)
+    def get_slow_query_log(
+        self, config: AppConfig
+    ) -> AnyOf[SlowQueryLog, SlowQueryReader]:
+        return SlowQueryLog(max_size=config.postgres.POSTGRES_SLOW_QUERY_LOG_SIZE)
+
+    @provide(scope=Scope.APP)
+    def get_async_engine(
+        self,
+        config: AppConfig,
+        slow_query_log: SlowQueryLog,
+    ) -> AsyncEngine:
+        return new_engine(
+            database_uri=config.postgres.database_uri,
+            config=config.postgres,
+            slow_query_log=slow_query_log,
+        )
 
     @provide(scope=Scope.APP)
     def get_async_sessionmaker(
@@ -39,13 +62,86 @@ class AppProvider(Provider):
     ) -> async_sessionmaker[AsyncSession]:
         return new_session_maker(engine=engine)
 
-    @provide(scope=Scope.REQUEST)
-    async def get_async_session(
+    @provide(scope=Scope.APP)
+    def get_reader_session_makers(
+        self,
+        config: AppConfig,
+        engine: AsyncEngine,
+        slow_query_log: SlowQueryLog,
+    ) -> ReaderSessionMakers:
+        return ReaderSessionMakers(
+            primary_engine=engine,
+            replica_engines=[
+                new_engine(
+                    database_uri=uri,
+                    config=config.postgres,
+                    name=f'replica_{number}',
+                    slow_query_log=slow_query_log,
+                )
+                for number, uri in enumerate(config.postgres.POSTGRES_REPLICA_URIS)
+            ],
+        )
+
+    @provide(scope=Scope.APP)
+    async def get_search_result_cache(
+        self,
+        config: AppConfig,
+    ) -> AsyncIterator[SearchResultCache]:
+        # Через PgBouncer в режиме transaction уведомления LISTEN не доходят.
+        # С репликами кеш выключен: ответ, прочитанный с отстающей реплики после уведомления,
+        # сохранился бы под новой версией каталога и отдавался бы до истечения TTL
+        listener = None
+        if (
+            config.search_cache.SEARCH_CACHE_MAX_BYTES > 0
+            and config.postgres.POSTGRES_POOL_PROFILE != 'pgbouncer'
+            and not config.postgres.POSTGRES_REPLICA_URIS
+        ):
+            listener = CatalogChangeListener(config=config.postgres)
+            listener.start()
+
+        yield SearchResultCache(
+            max_bytes=config.search_cache.SEARCH_CACHE_MAX_BYTES,
+            ttl=config.search_cache.SEARCH_CACHE_TTL,
+            stale_ttl=config.search_cache.SEARCH_CACHE_STALE_TTL,
+            listener=listener,
+        )
+
+        if listener is not None:
+            await listener.stop()
+
+    @provide(scope=Scope.APP)
+    def get_pool_stats_reader(
+        self,
+        engine: AsyncEngine,
+        reader_session_makers: ReaderSessionMakers,
+    ) -> PoolStatsReader:
+        engines = {'primary': engine}
+        for number, replica_engine in enumerate(reader_session_makers.replica_engines):
+            engines[f'replica_{number}'] = replica_engine
+
+        return EnginePoolStatsReader(engines=engines)
+
+    @provide(scope=Scope.APP)
+    def get_session_handle(
         self,
         async_session_maker: async_sessionmaker[AsyncSession],
-    ) -> AsyncIterable[AnyOf[AsyncSession, UnitOfWork]]:
-        async with async_session_maker() as session:
-            yield session
+    ) -> AnyOf[SessionHandle, UnitOfWork]:
+        return SessionHandle(session_factory=async_session_maker)
+
+    @provide(scope=Scope.APP)
+    def get_reader_session_handle(
+        self,
+        reader_session_makers: ReaderSessionMakers,
+        session_handle: SessionHandle,
+    ) -> ReaderSessionHandle:
+        def new_reader_session() -> AsyncSession:
+            reader_session_maker = reader_session_makers.choose()
+            if reader_session_maker is None:
+                return session_handle.session
+
+            return reader_session_maker()
+
+        return ReaderSessionHandle(SessionHandle(session_factory=new_reader_session))
 
 
 providers = (
@@ -1,12 +1,34 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+
 from dishka import make_async_container
 from dishka.integrations.fastapi import setup_dishka
 from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine
 
 from products_app.config import AppConfig, get_app_config
+from products_app.controllers.http.errors import setup_error_handlers
+from products_app.controllers.http.routers.category import (
+    resume_category_deletion_jobs,
+)
 from products_app.controllers.http.routers.main import router
+from products_app.infra.compression import CompressionMiddleware
+from products_app.infra.database.routing import (
+    ReadYourWritesMiddleware,
+    ReaderSessionMakers,
+)
+from products_app.infra.database.session import SessionScopeMiddleware
+from products_app.infra.database.timeouts import StatementTimeoutMiddleware
+from products_app.infra.database.warmup import warm_up_engine
+from products_app.infra.metrics import PrometheusMiddleware
+from products_app.infra.search_cache import SearchResultCache
+from products_app.infra.tracing import TracingMiddleware, new_span_exporter
 from products_app.ioc.main import providers
 
 
+logger = logging.getLogger(__name__)
+
 app_config = get_app_config('.env')
 container = make_async_container(
     *providers,
@@ -16,10 +38,86 @@ container = make_async_container(
 )
 
 
+async def warm_up(app: FastAPI) -> None:
+    """
+    Прогревает пулы основной БД и реплик, возобновляет незавершённые задачи удаления категорий,
+    после чего помечает приложение готовым
+    """
+    dishka_container = app.state.dishka_container
+    config = await dishka_container.get(AppConfig)
+    engine = await dishka_container.get(AsyncEngine)
+    reader_session_makers = await dishka_container.get(ReaderSessionMakers)
+    # Запускает подписку на изменения каталога, пока прогреваются пулы
+    await dishka_container.get(SearchResultCache)
+
+    for warmed_engine in (engine, *reader_session_makers.replica_engines):
+        await warm_up_engine(
+            engine=warmed_engine,
+            connections=config.warmup.WARMUP_CONNECTIONS,
+            category_tree_depth=config.warmup.WARMUP_CATEGORY_TREE_DEPTH,
+        )
+
+    await resume_category_deletion_jobs(dishka_container)
+
+    app.state.ready = True
+
+
+def _log_warm_up_error(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        logger.error('Warm-up failed', exc_info=task.exception())
+
+
+@asynccontextmanager
+async def background_warm_up(app: FastAPI):
+    """
+    Прогревает приложение в фоне после старта, пока прогрев идёт, `/health/ready` отвечает 503
+    """
+    app.state.warm_up_task = asyncio.create_task(warm_up(app))
+    app.state.warm_up_task.add_done_callback(_log_warm_up_error)
+    try:
+        yield
+    finally:
+        app.state.warm_up_task.cancel()
+        # Ошибка прогрева уже записана в лог
+        with suppress(asyncio.CancelledError, Exception):
+            await app.state.warm_up_task
+
+
+def with_warm_up(lifespan=None):
+    @asynccontextmanager
+    async def warm_up_lifespan(app: FastAPI):
+        if lifespan is None:
+            async with background_warm_up(app):
+                yield
+            return
+
+        async with lifespan(app) as state, background_warm_up(app):
+            yield state
+
+    return warm_up_lifespan
+
+
 def create_fastapi_app(lifespan=None):
-    app = FastAPI(lifespan=lifespan)
+    app = FastAPI(lifespan=with_warm_up(lifespan))
+    app.state.ready = False
 
     setup_dishka(container=container, app=app)
+    app.add_middleware(SessionScopeMiddleware)
+    app.add_middleware(
+        ReadYourWritesMiddleware,
+        window=app_config.postgres.POSTGRES_READ_YOUR_WRITES_SECONDS,
+    )
+    app.add_middleware(StatementTimeoutMiddleware)
+    app.add_middleware(CompressionMiddleware, config=app_config.compression)
+    app.add_middleware(PrometheusMiddleware)
+    if app_config.tracing.TRACING_ENABLED:
+        app.add_middleware(
+            TracingMiddleware,
+            exporter=new_span_exporter(app_config.tracing),
+            server_timing=app_config.tracing.TRACING_SERVER_TIMING,
+            sample_ratio=app_config.tracing.TRACING_SAMPLE_RATIO,
+        )
+    setup_error_handlers(app)
 
     app.include_router(router)
 
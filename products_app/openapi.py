@@ -4,3 +4,6 @@ from enum import Enum
 class OpenAPITags(str, Enum):
     categories = 'Categories'
     products = 'Products'
+    changes = 'Changes'
+    internal = 'Internal'
+    health = 'Health'
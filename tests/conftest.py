@@ -1,3 +1,5 @@
+import asyncio
+
 from dishka import AsyncContainer, make_async_container
 from dishka.integrations.fastapi import setup_dishka
 from fastapi import FastAPI
@@ -9,11 +11,12 @@ from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
 from products_app.config import AppConfig, get_app_config
 from products_app.infra.database.models.base import BaseModel
+from products_app.infra.search_cache import SearchResultCache
 from products_app.ioc.main import providers
 from products_app.main import create_fastapi_app
 
 
-pytest_plugins = ['tests.docker_services']
+pytest_plugins = ['tests.docker_services', 'tests.query_budget']
 
 
 @pytest.fixture
@@ -21,6 +24,24 @@ async def db_engine(container) -> AsyncEngine:
     return await container.get(AsyncEngine)
 
 
+@pytest.fixture
+async def listening_search_cache(container) -> SearchResultCache:
+    search_cache = await container.get(SearchResultCache)
+    await asyncio.wait_for(search_cache.listener.wait_listening(), timeout=5)
+    return search_cache
+
+
+@pytest.fixture
+def search_cache(request: pytest.FixtureRequest) -> SearchResultCache:
+    # Данные теста записываются до подписки на уведомления, в каком бы порядке
+    # ни были указаны фикстуры: иначе уведомление о записи может прийти посреди теста и сбросить кеш
+    for name in request.fixturenames:
+        if name.startswith('prepared_'):
+            request.getfixturevalue(name)
+
+    return request.getfixturevalue('listening_search_cache')
+
+
 @pytest.fixture
 async def async_session_factory(container) -> async_sessionmaker[AsyncSession]:
     return await container.get(async_sessionmaker[AsyncSession])
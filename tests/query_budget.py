@@ -0,0 +1,125 @@
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Callable, ContextManager, Iterator
+
+import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from products_app.infra.database.slow_queries import normalize_statement
+
+
+@dataclass(slots=True)
+class QueryLog:
+    statements: list[str] = field(default_factory=list)
+    # Запросы, включая служебные SET, плюс BEGIN, COMMIT и ROLLBACK вне autocommit
+    round_trips: int = 0
+
+    def report(self, title: str, queries: int, round_trips: int | None) -> str:
+        lines = [
+            f'{title}: {len(self.statements)} queries (budget {queries}), '
+            f'{self.round_trips} round trips (budget {round_trips})',
+            '',
+            f'--- budget ({queries} queries)',
+            f'+++ executed ({len(self.statements)} queries)',
+        ]
+        # Запросы сверх бюджета помечены как добавленные
+        for number, statement in enumerate(self.statements, start=1):
+            marker = '+' if number > queries else ' '
+            lines.append(f'{marker} {number}. {normalize_statement(statement)}')
+
+        repeated = [
+            (statement, count)
+            for statement, count in Counter(
+                normalize_statement(statement) for statement in self.statements
+            ).items()
+            if count > 1
+        ]
+        if repeated:
+            lines.extend(['', 'Repeated statements (possible N+1):'])
+            lines.extend(f'  {count}x {statement}' for statement, count in repeated)
+
+        return '\n'.join(lines)
+
+
+_active_logs: list[QueryLog] = []
+
+
+def _in_autocommit(conn) -> bool:
+    return bool(getattr(conn.connection.dbapi_connection, 'autocommit', False))
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    for log in _active_logs:
+        log.round_trips += 1
+        # SET statement_timeout - служебный запрос, в бюджет запросов он не входит
+        if not statement.startswith('SET '):
+            log.statements.append(statement)
+
+
+def _count_transaction_round_trip(conn) -> None:
+    if _in_autocommit(conn):
+        return
+
+    for log in _active_logs:
+        log.round_trips += 1
+
+
+for _event_name in ('begin', 'commit', 'rollback'):
+    event.listen(Engine, _event_name, _count_transaction_round_trip)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryLog]:
+    """Собирает запросы ко всем движкам, выполненные внутри блока"""
+    log = QueryLog()
+    _active_logs.append(log)
+    try:
+        yield log
+    finally:
+        _active_logs.remove(log)
+
+
+def format_ids(value: Any, **ids: str) -> Any:
+    """Подставляет id из фикстур в шаблоны url и тел запросов в таблицах бюджетов"""
+    if isinstance(value, str):
+        return value.format(**ids)
+    if isinstance(value, list):
+        return [format_ids(item, **ids) for item in value]
+    if isinstance(value, dict):
+        return {key: format_ids(item, **ids) for key, item in value.items()}
+
+    return value
+
+
+QueryBudget = Callable[..., ContextManager[QueryLog]]
+
+
+@pytest.fixture
+def query_budget() -> QueryBudget:
+    """
+    Проверяет, что блок укладывается в бюджет запросов к БД.
+
+    При превышении тест падает со списком выполненных запросов, лишние помечены `+`:
+
+        with query_budget('GET /categories/root?depth=5', queries=1):
+            await ac.get('/categories/root', params={'depth': 5})
+    """
+
+    @contextmanager
+    def check_budget(
+        title: str,
+        queries: int,
+        round_trips: int | None = None,
+    ) -> Iterator[QueryLog]:
+        with count_queries() as log:
+            yield log
+
+        if len(log.statements) > queries or (
+            round_trips is not None and log.round_trips > round_trips
+        ):
+            pytest.fail(log.report(title, queries, round_trips), pytrace=False)
+
+    return check_budget
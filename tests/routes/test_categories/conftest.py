@@ -9,16 +9,17 @@ from products_app.application.interfaces.unit_of_work import UnitOfWork
 from products_app.domain.entitites.category import (
     CategoryEntity,
 )
+from products_app.infra.database.session import session_scope
 
 
 @pytest.fixture(scope='function')
 async def prepared_category(
     container: AsyncContainer,
 ) -> CategoryEntity:
-    async with container() as nested_container:
-        category_gateway = await nested_container.get(CategoryGatewayProtocol)
-        uow = await nested_container.get(UnitOfWork)
+    category_gateway = await container.get(CategoryGatewayProtocol)
+    uow = await container.get(UnitOfWork)
 
+    async with session_scope():
         category = CategoryEntity(
             id=str(uuid4()),
             name='test category',
@@ -28,8 +29,9 @@ async def prepared_category(
         await category_gateway.save(category)
         await uow.commit()
 
-        yield category
+    yield category
 
+    async with session_scope():
         await category_gateway.delete(category.id)
         await uow.commit()
 
@@ -38,10 +40,10 @@ async def prepared_category(
 async def prepared_categories(
     container: AsyncContainer,
 ) -> list[CategoryEntity]:
-    async with container() as nested_container:
-        category_gateway = await nested_container.get(CategoryGatewayProtocol)
-        uow = await nested_container.get(UnitOfWork)
+    category_gateway = await container.get(CategoryGatewayProtocol)
+    uow = await container.get(UnitOfWork)
 
+    async with session_scope():
         categories = [
             CategoryEntity(
                 id=str(uuid4()),
@@ -55,8 +57,9 @@ async def prepared_categories(
             await category_gateway.save(category)
         await uow.commit()
 
-        yield categories
+    yield categories
 
+    async with session_scope():
         for category in categories:
             await category_gateway.delete(category.id)
         await uow.commit()
@@ -66,10 +69,10 @@ async def prepared_categories(
 async def nested_categories(
     container: AsyncContainer,
 ) -> tuple[CategoryEntity, CategoryEntity]:
-    async with container() as nested_container:
-        category_gateway = await nested_container.get(CategoryGatewayProtocol)
-        uow = await nested_container.get(UnitOfWork)
+    category_gateway = await container.get(CategoryGatewayProtocol)
+    uow = await container.get(UnitOfWork)
 
+    async with session_scope():
         root_category = CategoryEntity(
             name='root category',
             id=str(uuid4()),
@@ -86,8 +89,40 @@ async def nested_categories(
         await category_gateway.save(sub_category)
         await uow.commit()
 
-        yield root_category, sub_category
+    yield root_category, sub_category
 
+    async with session_scope():
         await category_gateway.delete(root_category.id)
         await category_gateway.delete(sub_category.id)
         await uow.commit()
+
+
+@pytest.fixture(scope='function')
+async def deep_categories(
+    container: AsyncContainer,
+) -> list[CategoryEntity]:
+    """Цепочка из 7 вложенных категорий, от корневой к самой глубокой"""
+    category_gateway = await container.get(CategoryGatewayProtocol)
+    uow = await container.get(UnitOfWork)
+
+    categories = []
+    parent_category_id = None
+    async with session_scope():
+        for level in range(7):
+            category = CategoryEntity(
+                name=f'category level {level}',
+                id=str(uuid4()),
+                created_at=datetime.utcnow(),
+                parent_category_id=parent_category_id,
+            )
+            await category_gateway.save(category)
+            categories.append(category)
+            parent_category_id = category.id
+        await uow.commit()
+
+    yield categories
+
+    async with session_scope():
+        for category in reversed(categories):
+            await category_gateway.delete(category.id)
+        await uow.commit()
@@ -1,13 +1,30 @@
+import asyncio
+import time
+from datetime import datetime
+from typing import Any
 from uuid import uuid4
 
 import pytest
 from dishka import AsyncContainer
 from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine
 
-from products_app.application.interfaces.category import CategoryGatewayProtocol
+from products_app.application.interfaces.category import (
+    CategoryDeletionJobSaver,
+    CategoryGatewayProtocol,
+)
+from products_app.application.interfaces.unit_of_work import UnitOfWork
+from products_app.controllers.http.routers.category import (
+    resume_category_deletion_jobs,
+)
 from products_app.domain.entitites.category import (
+    CategoryDeletionJobEntity,
+    CategoryDeletionStatus,
     CategoryEntity,
 )
+from products_app.infra.database.locks import advisory_lock
+from products_app.infra.database.session import session_scope
+from tests.query_budget import QueryBudget, format_ids
 
 
 def category_to_json_dict(category: CategoryEntity) -> dict:
@@ -154,7 +171,7 @@ async def test_create_category_success(ac: AsyncClient, container: AsyncContaine
 
     category_json = response.json()
 
-    async with container() as nested_container:
+    async with container() as nested_container, session_scope():
         category_gateway: CategoryGatewayProtocol = await nested_container.get(
             CategoryGatewayProtocol,
         )
@@ -192,7 +209,7 @@ async def test_update_category_success(
 
     assert response.status_code == 204, f'Wrong status code: {response.status_code}'
 
-    async with container() as nested_container:
+    async with container() as nested_container, session_scope():
         category_gateway: CategoryGatewayProtocol = await nested_container.get(
             CategoryGatewayProtocol,
         )
@@ -240,7 +257,7 @@ async def test_delete_category_success(
 
     assert response.status_code == 204, f'Wrong status code: {response.status_code}'
 
-    async with container() as nested_container:
+    async with container() as nested_container, session_scope():
         category_gateway: CategoryGatewayProtocol = await nested_container.get(
             CategoryGatewayProtocol,
         )
@@ -267,7 +284,7 @@ async def test_delete_parent_category(
 
     assert response.status_code == 204, f'Wrong status code: {response.status_code}'
 
-    async with container() as nested_container:
+    async with container() as nested_container, session_scope():
         category_gateway: CategoryGatewayProtocol = await nested_container.get(
             CategoryGatewayProtocol,
         )
@@ -280,3 +297,408 @@ async def test_delete_parent_category(
         assert (
             db_sub_category.parent_category_id is None
         ), 'Sub category parent id is not None'
+
+
+async def test_bulk_create_categories_nested(
+    ac: AsyncClient,
+    container: AsyncContainer,
+    prepared_category: CategoryEntity,
+):
+    response = await ac.post(
+        '/categories/bulk',
+        json=[
+            {
+                'temp_id': 'root',
+                'name': 'Root',
+                'parent_category_id': prepared_category.id,
+                'sub_categories': [
+                    {
+                        'temp_id': 'child',
+                        'name': 'Child',
+                        'sub_categories': [{'temp_id': 'leaf', 'name': 'Leaf'}],
+                    },
+                ],
+            },
+        ],
+    )
+
+    assert response.status_code == 201, f'Wrong status code: {response.status_code}'
+
+    ids = response.json()['ids']
+    assert set(ids) == {'root', 'child', 'leaf'}
+
+    async with container() as nested_container, session_scope():
+        category_gateway: CategoryGatewayProtocol = await nested_container.get(
+            CategoryGatewayProtocol,
+        )
+
+        root = await category_gateway.get_by_id(ids['root'])
+        child = await category_gateway.get_by_id(ids['child'])
+        leaf = await category_gateway.get_by_id(ids['leaf'])
+
+        assert str(root.parent_category_id) == prepared_category.id
+        assert str(child.parent_category_id) == ids['root']
+        assert str(leaf.parent_category_id) == ids['child']
+
+
+async def test_bulk_create_categories_flat_unordered(
+    ac: AsyncClient,
+    container: AsyncContainer,
+):
+    response = await ac.post(
+        '/categories/bulk',
+        json=[
+            {'temp_id': 'leaf', 'name': 'Leaf', 'parent_temp_id': 'child'},
+            {'temp_id': 'child', 'name': 'Child', 'parent_temp_id': 'root'},
+            {'temp_id': 'root', 'name': 'Root'},
+        ],
+    )
+
+    assert response.status_code == 201, f'Wrong status code: {response.status_code}'
+
+    ids = response.json()['ids']
+    async with container() as nested_container, session_scope():
+        category_gateway: CategoryGatewayProtocol = await nested_container.get(
+            CategoryGatewayProtocol,
+        )
+
+        leaf = await category_gateway.get_by_id(ids['leaf'])
+
+        assert str(leaf.parent_category_id) == ids['child']
+
+
+@pytest.mark.parametrize(
+    'categories',
+    [
+        [
+            {'temp_id': 'a', 'name': 'A', 'parent_temp_id': 'b'},
+            {'temp_id': 'b', 'name': 'B', 'parent_temp_id': 'a'},
+        ],
+        [{'temp_id': 'a', 'name': 'A', 'parent_temp_id': 'a'}],
+        [{'temp_id': 'a', 'name': 'A', 'parent_temp_id': 'unknown'}],
+        [{'temp_id': 'a', 'name': 'A'}, {'temp_id': 'a', 'name': 'A'}],
+    ],
+    ids=['cycle', 'self reference', 'dangling parent', 'duplicate temp id'],
+)
+async def test_bulk_create_categories_bad_tree(
+    ac: AsyncClient,
+    container: AsyncContainer,
+    categories: list[dict],
+):
+    response = await ac.post('/categories/bulk', json=categories)
+
+    assert response.status_code == 400, f'Wrong status code: {response.status_code}'
+
+    async with container() as nested_container, session_scope():
+        category_gateway: CategoryGatewayProtocol = await nested_container.get(
+            CategoryGatewayProtocol,
+        )
+
+        assert await category_gateway.get_all(limit=10, offset=0) == []
+
+
+async def test_bulk_create_categories_bad_parent_id(ac: AsyncClient):
+    response = await ac.post(
+        '/categories/bulk',
+        json=[
+            {'temp_id': 'root', 'name': 'Root', 'parent_category_id': str(uuid4())},
+        ],
+    )
+
+    assert response.status_code == 404, f'Wrong status code: {response.status_code}'
+
+
+async def test_category_deletion_job_success(
+    ac: AsyncClient,
+    container: AsyncContainer,
+    nested_categories: tuple[CategoryEntity, CategoryEntity],
+):
+    parent_category, sub_category = nested_categories
+
+    response = await ac.post(
+        f'/categories/{parent_category.id}/deletion-jobs?batch_size=1',
+    )
+
+    assert response.status_code == 202, f'Wrong status code: {response.status_code}'
+
+    job_id = response.json()['id']
+    # Задача выполняется отдельно от запроса
+    deadline = time.monotonic() + 5
+    while True:
+        response = await ac.get(f'/categories/deletion-jobs/{job_id}')
+        assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+
+        job = response.json()
+        if job['status'] not in ('pending', 'running') or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.01)
+
+    assert job['status'] == 'done'
+    assert job['detached_sub_categories'] == 1
+    assert job['detached_products'] == 0
+    assert job['finished_at'] is not None
+
+    async with container() as nested_container, session_scope():
+        category_gateway: CategoryGatewayProtocol = await nested_container.get(
+            CategoryGatewayProtocol,
+        )
+
+        db_parent_category = await category_gateway.get_by_id(parent_category.id)
+        db_sub_category = await category_gateway.get_by_id(sub_category.id)
+
+        assert db_parent_category is None, 'Parent category not deleted'
+        assert db_sub_category.parent_category_id is None
+
+
+async def save_running_deletion_job(
+    container: AsyncContainer,
+    category_id: str,
+) -> CategoryDeletionJobEntity:
+    """Задача, которую выполнял воркер, перезапущенный посреди удаления"""
+    job_gateway = await container.get(CategoryDeletionJobSaver)
+    uow = await container.get(UnitOfWork)
+
+    job = CategoryDeletionJobEntity(
+        id=str(uuid4()),
+        created_at=datetime.utcnow(),
+        category_id=category_id,
+        batch_size=1,
+        status=CategoryDeletionStatus.running,
+        detached_products=5,
+        detached_sub_categories=0,
+        finished_at=None,
+        error=None,
+    )
+    async with session_scope():
+        await job_gateway.save(job)
+        await uow.commit()
+
+    return job
+
+
+async def test_category_deletion_job_resumed(
+    ac: AsyncClient,
+    container: AsyncContainer,
+    nested_categories: tuple[CategoryEntity, CategoryEntity],
+):
+    parent_category, sub_category = nested_categories
+    job = await save_running_deletion_job(container, parent_category.id)
+
+    assert await resume_category_deletion_jobs(container) == [job.id]
+
+    deadline = time.monotonic() + 5
+    while True:
+        response = await ac.get(f'/categories/deletion-jobs/{job.id}')
+        job_json = response.json()
+        if job_json['status'] == 'done' or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.01)
+
+    assert job_json['status'] == 'done'
+    # Прогресс продолжается с сохранённого
+    assert job_json['detached_products'] == 5
+    assert job_json['detached_sub_categories'] == 1
+
+    response = await ac.get(f'/categories/{parent_category.id}')
+    assert response.status_code == 404
+    response = await ac.get(f'/categories/{sub_category.id}')
+    assert response.json()['parent_category_id'] is None
+
+
+async def test_category_deletion_job_not_resumed_while_locked(
+    ac: AsyncClient,
+    container: AsyncContainer,
+    db_engine: AsyncEngine,
+    nested_categories: tuple[CategoryEntity, CategoryEntity],
+):
+    parent_category, _ = nested_categories
+    job = await save_running_deletion_job(container, parent_category.id)
+
+    # Задачу ещё выполняет другой воркер
+    async with advisory_lock(db_engine, f'category_deletion_job:{job.id}') as locked:
+        assert locked
+        await resume_category_deletion_jobs(container)
+        await asyncio.sleep(0.2)
+
+    response = await ac.get(f'/categories/deletion-jobs/{job.id}')
+    assert response.json()['status'] == 'running'
+    response = await ac.get(f'/categories/{parent_category.id}')
+    assert response.status_code == 200
+
+
+async def test_category_deletion_job_category_not_found(ac: AsyncClient):
+    response = await ac.post(f'/categories/{uuid4()}/deletion-jobs')
+
+    assert response.status_code == 404, f'Wrong status code: {response.status_code}'
+
+
+async def test_category_deletion_job_not_found(ac: AsyncClient):
+    response = await ac.get(f'/categories/deletion-jobs/{uuid4()}')
+
+    assert response.status_code == 404, f'Wrong status code: {response.status_code}'
+
+
+async def test_get_all_categories_cursor(
+    ac: AsyncClient,
+    prepared_categories: list[CategoryEntity],
+):
+    categories = []
+    cursor = None
+    while True:
+        params = {'limit': 4}
+        if cursor is not None:
+            params['cursor'] = cursor
+
+        response = await ac.get('/categories/', params=params)
+
+        assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+
+        categories.extend(response.json())
+        cursor = response.headers.get('X-Next-Cursor')
+        if cursor is None:
+            break
+
+    assert categories == [
+        category_to_json_dict(category) for category in prepared_categories
+    ]
+
+
+async def test_get_all_categories_by_parent(
+    ac: AsyncClient,
+    nested_categories: tuple[CategoryEntity, CategoryEntity],
+):
+    root_category, sub_category = nested_categories
+
+    response = await ac.get(
+        '/categories/',
+        params={'parent_category_id': root_category.id},
+    )
+
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+    assert response.json() == [category_to_json_dict(sub_category)]
+
+
+@pytest.mark.parametrize(
+    ('cursor',),
+    (
+        ('abc',),
+        ('W10',),
+        ('WyJhIiwiYiJd',),
+    ),
+)
+async def test_get_all_categories_bad_cursor(ac: AsyncClient, cursor: str):
+    response = await ac.get(f'/categories/?cursor={cursor}')
+
+    assert response.status_code == 400
+
+
+async def test_write_pins_client_to_primary(ac: AsyncClient):
+    response = await ac.post(
+        '/categories/',
+        json={
+            'name': 'Test category',
+            'parent_category_id': None,
+        },
+    )
+
+    assert response.status_code == 201, f'Wrong status code: {response.status_code}'
+    assert 'db_primary_until' in response.cookies
+
+    response = await ac.get(f'/categories/{response.json()["id"]}')
+
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+    assert 'db_primary_until' not in response.cookies
+
+
+# Бюджеты запросов к БД на эндпоинт: (метод, url, тело, запросы, обмены с БД)
+# Массовое создание делает по запросу на каждый уровень дерева
+CATEGORY_QUERY_BUDGETS = [
+    ('GET', '/categories/root?depth=0', None, 1, 2),
+    ('GET', '/categories/root?depth=1', None, 1, 2),
+    ('GET', '/categories/root?depth=5', None, 1, 2),
+    ('GET', '/categories/', None, 1, 2),
+    ('GET', '/categories/?parent_category_id={root_id}', None, 1, 2),
+    ('GET', '/categories/{root_id}', None, 1, 2),
+    (
+        'POST',
+        '/categories/',
+        {'name': 'Category', 'parent_category_id': '{root_id}'},
+        1,
+        4,
+    ),
+    (
+        'POST',
+        '/categories/bulk',
+        [
+            {
+                'temp_id': 'root',
+                'name': 'Root',
+                'sub_categories': [{'temp_id': 'leaf', 'name': 'Leaf'}],
+            }
+        ],
+        2,
+        4,
+    ),
+    (
+        'PUT',
+        '/categories/{sub_id}',
+        {'name': 'Category', 'parent_category_id': '{root_id}'},
+        2,
+        5,
+    ),
+    ('DELETE', '/categories/{sub_id}', None, 1, 4),
+]
+
+
+@pytest.mark.parametrize(
+    'method, url, body, queries, round_trips',
+    CATEGORY_QUERY_BUDGETS,
+    ids=[f'{method} {url}' for method, url, *_ in CATEGORY_QUERY_BUDGETS],
+)
+async def test_category_query_budget(
+    ac: AsyncClient,
+    query_budget: QueryBudget,
+    nested_categories: tuple[CategoryEntity, CategoryEntity],
+    method: str,
+    url: str,
+    body: Any,
+    queries: int,
+    round_trips: int,
+):
+    root_category, sub_category = nested_categories
+    ids = {'root_id': root_category.id, 'sub_id': sub_category.id}
+    url = format_ids(url, **ids)
+
+    with query_budget(f'{method} {url}', queries=queries, round_trips=round_trips):
+        response = await ac.request(
+            method,
+            url,
+            json=format_ids(body, **ids),
+        )
+
+    assert response.status_code < 400, f'Wrong status code: {response.status_code}'
+
+
+@pytest.mark.parametrize('depth', [1, 5])
+async def test_category_tree_query_budget_deep_tree(
+    ac: AsyncClient,
+    query_budget: QueryBudget,
+    deep_categories: list[CategoryEntity],
+    depth: int,
+):
+    url = f'/categories/root?depth={depth}'
+    # Бюджет тот же, что и для неглубокого дерева: запросов не больше с ростом глубины
+    with query_budget(f'GET {url}', queries=1, round_trips=2):
+        response = await ac.get(url)
+
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+
+    # Уровней в ответе столько, сколько задано в depth, глубже вложенные категории обрезаны
+    levels = []
+    node = response.json()[0]
+    while node['sub_categories']:
+        levels.append(node['id'])
+        node = node['sub_categories'][0]
+    assert levels == [category.id for category in deep_categories[:depth]]
+    assert node['id'] == deep_categories[depth].id
+    assert node['sub_categories'] is None
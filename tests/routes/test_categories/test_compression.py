@@ -0,0 +1,132 @@
+import asyncio
+import time
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+import zstandard
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from products_app.domain.entitites.category import CategoryEntity
+from products_app.infra.compression import COMPRESSORS, negotiate_encoding
+from products_app.infra.database.models import CategoryModel
+from products_app.infra.search_cache import SearchResultCache
+
+
+ENCODINGS = ('zstd', 'br', 'gzip')
+
+
+@pytest.mark.parametrize(
+    'accept_encoding, encoding',
+    [
+        ('gzip, br;q=0.5', 'gzip'),
+        ('gzip, br, zstd', 'zstd'),
+        ('br;q=0.8, gzip;q=0.8', 'br'),
+        ('*;q=0.1, zstd;q=0', 'br'),
+        ('gzip;q=0', None),
+        ('gzip;q=abc', None),
+        ('identity', None),
+        ('', None),
+    ],
+)
+def test_negotiate_encoding(accept_encoding: str, encoding: str | None):
+    assert negotiate_encoding(accept_encoding, ENCODINGS) == encoding
+
+
+async def test_category_tree_compressed_once(
+    ac: AsyncClient,
+    search_cache: SearchResultCache,
+    prepared_categories: list[CategoryEntity],
+    monkeypatch: pytest.MonkeyPatch,
+):
+    compressed = []
+
+    def compress_zstd(body: bytes, level: int) -> bytes:
+        compressed.append(level)
+        return zstandard.compress(body, level)
+
+    monkeypatch.setitem(COMPRESSORS, 'zstd', compress_zstd)
+
+    plain = await ac.get('/categories/root?depth=0', headers={'Accept-Encoding': ''})
+    first = await ac.get(
+        '/categories/root?depth=0',
+        headers={'Accept-Encoding': 'zstd'},
+    )
+    second = await ac.get(
+        '/categories/root?depth=0',
+        headers={'Accept-Encoding': 'gzip;q=0.5, zstd'},
+    )
+
+    assert 'content-encoding' not in plain.headers
+    assert plain.headers['vary'] == 'Accept-Encoding'
+    assert (first.headers['x-cache'], second.headers['x-cache']) == ('HIT', 'HIT')
+    assert (
+        first.headers['content-encoding']
+        == second.headers['content-encoding']
+        == 'zstd'
+    )
+    assert first.headers['vary'] == 'Accept-Encoding'
+    # httpx распаковывает ответ сам
+    assert second.content == plain.content
+    # Сжатый вариант хранится в кеше, уровень задан роутом
+    assert compressed == [12]
+
+
+async def test_category_tree_cache_invalidated_by_other_worker(
+    ac: AsyncClient,
+    search_cache: SearchResultCache,
+    db_engine: AsyncEngine,
+    prepared_categories: list[CategoryEntity],
+):
+    response = await ac.get('/categories/root?depth=0')
+    assert len(response.json()) == len(prepared_categories)
+
+    # Запись мимо сессий приложения, о ней воркер узнаёт только из уведомления
+    version = search_cache.version
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            insert(CategoryModel).values(
+                id=uuid4(),
+                name='new category',
+                created_at=datetime.utcnow(),
+            ),
+        )
+
+    deadline = time.monotonic() + 5
+    while search_cache.version == version and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+    response = await ac.get('/categories/root?depth=0')
+    assert response.headers['x-cache'] == 'MISS'
+    assert len(response.json()) == len(prepared_categories) + 1
+
+
+async def test_response_compressed_by_middleware(
+    ac: AsyncClient,
+    prepared_categories: list[CategoryEntity],
+):
+    response = await ac.get('/categories/', headers={'Accept-Encoding': 'gzip'})
+
+    assert response.status_code == 200
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.headers['vary'] == 'Accept-Encoding'
+    assert response.num_bytes_downloaded == int(response.headers['content-length'])
+    assert response.num_bytes_downloaded < len(response.content)
+    assert len(response.json()) == len(prepared_categories)
+
+
+async def test_small_response_not_compressed(
+    ac: AsyncClient,
+    prepared_category: CategoryEntity,
+):
+    response = await ac.get(
+        f'/categories/{prepared_category.id}',
+        headers={'Accept-Encoding': 'gzip, br, zstd'},
+    )
+
+    assert response.status_code == 200
+    assert 'content-encoding' not in response.headers
+    assert 'vary' not in response.headers
+    assert response.json()['id'] == prepared_category.id
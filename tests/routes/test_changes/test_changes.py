@@ -0,0 +1,176 @@
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+async def read_changes(ac: AsyncClient, since: str | None, limit: int = 500) -> dict:
+    params = {'limit': limit}
+    if since is not None:
+        params['since'] = since
+
+    response = await ac.get('/changes', params=params)
+    assert response.status_code == 200
+    return response.json()
+
+
+async def read_all_changes(
+    ac: AsyncClient,
+    since: str | None = None,
+) -> tuple[list[tuple[str, str, bool]], str | None]:
+    changes = []
+    while True:
+        page = await read_changes(ac, since, limit=2)
+        since = page['next_cursor']
+        if not page['changes']:
+            return changes, since
+
+        changes.extend(
+            (change['entity'], change['id'], change['deleted'])
+            for change in page['changes']
+        )
+
+
+async def test_changes_follow_writes(ac: AsyncClient):
+    response = await ac.post(
+        '/categories/',
+        json={'name': 'test category', 'parent_category_id': None},
+    )
+    category_id = response.json()['id']
+    response = await ac.post(
+        '/products/',
+        json={
+            'name': 'test product',
+            'description': 'test description',
+            'price': 50.0,
+            'stock': 10.0,
+            'unit': 'kg',
+            'unit_size': 1.0,
+            'category_id': category_id,
+            'attributes': {'test': 10},
+        },
+    )
+    product_id = response.json()['id']
+
+    changes, since = await read_all_changes(ac)
+    assert changes == [
+        ('category', category_id, False),
+        ('product', product_id, False),
+    ]
+
+    response = await ac.delete(f'/categories/{category_id}')
+    assert response.status_code == 204
+    response = await ac.delete(f'/products/{product_id}')
+    assert response.status_code == 204
+
+    changes, next_since = await read_all_changes(ac, since)
+    # Удаление категории отвязывает товар каскадом ON DELETE SET NULL
+    assert changes == [
+        ('category', category_id, True),
+        ('product', product_id, False),
+        ('product', product_id, True),
+    ]
+
+    # Курсор пустой страницы остаётся на месте
+    page = await read_changes(ac, next_since)
+    assert page == {'changes': [], 'next_cursor': next_since}
+
+
+async def test_changes_wait_for_open_transactions(
+    ac: AsyncClient,
+    db_engine: AsyncEngine,
+):
+    async with db_engine.connect() as connection:
+        # Транзакция, начатая раньше, но закоммиченная позже записи через API
+        await connection.execute(
+            text(
+                'INSERT INTO category (id, name, created_at) '
+                "VALUES (gen_random_uuid(), 'slow category', now())",
+            ),
+        )
+
+        response = await ac.post(
+            '/categories/',
+            json={'name': 'fast category', 'parent_category_id': None},
+        )
+        assert response.status_code == 201
+        fast_category_id = response.json()['id']
+
+        changes, since = await read_all_changes(ac)
+        assert changes == []
+
+        await connection.commit()
+
+    changes, _ = await read_all_changes(ac, since)
+    assert [change_id for _, change_id, _ in changes][1:] == [fast_category_id]
+
+
+async def test_changes_bad_cursor(ac: AsyncClient):
+    response = await ac.get('/changes', params={'since': 'abc'})
+
+    assert response.status_code == 400
+    assert response.json() == {'detail': 'Bad cursor'}
+
+
+async def test_prune_old_changes(ac: AsyncClient, db_engine: AsyncEngine):
+    for name in ('old category', 'new category'):
+        response = await ac.post(
+            '/categories/',
+            json={'name': name, 'parent_category_id': None},
+        )
+        assert response.status_code == 201
+    new_category_id = response.json()['id']
+
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text(
+                "UPDATE catalog_change SET created_at = created_at - interval '40 days' "
+                'WHERE entity_id <> :id',
+            ),
+            {'id': new_category_id},
+        )
+
+    response = await ac.post('/internal/changes/prune')
+    assert response.status_code == 200
+    assert response.json() == {'deleted': 1}
+
+    changes, _ = await read_all_changes(ac)
+    assert changes == [('category', new_category_id, False)]
+
+    response = await ac.post('/internal/changes/prune', params={'older_than_days': 0})
+    assert response.status_code == 422
+
+
+async def test_pruned_cursor_gone(ac: AsyncClient, db_engine: AsyncEngine):
+    category_ids = []
+    cursors = []
+    for name in ('first category', 'second category', 'third category'):
+        response = await ac.post(
+            '/categories/',
+            json={'name': name, 'parent_category_id': None},
+        )
+        category_ids.append(response.json()['id'])
+        _, since = await read_all_changes(ac, cursors[-1] if cursors else None)
+        cursors.append(since)
+
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text(
+                "UPDATE catalog_change SET created_at = created_at - interval '40 days' "
+                'WHERE entity_id <> :id',
+            ),
+            {'id': category_ids[2]},
+        )
+    response = await ac.post('/internal/changes/prune')
+    assert response.json() == {'deleted': 2}
+
+    # Изменения после курсора удалены, потребитель должен перечитать каталог
+    response = await ac.get('/changes', params={'since': cursors[0]})
+    assert response.status_code == 410
+    assert response.json() == {
+        'detail': 'Changes after the cursor were pruned, resync the catalog',
+    }
+
+    # С позиции последнего удалённого изменения и без курсора лента читается дальше
+    for since in (cursors[1], None):
+        changes, _ = await read_all_changes(ac, since)
+        assert changes == [('category', category_ids[2], False)]
@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from products_app.config import AppConfig
+from products_app.main import warm_up
+
+
+async def test_readiness_after_warm_up(
+    ac: AsyncClient,
+    app: FastAPI,
+    db_engine: AsyncEngine,
+    config: AppConfig,
+):
+    response = await ac.get('/health/ready')
+    assert response.status_code == 503, f'Wrong status code: {response.status_code}'
+
+    await warm_up(app)
+
+    response = await ac.get('/health/ready')
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+    assert response.json() == {'status': 'ready'}
+    assert db_engine.pool.checkedin() >= config.warmup.WARMUP_CONNECTIONS
+
+
+async def test_not_ready_while_warming_up(
+    ac: AsyncClient,
+    app: FastAPI,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    warm_up_started = asyncio.Event()
+    finish_warm_up = asyncio.Event()
+
+    async def slow_warm_up_engine(**kwargs) -> None:
+        warm_up_started.set()
+        await finish_warm_up.wait()
+
+    monkeypatch.setattr('products_app.main.warm_up_engine', slow_warm_up_engine)
+
+    async with app.router.lifespan_context(app):
+        # Прогрев идёт в фоне после старта приложения
+        await asyncio.wait_for(warm_up_started.wait(), timeout=5)
+        response = await ac.get('/health/ready')
+        assert response.status_code == 503, f'Wrong status code: {response.status_code}'
+
+        finish_warm_up.set()
+        await asyncio.wait_for(app.state.warm_up_task, timeout=5)
+
+        response = await ac.get('/health/ready')
+        assert response.status_code == 200, f'Wrong status code: {response.status_code}'
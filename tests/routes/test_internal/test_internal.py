@@ -0,0 +1,60 @@
+from uuid import uuid4
+
+from httpx import AsyncClient
+
+
+async def test_get_pool_stats(ac: AsyncClient):
+    response = await ac.get('/internal/pool')
+
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+
+    primary_pool = response.json()[0]
+    assert primary_pool['name'] == 'primary'
+    assert primary_pool['waiting'] == 0
+    assert primary_pool['connect_latency']['count'] >= 1
+    assert (
+        primary_pool['checkout_wait']['buckets']['+Inf']
+        == (primary_pool['checkout_wait']['count'])
+    )
+
+
+async def test_get_metrics(ac: AsyncClient):
+    await ac.get(f'/products/{uuid4()}')
+
+    response = await ac.get('/metrics')
+
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+    assert (
+        'http_request_duration_seconds_count{method="GET",route="/products/{product_id}",status="404"}'
+        in response.text
+    )
+    assert 'db_queries_total{operation="ProductGateway.get_by_id"}' in response.text
+    assert (
+        'http_request_db_queries_count{route="/products/{product_id}"}' in response.text
+    )
+    assert 'db_pool_checked_out{pool="primary"}' in response.text
+
+
+def metric_value(metrics: str, sample: str) -> float:
+    for line in metrics.splitlines():
+        if line.startswith(f'{sample} '):
+            return float(line.rsplit(' ', 1)[1])
+
+    return 0.0
+
+
+async def test_metrics_count_selected_rows(ac: AsyncClient):
+    for i in range(3):
+        await ac.post(
+            '/categories/',
+            json={'name': f'test category {i}', 'parent_category_id': None},
+        )
+
+    sample = 'db_rows_total{operation="CategoryGateway.get_all"}'
+    rows_before = metric_value((await ac.get('/metrics')).text, sample)
+
+    response = await ac.get('/categories/')
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+
+    rows_after = metric_value((await ac.get('/metrics')).text, sample)
+    assert rows_after - rows_before == 3
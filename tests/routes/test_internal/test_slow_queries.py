@@ -0,0 +1,98 @@
+import dataclasses
+
+import pytest
+from httpx import AsyncClient
+
+from products_app.config import AppConfig
+from products_app.infra.database import slow_queries
+from products_app.infra.database.slow_queries import SlowQueryLog, normalize_statement
+from products_app.infra.metrics import UNKNOWN_OPERATION, current_database_operation
+
+
+@pytest.fixture
+def config(config) -> AppConfig:
+    # Порог ниже времени любого запроса, чтобы в журнал попадало всё
+    return dataclasses.replace(
+        config,
+        postgres=config.postgres.model_copy(
+            update={
+                'POSTGRES_SLOW_QUERY_THRESHOLD': 1e-9,
+                'POSTGRES_SLOW_QUERY_EXPLAIN_RATIO': 1.0,
+            },
+        ),
+    )
+
+
+@pytest.mark.parametrize(
+    'statement, normalized',
+    [
+        (
+            'SELECT *\n  FROM products\n WHERE products.id = $1::VARCHAR',
+            'SELECT * FROM products WHERE products.id = ?::VARCHAR',
+        ),
+        (
+            'SELECT * FROM products WHERE id IN ($1, $2, $3) AND price > $4',
+            'SELECT * FROM products WHERE id IN (?, ...) AND price > ?',
+        ),
+        (
+            'INSERT INTO categories (id, name) VALUES ($1, $2), ($3, $4), ($5, $6)',
+            'INSERT INTO categories (id, name) VALUES (?, ...), ...',
+        ),
+    ],
+)
+def test_normalize_statement(statement: str, normalized: str):
+    assert normalize_statement(statement) == normalized
+
+
+async def test_get_slow_queries(ac: AsyncClient, container):
+    for price in (100, 200):
+        response = await ac.post(
+            '/products/search',
+            json={'price__gt': price, 'color__eq': 'red'},
+        )
+        assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+
+    slow_query_log = await container.get(SlowQueryLog)
+    await slow_query_log.wait_for_plans()
+
+    response = await ac.get('/internal/slow-queries', params={'limit': 200})
+
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+
+    search = next(
+        query
+        for query in response.json()
+        if query['operation'] == 'ProductGateway.get_all'
+    )
+    assert search['database'] == 'primary'
+    assert search['shape'] == ['color__eq', 'price__gt']
+    assert search['calls'] == 2
+    assert search['max_time'] <= search['total_time']
+    assert '$1' not in search['statement']
+    assert search['plan'][0]['Plan']['Actual Loops'] >= 1
+    assert 'Shared Hit Blocks' in search['plan'][0]['Plan']
+
+
+async def test_slow_query_explained_outside_request_context(
+    ac: AsyncClient,
+    container,
+    monkeypatch: pytest.MonkeyPatch,
+):
+    operations = []
+    explain = slow_queries._explain
+
+    async def spy_explain(*args) -> None:
+        operations.append(current_database_operation())
+        await explain(*args)
+
+    monkeypatch.setattr(slow_queries, '_explain', spy_explain)
+
+    response = await ac.post('/products/search', json={'price__gt': 100})
+    assert response.status_code == 200, f'Wrong status code: {response.status_code}'
+
+    slow_query_log = await container.get(SlowQueryLog)
+    await slow_query_log.wait_for_plans()
+
+    # Запрос EXPLAIN не засчитывается операции гейтвея, которая выполнила медленный запрос
+    assert operations
+    assert set(operations) == {UNKNOWN_OPERATION}
@@ -0,0 +1,71 @@
+from uuid import uuid4
+
+import pytest
+from dishka.integrations.fastapi import setup_dishka
+from httpx import AsyncClient
+
+from products_app.infra.tracing import Span, TracingMiddleware
+from products_app.main import create_fastapi_app
+
+
+class ListSpanExporter:
+    def __init__(self):
+        self.traces: list[list[Span]] = []
+
+    def export(self, spans: list[Span]) -> None:
+        self.traces.append(spans)
+
+
+@pytest.fixture
+def span_exporter() -> ListSpanExporter:
+    return ListSpanExporter()
+
+
+@pytest.fixture
+async def traced_ac(container, span_exporter):
+    app = create_fastapi_app()
+    app.add_middleware(
+        TracingMiddleware,
+        exporter=span_exporter,
+        server_timing=True,
+        sample_ratio=1.0,
+    )
+    setup_dishka(container=container, app=app)
+
+    async with AsyncClient(app=app, base_url='http://test') as ac:
+        yield ac
+
+
+async def test_server_timing(traced_ac: AsyncClient, span_exporter):
+    trace_id = uuid4().hex
+    response = await traced_ac.get(
+        f'/products/{uuid4()}',
+        headers={'traceparent': f'00-{trace_id}-{"1" * 16}-01'},
+    )
+
+    assert response.status_code == 404, f'Wrong status code: {response.status_code}'
+
+    server_timing = response.headers['server-timing']
+    for layer in ('total', 'router', 'interactor', 'gateway', 'db'):
+        assert f'{layer};dur=' in server_timing
+    assert f'traceparent;desc="00-{trace_id}-' in server_timing
+
+    spans = span_exporter.traces[0]
+    assert {span.trace_id for span in spans} == {trace_id}
+    root = spans[-1]
+    assert root.name == 'GET /products/{product_id}'
+    assert root.parent_span_id == '1' * 16
+    assert {span.layer for span in spans} == {'request', 'interactor', 'gateway', 'db'}
+
+
+async def test_not_sampled_trace_is_not_exported(
+    traced_ac: AsyncClient,
+    span_exporter,
+):
+    response = await traced_ac.get(
+        f'/products/{uuid4()}',
+        headers={'traceparent': f'00-{uuid4().hex}-{"1" * 16}-00'},
+    )
+
+    assert 'server-timing' in response.headers
+    assert span_exporter.traces == []
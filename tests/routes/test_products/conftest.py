@@ -10,16 +10,17 @@ from products_app.application.interfaces.product import ProductGatewayProtocol
 from products_app.application.interfaces.unit_of_work import UnitOfWork
 from products_app.domain.entitites.category import CategoryEntity
 from products_app.domain.entitites.product import ProductEntity
+from products_app.infra.database.session import session_scope
 
 
 @pytest.fixture(scope='function')
 async def prepared_category(
     container: AsyncContainer,
 ) -> CategoryEntity:
-    async with container() as nested_container:
-        category_gateway = await nested_container.get(CategoryGatewayProtocol)
-        uow = await nested_container.get(UnitOfWork)
+    category_gateway = await container.get(CategoryGatewayProtocol)
+    uow = await container.get(UnitOfWork)
 
+    async with session_scope():
         category = CategoryEntity(
             id=str(uuid4()),
             name='test category',
@@ -29,8 +30,9 @@ async def prepared_category(
         await category_gateway.save(category)
         await uow.commit()
 
-        yield category
+    yield category
 
+    async with session_scope():
         await category_gateway.delete(category.id)
         await uow.commit()
 
@@ -39,11 +41,11 @@ async def prepared_category(
 async def prepared_product(
     container: AsyncContainer,
 ) -> ProductEntity:
-    async with container() as nested_container:
-        product_gateway = await nested_container.get(ProductGatewayProtocol)
-        uow = await nested_container.get(UnitOfWork)
-        category = await nested_container.get(CategoryGatewayProtocol)
+    product_gateway = await container.get(ProductGatewayProtocol)
+    uow = await container.get(UnitOfWork)
+    category = await container.get(CategoryGatewayProtocol)
 
+    async with session_scope():
         category_entity = CategoryEntity(
             id=str(uuid4()),
             name='test category',
@@ -68,8 +70,9 @@ async def prepared_product(
         await product_gateway.save(product)
         await uow.commit()
 
-        yield product
+    yield product
 
+    async with session_scope():
         await product_gateway.delete(product.id)
         await category.delete(category_entity.id)
         await uow.commit()
@@ -79,11 +82,11 @@ async def prepared_product(
 async def prepared_products(
     container: AsyncContainer,
 ) -> tuple[ProductEntity, ProductEntity]:
-    async with container() as nested_container:
-        product_gateway = await nested_container.get(ProductGatewayProtocol)
-        uow = await nested_container.get(UnitOfWork)
-        category = await nested_container.get(CategoryGatewayProtocol)
+    product_gateway = await container.get(ProductGatewayProtocol)
+    uow = await container.get(UnitOfWork)
+    category = await container.get(CategoryGatewayProtocol)
 
+    async with session_scope():
         category_entity = CategoryEntity(
             id=str(uuid4()),
             name='test category',
@@ -122,8 +125,9 @@ async def prepared_products(
         await product_gateway.save(product_2)
         await uow.commit()
 
-        yield product_1, product_2
+    yield product_1, product_2
 
+    async with session_scope():
         await product_gateway.delete(product_1.id)
         await product_gateway.delete(product_2.id)
         await category.delete(category_entity.id)
@@ -0,0 +1,240 @@
+import dataclasses
+from datetime import datetime
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from dishka import AsyncContainer
+from httpx import AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from products_app.application.interfaces.product import (
+    ProductGatewayProtocol,
+    ProductReader,
+)
+from products_app.application.interfaces.unit_of_work import UnitOfWork
+from products_app.config import AppConfig
+from products_app.controllers.http.routers.product import PRODUCT_LIST
+from products_app.controllers.schemas.product import ProductRead
+from products_app.domain.entitites.product import ProductEntity
+from products_app.infra.database.session import session_scope
+from tests.query_budget import count_queries
+
+
+@pytest.fixture
+def config(config) -> AppConfig:
+    return dataclasses.replace(
+        config,
+        common=config.common.model_copy(
+            update={
+                'DATABASE_RENDERED_ENDPOINTS': [
+                    'products_search',
+                    'products_list',
+                    'products_get',
+                ],
+            },
+        ),
+    )
+
+
+async def test_rendered_json_matches_python_rendering(
+    container: AsyncContainer,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    product_reader = await container.get(ProductReader)
+
+    async with session_scope():
+        products = await product_reader.get_all(limit=10, offset=0, filters=None)
+        rendered = await product_reader.get_all_json(limit=10, offset=0, filters=None)
+
+    expected = PRODUCT_LIST.dump_json(
+        PRODUCT_LIST.validate_python(products, from_attributes=True),
+    )
+    assert rendered == expected
+
+
+@pytest.mark.parametrize(
+    'created_at',
+    [datetime(2026, 1, 2, 3, 4, 5), datetime(2026, 1, 2, 3, 4, 5, 120000)],
+)
+async def test_rendered_json_matches_product_read(
+    container: AsyncContainer,
+    created_at: datetime,
+):
+    product_gateway = await container.get(ProductGatewayProtocol)
+    uow = await container.get(UnitOfWork)
+    product = ProductEntity(
+        id=str(uuid4()),
+        name='product "quoted"',
+        description='back\\slash\ttab\nnew line\x01 </script>',
+        price=Decimal('1234567890.12'),
+        stock=Decimal('0'),
+        unit='kg',
+        unit_size=Decimal('0.05'),
+        category_id=None,
+        created_at=created_at,
+        attributes={
+            'count': 10,
+            'weight': 2.0,
+            'small': 1e-06,
+            'tiny': 1e-05,
+            'big': 1e16,
+            'long': 10**20,
+            'negative': -0.5,
+            'nested': {'list': [1.5, None, True, 'x'], 'empty': {}},
+            'quote"key': 'value\n',
+        },
+    )
+
+    async with session_scope():
+        await product_gateway.save(product)
+        await uow.commit()
+
+    async with session_scope():
+        saved = await product_gateway.get_by_id(product.id)
+        rendered = await product_gateway.get_json_by_id(product.id)
+        await product_gateway.delete(product.id)
+        await uow.commit()
+
+    expected = ProductRead.model_validate(saved, from_attributes=True)
+    assert rendered == expected.model_dump_json().encode()
+
+
+async def test_get_product_by_id_rendered(
+    ac: AsyncClient,
+    prepared_product: ProductEntity,
+):
+    response = await ac.get(f'/products/{prepared_product.id}')
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'id': prepared_product.id,
+        'name': prepared_product.name,
+        'description': prepared_product.description,
+        'price': prepared_product.price,
+        'stock': prepared_product.stock,
+        'unit': prepared_product.unit,
+        'unit_size': prepared_product.unit_size,
+        'category_id': prepared_product.category_id,
+        'attributes': prepared_product.attributes,
+        'created_at': prepared_product.created_at.isoformat(),
+    }
+
+    response = await ac.get(f'/products/{uuid4()}')
+    assert response.status_code == 404
+
+
+async def test_rendered_json_follows_writes(
+    ac: AsyncClient,
+    prepared_product: ProductEntity,
+):
+    response = await ac.put(
+        f'/products/{prepared_product.id}',
+        json={
+            'name': 'updated product',
+            'description': 'test description',
+            'price': 70.5,
+            'stock': 10.0,
+            'unit': 'kg',
+            'unit_size': 1.0,
+            'category_id': prepared_product.category_id,
+            'attributes': {'test': 30},
+        },
+    )
+    assert response.status_code == 204
+
+    response = await ac.delete(f'/categories/{prepared_product.category_id}')
+    assert response.status_code == 204
+
+    response = await ac.get(f'/products/{prepared_product.id}')
+    product = response.json()
+    assert (product['name'], product['price'], product['attributes']) == (
+        'updated product',
+        70.5,
+        {'test': 30},
+    )
+    # Категория отвязана каскадом ON DELETE SET NULL
+    assert product['category_id'] is None
+
+
+async def test_rendered_json_drift_check(
+    ac: AsyncClient,
+    db_engine: AsyncEngine,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    response = await ac.get('/internal/rendered-products/drift')
+    assert response.json()['drifted_ids'] == []
+
+    # Запись в обход триггера, например при ручной правке с отключёнными триггерами
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            text('ALTER TABLE product DISABLE TRIGGER product_render_json'),
+        )
+        await connection.execute(
+            text('UPDATE product SET price = 1 WHERE id = :id'),
+            {'id': prepared_products[1].id},
+        )
+        await connection.execute(
+            text('ALTER TABLE product ENABLE TRIGGER product_render_json'),
+        )
+
+    drifted_ids = []
+    after_id = None
+    while True:
+        response = await ac.get(
+            '/internal/rendered-products/drift',
+            params={'limit': 1, **({'after_id': after_id} if after_id else {})},
+        )
+        check = response.json()
+        if check['checked'] == 0:
+            break
+
+        drifted_ids.extend(check['drifted_ids'])
+        after_id = check['last_id']
+
+    assert drifted_ids == [prepared_products[1].id]
+
+
+@pytest.mark.parametrize(
+    'method, url, filters',
+    [
+        ('POST', '/products/search', {'test__gt': 15}),
+        ('GET', '/products?test__gt=15', None),
+    ],
+)
+async def test_search_rendered_in_database(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+    method: str,
+    url: str,
+    filters: dict | None,
+):
+    with count_queries() as log:
+        response = await ac.request(method, url, json=filters)
+
+    assert response.status_code == 200
+    assert [product['id'] for product in response.json()] == [prepared_products[1].id]
+    [statement] = [
+        statement for statement in log.statements if statement.startswith('SELECT')
+    ]
+    assert 'product.rendered_json' in statement
+
+
+async def test_search_rendered_in_database_empty(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    response = await ac.post('/products/search', json={'test__gt': 100})
+
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+async def test_search_rendered_in_database_bad_filters(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    response = await ac.post('/products/search', json={'price__le': 50})
+
+    assert response.status_code == 400
@@ -1,14 +1,33 @@
+import asyncio
+import time
+from datetime import datetime
+from decimal import Decimal
 from typing import Any
 from uuid import uuid4
 
 import pytest
 from dishka import AsyncContainer
 from httpx import AsyncClient
+from sqlalchemy import event, select, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from products_app.application.interfaces.product import ProductGatewayProtocol
+from products_app.application.interfaces.product import (
+    ProductGatewayProtocol,
+    ProductReader,
+)
 from products_app.application.interfaces.unit_of_work import UnitOfWork
 from products_app.domain.entitites.category import CategoryEntity
 from products_app.domain.entitites.product import ProductEntity
+from products_app.infra.database.models import ProductModel
+from products_app.infra.database.routing import ReaderSessionMakers, routing_scope
+from products_app.infra.database.session import (
+    ReaderSessionHandle,
+    SessionHandle,
+    session_scope,
+)
+from products_app.infra.database.timeouts import statement_timeout_scope
+from tests.query_budget import QueryBudget, count_queries, format_ids
 
 
 async def test_get_product_by_id(
@@ -76,7 +95,7 @@ async def test_create_product(
     )
     assert response.status_code == 201
 
-    async with container() as nested_container:
+    async with container() as nested_container, session_scope():
         product_gateway = await nested_container.get(ProductGatewayProtocol)
         uow = await nested_container.get(UnitOfWork)
         product = await product_gateway.get_by_id(str(response.json()['id']))
@@ -417,6 +436,9 @@ async def test_update_product_bad_unit(
         {'name_1': 'test product'},
         {'name__gt': 'test product'},
         {'price__le': 50.0},
+        {'price__lt': 'inf'},
+        {'name__gt': 5},
+        {'unit_size__eq': 'abc'},
     ],
 )
 async def test_search_bad_filters(
@@ -452,3 +474,521 @@ async def test_search_products_success(
 
     assert len(json_response) == 1
     assert json_response[0]['id'] == prepared_products[0].id
+
+
+@pytest.mark.parametrize(
+    'query',
+    [
+        'price__gt=40&price__lt=100',
+        'price__eq=50.0',
+        'test__eq=10',
+        'test__lt=20&unit__eq=kg',
+    ],
+)
+async def test_search_products_by_query(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+    query: str,
+):
+    response = await ac.get(f'/products?{query}')
+
+    assert response.status_code == 200
+    assert [product['id'] for product in response.json()] == [prepared_products[0].id]
+
+
+@pytest.mark.parametrize(
+    'query',
+    [
+        'name=test',
+        'price__le=50',
+        'price__gt=abc',
+        'price__lt=1e999',
+        'price__eq=1e999',
+        'name__gt=5',
+        'id__eq=123',
+        'test__gt=1e40000',
+    ],
+)
+async def test_search_products_by_query_bad_filters(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+    query: str,
+):
+    response = await ac.get(f'/products?{query}')
+
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('query', ['name__eq=123', 'unit__eq=1e999'])
+async def test_search_products_by_query_numeric_string(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+    query: str,
+):
+    response = await ac.get(f'/products?{query}')
+
+    # Строковые столбцы сравниваются со строкой, даже если она похожа на число
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+async def test_get_product_by_id_with_fields(
+    ac: AsyncClient,
+    prepared_product: ProductEntity,
+):
+    with count_queries() as log:
+        response = await ac.get(
+            f'/products/{prepared_product.id}',
+            params={'fields': 'price,id,attributes.test,attributes.missing'},
+        )
+
+    assert response.status_code == 200
+    assert response.json() == {
+        'price': prepared_product.price,
+        'attributes': {'test': 10},
+        'id': prepared_product.id,
+    }
+    # В SELECT попадают только запрошенные поля и ключи атрибутов
+    [statement] = [
+        statement for statement in log.statements if statement.startswith('SELECT')
+    ]
+    assert 'description' not in statement
+    assert 'product.attributes[' in statement
+
+
+async def test_search_products_with_fields(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    response = await ac.post(
+        '/products/search',
+        params={'fields': 'id,name,unit'},
+        json={'test__gt': 15},
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {
+            'name': prepared_products[1].name,
+            'unit': prepared_products[1].unit,
+            'id': prepared_products[1].id,
+        },
+    ]
+
+    response = await ac.get('/products?test__gt=15&fields=id,attributes')
+    assert response.json() == [
+        {
+            'attributes': prepared_products[1].attributes,
+            'id': prepared_products[1].id,
+        },
+    ]
+
+
+@pytest.mark.parametrize('fields', ['', 'id,unknown', 'attributes.', 'name.test'])
+async def test_get_product_by_id_bad_fields(
+    ac: AsyncClient,
+    prepared_product: ProductEntity,
+    fields: str,
+):
+    response = await ac.get(
+        f'/products/{prepared_product.id}',
+        params={'fields': fields},
+    )
+
+    assert response.status_code == 400
+
+
+async def test_search_products_expand_category(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    category_id = prepared_products[0].category_id
+
+    with count_queries() as log:
+        response = await ac.post(
+            '/products/search',
+            params={'expand': 'category', 'fields': 'id,name'},
+        )
+
+    assert response.status_code == 200
+    json_response = response.json()
+    # Категория читается тем же запросом и не повторяется для каждого товара
+    assert len(log.statements) == 1, log.report('expand=category', 1, None)
+    assert json_response['data'] == [
+        {'id': product.id, 'name': product.name, 'category_id': category_id}
+        for product in prepared_products
+    ]
+    assert list(json_response['included']['categories']) == [category_id]
+    assert json_response['included']['categories'][category_id]['name'] == (
+        'test category'
+    )
+
+
+async def test_get_product_by_id_expand_category_path(
+    ac: AsyncClient,
+    prepared_category: CategoryEntity,
+):
+    parent_id = prepared_category.id
+    for name in ('child category', 'leaf category'):
+        response = await ac.post(
+            '/categories/',
+            json={'name': name, 'parent_category_id': parent_id},
+        )
+        parent_id = response.json()['id']
+
+    response = await ac.post(
+        '/products/',
+        json={**PRODUCT_BODY, 'category_id': parent_id},
+    )
+    product_id = response.json()['id']
+
+    with count_queries() as log:
+        response = await ac.get(
+            f'/products/{product_id}',
+            params={'expand': 'category_path'},
+        )
+
+    assert response.status_code == 200
+    json_response = response.json()
+    assert json_response['data']['id'] == product_id
+    assert json_response['data']['category_id'] == parent_id
+    categories = json_response['included']['categories']
+    assert sorted(category['name'] for category in categories.values()) == [
+        'child category',
+        'leaf category',
+        'test category',
+    ]
+    # Товар вместе с категорией и всеми родительскими категориями одним запросом
+    assert len(log.statements) == 1, log.report('expand=category_path', 1, None)
+
+
+async def test_search_products_expand_category_path(
+    ac: AsyncClient,
+    prepared_category: CategoryEntity,
+):
+    category_ids = []
+    for name in ('first leaf', 'second leaf'):
+        response = await ac.post(
+            '/categories/',
+            json={'name': name, 'parent_category_id': prepared_category.id},
+        )
+        category_ids.append(response.json()['id'])
+    for category_id in category_ids:
+        response = await ac.post(
+            '/products/',
+            json={**PRODUCT_BODY, 'category_id': category_id},
+        )
+        assert response.status_code == 201
+
+    with count_queries() as log:
+        response = await ac.post(
+            '/products/search',
+            params={'expand': 'category_path', 'fields': 'id,category_id'},
+        )
+
+    assert response.status_code == 200
+    json_response = response.json()
+    assert len(log.statements) == 1, log.report('expand=category_path', 1, None)
+    assert sorted(product['category_id'] for product in json_response['data']) == (
+        sorted(category_ids)
+    )
+    # Общая родительская категория в ответе один раз
+    categories = json_response['included']['categories']
+    assert sorted(categories) == sorted([*category_ids, prepared_category.id])
+
+
+async def test_get_product_by_id_expand_not_found(ac: AsyncClient):
+    response = await ac.get(f'/products/{uuid4()}', params={'expand': 'category'})
+
+    assert response.status_code == 404
+
+
+async def test_category_deletion_job_detaches_products(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    category_id = prepared_products[0].category_id
+
+    response = await ac.post(f'/categories/{category_id}/deletion-jobs?batch_size=1')
+    assert response.status_code == 202
+
+    job_id = response.json()['id']
+    # Задача выполняется отдельно от запроса
+    deadline = time.monotonic() + 5
+    while True:
+        response = await ac.get(f'/categories/deletion-jobs/{job_id}')
+        assert response.status_code == 200
+
+        job = response.json()
+        if job['status'] not in ('pending', 'running') or time.monotonic() > deadline:
+            break
+        await asyncio.sleep(0.01)
+
+    assert job['status'] == 'done'
+    assert job['detached_products'] == 2
+
+    for product in prepared_products:
+        response = await ac.get(f'/products/{product.id}')
+        assert response.status_code == 200
+        assert response.json()['category_id'] is None
+
+
+@pytest.mark.parametrize('read_only', [True, False])
+async def test_reader_session_transaction(
+    container: AsyncContainer,
+    read_only: bool,
+):
+    session_handle = await container.get(SessionHandle)
+    reader_session_handle = await container.get(ReaderSessionHandle)
+
+    with routing_scope(use_primary=False, read_only=read_only):
+        async with session_scope():
+            await reader_session_handle.execute(select(1))
+            connection = await reader_session_handle.connection()
+            raw_connection = await connection.get_raw_connection()
+
+            # Сессия для чтения не открывает транзакцию в БД
+            assert raw_connection.driver_connection.is_in_transaction() is not read_only
+            assert (
+                reader_session_handle.session is session_handle.session
+            ) is not read_only
+
+
+@pytest.mark.parametrize(
+    'method, url',
+    [
+        ('POST', '/products/search'),
+        ('GET', '/products'),
+        ('GET', '/products/{product_id}'),
+    ],
+)
+async def test_read_only_routes_use_reader_session(
+    ac: AsyncClient,
+    prepared_product: ProductEntity,
+    monkeypatch: pytest.MonkeyPatch,
+    method: str,
+    url: str,
+):
+    targets = []
+    read_target = ReaderSessionMakers.read_target
+
+    def spy_read_target(self: ReaderSessionMakers):
+        targets.append(read_target(self))
+        return targets[-1]
+
+    monkeypatch.setattr(ReaderSessionMakers, 'read_target', spy_read_target)
+
+    response = await ac.request(method, url.format(product_id=prepared_product.id))
+
+    assert response.status_code < 300, f'Wrong status code: {response.status_code}'
+    # Чтение определяется зависимостью роута, а не HTTP-методом
+    assert targets and set(targets) == {'primary'}
+
+
+async def test_update_product_deadline_exceeded(
+    ac: AsyncClient,
+    prepared_product: ProductEntity,
+    async_session_factory: async_sessionmaker[AsyncSession],
+):
+    async with async_session_factory() as locking_session:
+        # Держим блокировку строки, чтобы UPDATE из запроса ждал её до таймаута
+        await locking_session.execute(
+            select(ProductModel)
+            .where(ProductModel.id == prepared_product.id)
+            .with_for_update(),
+        )
+
+        response = await ac.put(
+            f'/products/{prepared_product.id}',
+            headers={'X-Request-Timeout': '0.5'},
+            json={
+                'name': 'test product upd',
+                'description': 'test description upd',
+                'price': 100.0,
+                'stock': 100.0,
+                'unit': 'pc',
+                'unit_size': 2.0,
+                'category_id': prepared_product.category_id,
+                'attributes': {},
+            },
+        )
+
+    assert response.status_code == 504, f'Wrong status code: {response.status_code}'
+
+
+@pytest.mark.parametrize(
+    'headers, status_code',
+    [
+        ({'X-Request-Deadline': '1'}, 504),
+        ({'X-Request-Timeout': '-1'}, 504),
+        ({'X-Request-Timeout': 'soon'}, 400),
+        ({'X-Request-Deadline': 'inf'}, 400),
+    ],
+)
+async def test_search_bad_deadline(
+    ac: AsyncClient,
+    headers: dict[str, str],
+    status_code: int,
+):
+    response = await ac.post('/products/search', headers=headers)
+
+    assert response.status_code == status_code, (
+        f'Wrong status code: {response.status_code}'
+    )
+
+
+async def test_statement_timeout_on_autocommit_session(container: AsyncContainer):
+    reader_session_handle = await container.get(ReaderSessionHandle)
+
+    with routing_scope(use_primary=False, read_only=True):
+        with statement_timeout_scope() as state:
+            state.timeout = 0.5
+            async with session_scope():
+                timeout = await reader_session_handle.scalar(
+                    text('SHOW statement_timeout'),
+                )
+                assert timeout == '500ms'
+
+        # Следующий запрос без таймаута роута возвращает таймаут по умолчанию
+        with statement_timeout_scope():
+            async with session_scope():
+                timeout = await reader_session_handle.scalar(
+                    text('SHOW statement_timeout'),
+                )
+                assert timeout == '30s'
+
+
+async def test_concurrent_get_by_id_batched(
+    ac: AsyncClient,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    product_1, product_2 = prepared_products
+    missing_id = str(uuid4())
+    product_ids = [product_1.id, product_2.id, product_1.id, missing_id, product_1.id]
+
+    with count_queries() as log:
+        responses = await asyncio.gather(
+            *(ac.get(f'/products/{product_id}') for product_id in product_ids),
+            ac.get(f'/categories/{product_1.category_id}'),
+            ac.get(f'/categories/{uuid4()}'),
+        )
+
+    assert [response.status_code for response in responses] == [
+        200,
+        200,
+        200,
+        404,
+        200,
+        200,
+        404,
+    ]
+    assert [response.json()['id'] for response in responses[:3]] == product_ids[:3]
+    # Одинаковые id ждут общую загрузку, разные id одной таблицы уходят одним запросом
+    assert len(log.statements) == 2, log.report('concurrent get_by_id', 2, None)
+    assert all('= ANY (' in statement for statement in log.statements)
+
+
+async def test_point_loader_batch_ignores_caller_deadline(
+    container: AsyncContainer,
+    prepared_product: ProductEntity,
+):
+    product_reader = await container.get(ProductReader)
+    timeouts = []
+
+    def record_timeout(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SET '):
+            timeouts.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record_timeout)
+    try:
+        with routing_scope(use_primary=False, read_only=True):
+            with statement_timeout_scope() as state:
+                state.timeout = 0.5
+                async with session_scope():
+                    assert await product_reader.get_by_id(prepared_product.id)
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record_timeout)
+
+    # Пачка общая для нескольких запросов, поэтому таймаут у неё свой
+    assert timeouts == ['SET statement_timeout = 2000']
+
+
+async def test_get_by_id_in_transaction_reads_own_session(
+    container: AsyncContainer,
+    prepared_category: CategoryEntity,
+):
+    product_gateway = await container.get(ProductGatewayProtocol)
+    product_reader = await container.get(ProductReader)
+    uow = await container.get(UnitOfWork)
+
+    product = ProductEntity(
+        id=str(uuid4()),
+        name='uncommitted product',
+        description='test description',
+        price=Decimal(50.0),
+        stock=Decimal(10.0),
+        unit='kg',
+        unit_size=Decimal(1.0),
+        category_id=prepared_category.id,
+        created_at=datetime.utcnow(),
+        attributes={},
+    )
+
+    with routing_scope(use_primary=True, read_only=False):
+        async with session_scope():
+            await product_gateway.save(product)
+            await uow.flush()
+
+            # Вне запроса на чтение гейтвей не ходит в общий загрузчик
+            # и видит незакоммиченную запись своей транзакции
+            assert await product_reader.get_by_id(product.id) is not None
+
+            await uow.rollback()
+
+
+PRODUCT_BODY = {
+    'name': 'test product',
+    'description': 'test description',
+    'price': 50.0,
+    'stock': 10.0,
+    'unit': 'kg',
+    'unit_size': 1.0,
+    'category_id': '{category_id}',
+    'attributes': {'test': 10},
+}
+
+# Бюджеты запросов к БД на эндпоинт: (метод, url, тело, запросы, обмены с БД)
+PRODUCT_QUERY_BUDGETS = [
+    ('GET', '/products/{product_id}', None, 1, 2),
+    ('POST', '/products/search', {'test__gt': 5, 'price__lt': 100}, 1, 4),
+    ('GET', '/products?test__gt=5&price__lt=100', None, 1, 4),
+    ('POST', '/products/', PRODUCT_BODY, 2, 5),
+    ('PUT', '/products/{product_id}', PRODUCT_BODY, 3, 6),
+    ('DELETE', '/products/{product_id}', None, 1, 4),
+]
+
+
+@pytest.mark.parametrize(
+    'method, url, body, queries, round_trips',
+    PRODUCT_QUERY_BUDGETS,
+    ids=[f'{method} {url}' for method, url, *_ in PRODUCT_QUERY_BUDGETS],
+)
+async def test_product_query_budget(
+    ac: AsyncClient,
+    query_budget: QueryBudget,
+    prepared_product: ProductEntity,
+    method: str,
+    url: str,
+    body: Any,
+    queries: int,
+    round_trips: int,
+):
+    ids = {
+        'product_id': prepared_product.id,
+        'category_id': prepared_product.category_id,
+    }
+    url = format_ids(url, **ids)
+
+    with query_budget(f'{method} {url}', queries=queries, round_trips=round_trips):
+        response = await ac.request(method, url, json=format_ids(body, **ids))
+
+    assert response.status_code < 400, f'Wrong status code: {response.status_code}'
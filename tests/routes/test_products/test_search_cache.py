@@ -0,0 +1,221 @@
+import asyncio
+import dataclasses
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from dishka import make_async_container
+from httpx import AsyncClient
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from products_app.application.dto.product import ProductFieldsDTO
+from products_app.config import AppConfig
+from products_app.domain.entitites.product import ProductEntity
+from products_app.infra.database.models import ProductModel
+from products_app.infra.search_cache import SearchResultCache, search_cache_key
+from products_app.ioc.main import providers
+
+
+SEARCH_FILTERS = {'test__gt': 15, 'price__lt': 500}
+
+
+def test_search_cache_key_is_canonical():
+    assert search_cache_key(
+        {'price__lt': 500.0, 'color__eq': 'red'},
+        limit=20,
+        offset=0,
+    ) == search_cache_key({'color__eq': 'red', 'price__lt': 500}, limit=20, offset=0)
+    assert search_cache_key({'price__lt': 500}, limit=20, offset=0) != search_cache_key(
+        {'price__lt': 500},
+        limit=20,
+        offset=20,
+    )
+    assert search_cache_key({}, limit=20, offset=0) != search_cache_key(
+        {},
+        limit=20,
+        offset=0,
+        fields=ProductFieldsDTO(fields=('id', 'name')),
+    )
+
+
+async def test_search_cache_hit(
+    ac: AsyncClient,
+    search_cache: SearchResultCache,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    first = await ac.post('/products/search', json=SEARCH_FILTERS)
+    second = await ac.post(
+        '/products/search',
+        json=dict(reversed(SEARCH_FILTERS.items())),
+    )
+
+    assert first.status_code == second.status_code == 200
+    assert first.headers['x-cache'] == 'MISS'
+    assert second.headers['x-cache'] == 'HIT'
+    assert second.content == first.content
+    assert [product['id'] for product in first.json()] == [prepared_products[1].id]
+
+
+async def test_search_cache_shared_by_get_and_post(
+    ac: AsyncClient,
+    search_cache: SearchResultCache,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    first = await ac.post('/products/search', json=SEARCH_FILTERS)
+    second = await ac.get('/products?price__lt=500.0&test__gt=15')
+
+    assert second.status_code == 200
+    assert second.headers['x-cache'] == 'HIT'
+    assert second.headers['cache-control'] == 'public, max-age=5'
+    assert second.headers['vary'] == 'Accept-Encoding'
+    assert second.content == first.content
+
+
+async def test_search_cache_invalidated_by_write(
+    ac: AsyncClient,
+    search_cache: SearchResultCache,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    response = await ac.post('/products/search', json=SEARCH_FILTERS)
+    assert len(response.json()) == 1
+
+    response = await ac.post(
+        '/products/',
+        json={
+            'name': 'new product',
+            'description': 'test description',
+            'price': 50.0,
+            'stock': 10.0,
+            'unit': 'kg',
+            'unit_size': 1.0,
+            'category_id': prepared_products[0].category_id,
+            'attributes': {'test': 30},
+        },
+    )
+    assert response.status_code == 201
+    # Другой клиент, не закреплённый за мастером после записи
+    ac.cookies.clear()
+
+    response = await ac.post('/products/search', json=SEARCH_FILTERS)
+    assert response.headers['x-cache'] == 'MISS'
+    assert len(response.json()) == 2
+
+
+async def test_search_cache_invalidated_by_other_worker(
+    ac: AsyncClient,
+    search_cache: SearchResultCache,
+    db_engine: AsyncEngine,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    response = await ac.post('/products/search', json=SEARCH_FILTERS)
+    assert len(response.json()) == 1
+
+    # Запись мимо сессий приложения, о ней воркер узнаёт только из уведомления
+    version = search_cache.version
+    async with db_engine.begin() as connection:
+        await connection.execute(
+            insert(ProductModel).values(
+                id=uuid4(),
+                name='new product',
+                description='test description',
+                price=50,
+                stock=10,
+                unit='kg',
+                unit_size=1,
+                attributes={'test': 30},
+            ),
+        )
+
+    deadline = time.monotonic() + 5
+    while search_cache.version == version and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+    response = await ac.post('/products/search', json=SEARCH_FILTERS)
+    assert response.headers['x-cache'] == 'MISS'
+    assert len(response.json()) == 2
+
+
+async def test_search_cache_bypassed_for_pinned_client(
+    ac: AsyncClient,
+    search_cache: SearchResultCache,
+    prepared_products: tuple[ProductEntity, ProductEntity],
+):
+    await ac.post('/products/search', json=SEARCH_FILTERS)
+
+    ac.cookies.set('db_primary_until', str(time.time() + 60))
+    response = await ac.post('/products/search', json=SEARCH_FILTERS)
+
+    assert response.headers['x-cache'] == 'MISS'
+
+    response = await ac.get('/products?test__gt=15&price__lt=500')
+    assert response.headers['cache-control'] == 'no-store'
+
+
+async def test_search_cache_stale_while_revalidate():
+    search_cache = SearchResultCache(
+        max_bytes=1024,
+        ttl=0,
+        stale_ttl=60,
+        listener=SimpleNamespace(listening=True),
+    )
+    search_cache.store('key', b'old', search_cache.version)
+
+    lookup = search_cache.lookup('key')
+    assert (lookup.body, lookup.stale, lookup.refresh) == (b'old', True, True)
+    # Обновляет только первый запрос, остальные получают старый ответ
+    assert search_cache.lookup('key').refresh is False
+
+    async def load() -> bytes:
+        return b'new'
+
+    await search_cache.refresh('key', load)
+    assert search_cache.lookup('key').body == b'new'
+
+
+def test_search_cache_refresh_reset_by_store():
+    search_cache = SearchResultCache(
+        max_bytes=1024,
+        ttl=0,
+        stale_ttl=60,
+        listener=SimpleNamespace(listening=True),
+    )
+    search_cache.store('key', b'old', search_cache.version)
+    assert search_cache.lookup('key').refresh is True
+
+    # Запись сохранил другой запрос, а фоновое обновление так и не выполнилось
+    search_cache.store('key', b'new', search_cache.version)
+    assert search_cache.lookup('key').refresh is True
+
+
+async def test_search_cache_disabled_with_replicas(config: AppConfig):
+    config = dataclasses.replace(
+        config,
+        postgres=config.postgres.model_copy(
+            update={'POSTGRES_REPLICA_URIS': [config.postgres.database_uri]},
+        ),
+    )
+    container = make_async_container(*providers, context={AppConfig: config})
+    try:
+        search_cache = await container.get(SearchResultCache)
+        assert search_cache.enabled is False
+    finally:
+        await container.close()
+
+
+def test_search_cache_memory_bounded():
+    search_cache = SearchResultCache(
+        max_bytes=10,
+        ttl=60,
+        stale_ttl=0,
+        listener=SimpleNamespace(listening=True),
+    )
+    search_cache.store('first', b'12345', search_cache.version)
+    search_cache.store('second', b'12345', search_cache.version)
+    search_cache.lookup('first')
+    search_cache.store('third', b'12345', search_cache.version)
+
+    # Вытесняется запись, к которой дольше всех не обращались
+    assert search_cache.lookup('second').body is None
+    assert search_cache.lookup('first').body == b'12345'
+    assert search_cache.lookup('third').body == b'12345'
@@ -0,0 +1,137 @@
+import asyncio
+import dataclasses
+from datetime import datetime
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from dishka import AsyncContainer
+from httpx import AsyncClient
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from products_app.application.interfaces.product import ProductReader, ProductWriter
+from products_app.config import AppConfig
+from products_app.domain.entitites.category import CategoryEntity
+from products_app.domain.entitites.product import ProductEntity
+from products_app.domain.exceptions.category import CategoryNotFoundError
+from products_app.infra.database.session import session_scope
+from products_app.infra.database.timeouts import statement_timeout_scope
+from tests.query_budget import count_queries
+
+
+@pytest.fixture
+def config(config) -> AppConfig:
+    # Задержка с запасом, чтобы все конкурентные запросы теста попали в одну пачку
+    return dataclasses.replace(
+        config,
+        postgres=config.postgres.model_copy(
+            update={
+                'POSTGRES_WRITE_BATCHING': True,
+                'POSTGRES_WRITE_BATCH_DELAY': 0.05,
+            },
+        ),
+    )
+
+
+def new_product(category_id: str) -> ProductEntity:
+    return ProductEntity(
+        id=str(uuid4()),
+        name='test product',
+        description='test description',
+        price=Decimal(50.0),
+        stock=Decimal(10.0),
+        unit='kg',
+        unit_size=Decimal(1.0),
+        category_id=category_id,
+        created_at=datetime.utcnow(),
+        attributes={'test': 10},
+    )
+
+
+async def test_concurrent_creates_share_one_insert(
+    ac: AsyncClient,
+    prepared_category: CategoryEntity,
+):
+    body = {
+        'name': 'test product',
+        'description': 'test description',
+        'price': 50.0,
+        'stock': 10.0,
+        'unit': 'kg',
+        'unit_size': 1.0,
+        'category_id': prepared_category.id,
+        'attributes': {'test': 10},
+    }
+
+    with count_queries() as log:
+        responses = await asyncio.gather(
+            *(ac.post('/products/', json=body) for _ in range(5)),
+        )
+
+    assert [response.status_code for response in responses] == [201] * 5
+    # Каждый клиент закрепляется за мастером, хотя коммит был общий
+    assert all('db_primary_until' in response.cookies for response in responses)
+
+    inserts = [
+        statement
+        for statement in log.statements
+        if statement.startswith('INSERT INTO product')
+    ]
+    assert len(inserts) == 1, log.report('concurrent creates', 1, None)
+
+    product_ids = {response.json()['id'] for response in responses}
+    assert len(product_ids) == 5
+    for product_id in product_ids:
+        response = await ac.get(f'/products/{product_id}')
+        assert response.status_code == 200
+
+
+async def test_row_error_fails_only_its_caller(
+    container: AsyncContainer,
+    prepared_category: CategoryEntity,
+):
+    product_writer = await container.get(ProductWriter)
+    product_reader = await container.get(ProductReader)
+
+    products = [
+        new_product(prepared_category.id),
+        new_product(str(uuid4())),
+        new_product(prepared_category.id),
+    ]
+    results = await asyncio.gather(
+        *(product_writer.create(product=product) for product in products),
+        return_exceptions=True,
+    )
+
+    assert results[0] is None
+    assert isinstance(results[1], CategoryNotFoundError)
+    assert results[2] is None
+
+    async with session_scope():
+        assert await product_reader.get_by_id(products[0].id) is not None
+        assert await product_reader.get_by_id(products[1].id) is None
+        assert await product_reader.get_by_id(products[2].id) is not None
+
+
+async def test_batch_ignores_caller_deadline(
+    container: AsyncContainer,
+    prepared_category: CategoryEntity,
+):
+    product_writer = await container.get(ProductWriter)
+    timeouts = []
+
+    def record_timeout(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith('SET '):
+            timeouts.append(statement)
+
+    event.listen(Engine, 'before_cursor_execute', record_timeout)
+    try:
+        with statement_timeout_scope() as state:
+            state.timeout = 0.5
+            await product_writer.create(product=new_product(prepared_category.id))
+    finally:
+        event.remove(Engine, 'before_cursor_execute', record_timeout)
+
+    # Пачка общая для нескольких запросов, поэтому таймаут у неё свой
+    assert timeouts == ['SET LOCAL statement_timeout = 5000']